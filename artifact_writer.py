@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Artifact Writer
+
+Crash- and concurrency-safe writes for the pipeline outputs (canonical and
+multilingual recipes, images, icons, the ingredient dictionary), shared by
+the stage scripts:
+
+- write_json() / atomic_save(): write to a temporary file next to the target
+  and rename it into place. Readers, and a run after a crash, see the old file
+  or the new one, never a torn one.
+- write_json_unique() / atomic_unique_save(): write a complete temporary file
+  and hard-link it to the first free "<stem>.json", "<stem>_1.json", ...
+  (the link fails if the name exists). Concurrent workers and processes never
+  get the same name, without a lock, and never see an empty file.
+- DictionaryUpdates: batched additions to the ingredient dictionary. New
+  entries are appended to a journal next to the dictionary in batches and
+  merged into it with one atomic write at the end of a run. Entries journaled
+  by a crashed run are merged by the next commit.
+
+Usage:
+    write_json(output_file, recipe)
+    atomic_save(image.save, image_path)              # anything that writes to a path
+
+    output_file = write_json_unique(OUTPUT_DIR, recipe_id, recipe)
+
+    dictionary = DictionaryUpdates(DICTIONARY_FILE, section="ingredients")
+    dictionary.add("olive_oil", {"en": "Olive oil", "he": None, "es": None, "ar": None})
+    dictionary.commit()
+"""
+
+import os
+import json
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+
+JOURNAL_BATCH = 50  # dictionary entries buffered before they are appended to the journal
+
+
+# ============================================================================
+# ATOMIC WRITES
+# ============================================================================
+
+def _fsync(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_path(path: Path) -> Iterator[Path]:
+    """
+    Temporary path to write a file's new contents to; it replaces the file
+    when the block exits without an error (and is removed otherwise).
+
+    The temporary name keeps the suffix, so writers that pick a format from
+    the extension (PIL) still work.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp{path.suffix}")
+    try:
+        yield tmp_path
+        _fsync(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def atomic_save(save: Callable[[str], Any], path: Path) -> Path:
+    """
+    Atomically write a file through a function that writes to a path.
+
+    Args:
+        save: Called with the temporary path, e.g. image.save
+        path: Final location
+
+    Returns:
+        path
+    """
+    with atomic_path(path) as tmp_path:
+        save(str(tmp_path))
+    return Path(path)
+
+
+def write_json(path: Path, data: Any, indent: Optional[int] = 2) -> Path:
+    """
+    Atomically write JSON (UTF-8, non-ASCII kept as is).
+
+    Args:
+        path: Output file
+        data: JSON-serializable value
+        indent: As for json.dump
+
+    Returns:
+        path
+    """
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+    return Path(path)
+
+
+# ============================================================================
+# UNIQUE NAMES
+# ============================================================================
+
+def atomic_unique_save(save: Callable[[str], Any], directory: Path, stem: str, suffix: str = ".json") -> Path:
+    """
+    Write a file through a function that writes to a path, under the first
+    free name among <stem><suffix>, <stem>_1<suffix>, ...
+
+    The contents are written to a temporary file first, which is then
+    hard-linked to the name (the link fails if the name exists), so two
+    workers can never get the same name and readers never see an empty or
+    partly written file.
+
+    Args:
+        save: Called with the temporary path, e.g. image.save
+        directory: Where the file goes
+        stem: Preferred file name without suffix
+        suffix: File extension
+
+    Returns:
+        The path written
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp_path = directory / f".{stem}.{os.getpid()}.{threading.get_ident()}.tmp{suffix}"
+    try:
+        save(str(tmp_path))
+        _fsync(tmp_path)
+        counter = 0
+        while True:
+            path = directory / (f"{stem}{suffix}" if counter == 0 else f"{stem}_{counter}{suffix}")
+            try:
+                os.link(tmp_path, path)
+                return path
+            except FileExistsError:
+                counter += 1
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def write_json_unique(directory: Path, stem: str, data: Any, indent: Optional[int] = 2) -> Path:
+    """
+    Write JSON under the first free name among <stem>.json, <stem>_1.json, ...
+
+    Args:
+        directory: Where the file goes
+        stem: Preferred file name without suffix
+        data: JSON-serializable value
+        indent: As for json.dump
+
+    Returns:
+        The path written
+    """
+    def save(tmp_path: str) -> None:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+    return atomic_unique_save(save, directory, stem)
+
+
+# ============================================================================
+# DICTIONARY UPDATES
+# ============================================================================
+
+class DictionaryUpdates:
+    """Batched, journaled additions to a {key: entry} section of a JSON file."""
+
+    def __init__(self, path: Path, section: str, batch: int = JOURNAL_BATCH, template: Optional[Dict] = None):
+        """
+        Args:
+            path: The JSON file (relative paths resolve when written)
+            section: Top-level key holding the entries
+            batch: Entries buffered before they are journaled
+            template: File contents to start from if it doesn't exist
+        """
+        self.path = Path(path)
+        self.section = section
+        self.batch = batch
+        self.template = template or {section: {}}
+        self._pending: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def journal_path(self) -> Path:
+        return self.path.with_name(f"{self.path.name}.journal")
+
+    def add(self, key: str, entry: Any) -> None:
+        """Add an entry unless the file already has the key (buffered, then journaled)."""
+        with self._lock:
+            self._pending.setdefault(key, entry)
+            if len(self._pending) >= self.batch:
+                self._journal()
+
+    def _journal(self) -> None:
+        if not self._pending:
+            return
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self._pending, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._pending = {}
+
+    def flush(self) -> None:
+        """Journal the buffered entries."""
+        with self._lock:
+            self._journal()
+
+    def clear(self) -> None:
+        """Drop buffered entries that were not journaled yet."""
+        with self._lock:
+            self._pending = {}
+
+    def commit(self) -> int:
+        """
+        Merge the journal (including entries left by a crashed run) into the
+        file with one atomic write, then remove the journal.
+
+        Returns:
+            Number of keys added to the file
+        """
+        with self._lock:
+            self._journal()
+            if not self.journal_path.exists():
+                return 0
+            updates: Dict[str, Any] = {}
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        for key, entry in json.loads(line).items():
+                            updates.setdefault(key, entry)
+                    except (json.JSONDecodeError, AttributeError):
+                        continue  # torn last line from a crash
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                data = json.loads(json.dumps(self.template))
+            entries = data.setdefault(self.section, {})
+            added = [key for key in updates if key not in entries]
+            for key in added:
+                entries[key] = updates[key]
+            data[self.section] = dict(sorted(entries.items()))
+            write_json(self.path, data)
+            self.journal_path.unlink()
+            return len(added)
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmarks
+
+Runs canonize_all, multilingualize_all and IngredientIconGenerator.generate_all
+against the Gemini stand-in (gemini_standin.py) at several worker counts and
+reports items per second. No API keys or network are needed, so the numbers
+are reproducible.
+
+Each run works in a scratch directory built from the repo's own data:
+- Source recipes are derived from the Hebrew side of
+  data/recipes_multilingual_v2.
+- Canonical recipes are derived from the English side.
+- Ingredient names come from recipes_ingredients_matrix.csv.
+The stand-in answers each request with the matching recipe. Icon requests
+are answered with one of the PNGs in data/images/ingredients/final. With --cassette,
+recorded responses are replayed first. The latency, error and throttling
+profile is set from the command line.
+
+Usage:
+    python benchmark_pipelines.py
+    python benchmark_pipelines.py --pipelines multilingualize --workers 8,30,50 --latency lognormal:20,0.4
+    python benchmark_pipelines.py --quota 16 --error-rate 0.05 --json data/benchmarks/latest.json
+    python benchmark_pipelines.py --cassette data/cassettes/run1
+"""
+
+import io
+import os
+import re
+import csv
+import json
+import zlib
+import time
+import shutil
+import argparse
+import tempfile
+import importlib
+import contextlib
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from gemini_async import GeminiRequestLayer
+from gemini_standin import Cassette, FaultProfile, GeminiStandin, StandinReply, StandinRequest
+from llm_cache import ResponseCache
+from llm_clients import install_standin
+from llm_telemetry import telemetry
+from pipeline_journal import PipelineJournal
+
+
+REPO_DIR = Path(__file__).parent
+MULTILINGUAL_DIR = REPO_DIR / "data" / "recipes_multilingual_v2"
+DICTIONARY_FILE = REPO_DIR / "data" / "ingredients_dictionary.json"
+ICONS_DIR = REPO_DIR / "data" / "images" / "ingredients"
+INGREDIENTS_CSV = REPO_DIR / "recipes_ingredients_matrix.csv"
+
+PIPELINES = ("canonize", "multilingualize", "icons")
+
+# 1x1 white PNG, for icon requests when the repo has no icons to replay
+BLANK_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010802000000907753de"
+    "0000000c4944415408d763f8ffff3f0005fe02fedccc59e70000000049454e44ae426082"
+)
+
+
+# ============================================================================
+# CORPUS
+# ============================================================================
+
+def load_corpus(limit: Optional[int] = None) -> List[dict]:
+    """Multilingual recipes from the repo (the benchmark's ground truth)."""
+    recipes = []
+    for path in sorted(MULTILINGUAL_DIR.glob("*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            recipe = json.load(f)
+        recipe.pop("index", None)
+        recipes.append(recipe)
+    return recipes[:limit] if limit else recipes
+
+
+def source_recipe(recipe: dict) -> dict:
+    """A Hebrew source recipe, as in data/safed_recipes."""
+    return {
+        "name_hebrew": recipe["name"]["he"],
+        "description": recipe["description"]["he"],
+        "ingredients": recipe["ingredients"]["he"],
+        "instructions": recipe["steps"]["he"],
+    }
+
+
+def canonical_recipe(recipe: dict) -> dict:
+    """A canonical English recipe, as canonize_recipes.py writes it."""
+    recipe_id = recipe["id"]
+    return {
+        "id": recipe_id,
+        "slug": recipe_id.replace("_", "-"),
+        "source_file": f"data/safed_recipes/{recipe_id}.json",
+        "name": recipe["name"]["en"],
+        "name_hebrew": recipe["name"]["he"],
+        "description": recipe["description"]["en"],
+        "meta": {"servings": recipe.get("meta", {}).get("servings", "4-6"), "difficulty": "medium"},
+        "ingredients": [
+            {"ingredient_id": re.sub(r"\W+", "_", line.lower()).strip("_")[:40], "name": line}
+            for line in recipe["ingredients"]["en"]
+        ],
+        "steps": [{"step": n, "instruction": text} for n, text in enumerate(recipe["steps"]["en"], 1)],
+        "image": {"filename": f"{recipe_id}.png", "prompt": None},
+    }
+
+
+def load_ingredients(limit: int) -> List[str]:
+    with open(INGREDIENTS_CSV, "r", encoding="utf-8") as f:
+        header = next(csv.reader(f))
+    return [name.strip() for name in header[2:] if name.strip()][:limit]
+
+
+def make_responder(corpus: List[dict]) -> Callable[[StandinRequest], Optional[StandinReply]]:
+    """Answers canonize, multilingualize and icon requests from the corpus."""
+    by_id = {recipe["id"]: recipe for recipe in corpus}
+    icons = sorted((ICONS_DIR / "final").glob("*.png")) or sorted(ICONS_DIR.rglob("*.png"))
+    icon_bytes = [path.read_bytes() for path in icons[:16]] or [BLANK_PNG]
+
+    def respond(request: StandinRequest) -> Optional[StandinReply]:
+        if "IMAGE" in json.dumps(request.config.get("response_modalities", [])):
+            return StandinReply(images=[icon_bytes[zlib.crc32(request.prompt.encode("utf-8")) % len(icon_bytes)]])
+        match = re.search(r'source_file"?:\s*"[^"]*?([^/"]+)\.json"', request.prompt)
+        if match and match.group(1) in by_id and "canonical English JSON" in request.prompt:
+            return StandinReply(text=json.dumps(canonical_recipe(by_id[match.group(1)]), ensure_ascii=False, indent=2))
+        match = re.search(r'"id":\s*"([^"]+)"', request.prompt)
+        if match and match.group(1) in by_id:
+            return StandinReply(text=json.dumps(by_id[match.group(1)], ensure_ascii=False, indent=2))
+        return None
+
+    return respond
+
+
+def prepare_workdir(workdir: Path, corpus: List[dict]) -> None:
+    """Scratch data/ tree: sources, canonical recipes, the ingredients dictionary."""
+    sources = workdir / "data" / "safed_recipes"
+    canonical = workdir / "data" / "recipes_canonical"
+    for directory in (sources, canonical, workdir / "data" / "recipes_multilingual_v2"):
+        directory.mkdir(parents=True, exist_ok=True)
+    for recipe in corpus:
+        with open(sources / f"{recipe['id']}.json", "w", encoding="utf-8") as f:
+            json.dump(source_recipe(recipe), f, ensure_ascii=False, indent=2)
+        with open(canonical / f"{recipe['id']}.json", "w", encoding="utf-8") as f:
+            json.dump(canonical_recipe(recipe), f, ensure_ascii=False, indent=2)
+    if DICTIONARY_FILE.exists():
+        shutil.copy(DICTIONARY_FILE, workdir / "data" / "ingredients_dictionary.json")
+
+
+# ============================================================================
+# RUNS
+# ============================================================================
+
+def stage_module(name: str, workdir: Path, workers: int):
+    """Import a pipeline script with fresh per-run state in workdir."""
+    module = importlib.import_module(name)
+    module.gemini = GeminiRequestLayer(max_concurrency=workers, stage=module.gemini.stage)
+    if hasattr(module, "response_cache"):
+        module.response_cache = ResponseCache(cache_dir=workdir / "llm_cache", read=False)
+    if hasattr(module, "journal"):
+        module.journal = PipelineJournal(module.journal.stage, path=workdir / "journal.jsonl")
+    return module
+
+
+def run_pipeline(name: str, workdir: Path, workers: int, ingredients: List[str]) -> Dict[str, Any]:
+    """Run one pipeline; returns its module and (succeeded, failed) item counts."""
+    if name == "canonize":
+        module = stage_module("canonize_recipes", workdir, workers)
+        module.ingredient_updates.clear()
+        results = module.canonize_all(workers=workers)
+        return {"module": module, "ok": len(results["success"]), "failed": len(results["failed"])}
+    if name == "multilingualize":
+        module = stage_module("multilingualize_recipes", workdir, workers)
+        results = module.multilingualize_all(workers=workers)
+        return {"module": module, "ok": len(results["success"]), "failed": len(results["failed"])}
+    module = stage_module("generate_ingredient_icons", workdir, workers)
+    generator = module.IngredientIconGenerator(output_dir=str(workdir / "icons"))
+    generator.generate_all(ingredients, force=True, max_workers=workers)
+    ok = len(list((workdir / "icons" / "final").glob("*.png")))
+    return {"module": module, "ok": ok, "failed": len(ingredients) - ok}
+
+
+def benchmark(
+    name: str,
+    workers: int,
+    corpus: List[dict],
+    ingredients: List[str],
+    profile: FaultProfile,
+    cassette: Optional[Cassette],
+    verbose: bool = False,
+) -> Dict[str, Any]:
+    """Time one pipeline at one worker count against a fresh stand-in."""
+    standin = GeminiStandin(cassette, responder=make_responder(corpus), profile=profile)
+    install_standin(standin)
+    telemetry.records.clear()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as tmp:
+        workdir = Path(tmp)
+        prepare_workdir(workdir, corpus)
+        os.chdir(workdir)
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        try:
+            with output:
+                start = time.perf_counter()
+                result = run_pipeline(name, workdir, workers, ingredients)
+                elapsed = time.perf_counter() - start
+        finally:
+            os.chdir(cwd)
+            install_standin(None)
+
+    gemini = result["module"].gemini
+    stats = next((s for s in telemetry.stats() if s["stage"] == gemini.stage), {})
+    return {
+        "pipeline": name,
+        "workers": workers,
+        "items": result["ok"],
+        "failed": result["failed"],
+        "seconds": round(elapsed, 3),
+        "items_per_s": round(result["ok"] / elapsed, 3) if elapsed > 0 else None,
+        "requests": gemini.requests,
+        "retries": gemini.retries,
+        "throttled": gemini.throttled,
+        "peak_concurrency": int(gemini.limiter.peak),
+        "p50_s": stats.get("p50_s"),
+        "p90_s": stats.get("p90_s"),
+        "amplification": stats.get("amplification"),
+    }
+
+
+def print_table(rows: List[Dict[str, Any]]) -> None:
+    print("\n" + "=" * 96)
+    print("📊 PIPELINE BENCHMARK")
+    print("=" * 96)
+    print(f"  {'pipeline':<16} {'workers':>7} {'items':>6} {'failed':>6} {'seconds':>8} {'items/s':>8} "
+          f"{'requests':>8} {'throttled':>9} {'peak':>5} {'p50':>6} {'p90':>6}")
+    for row in rows:
+        p50 = "-" if row["p50_s"] is None else f"{row['p50_s']:.2f}"
+        p90 = "-" if row["p90_s"] is None else f"{row['p90_s']:.2f}"
+        print(f"  {row['pipeline']:<16} {row['workers']:>7} {row['items']:>6} {row['failed']:>6} {row['seconds']:>8.1f} "
+              f"{row['items_per_s'] or 0:>8.2f} {row['requests']:>8} {row['throttled']:>9} {row['peak_concurrency']:>5} "
+              f"{p50:>6} {p90:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipelines offline against the Gemini stand-in")
+    parser.add_argument("--pipelines", default=",".join(PIPELINES), help=f"Comma-separated pipelines (default: {','.join(PIPELINES)})")
+    parser.add_argument("--workers", default="4,16,30", help="Comma-separated worker counts (default: 4,16,30)")
+    parser.add_argument("--recipes", type=int, help="Recipes per run (default: all)")
+    parser.add_argument("--icons", type=int, default=40, help="Ingredient icons per run (default: 40)")
+    parser.add_argument("--latency", default="lognormal:1.0,0.5",
+                        help='Latency distribution: "lognormal:<median>,<sigma>", "uniform:<low>,<high>" or "fixed:<s>"')
+    parser.add_argument("--per-1k-chars", type=float, default=0.05, help="Extra latency per 1,000 output characters (default: 0.05s)")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Fraction of requests failing with 5xx (default: 0.02)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests throttled at random (default: 0)")
+    parser.add_argument("--quota", type=int, default=0, help="Concurrent requests before 429s (default: unlimited)")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute before 429s (default: unlimited)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    parser.add_argument("--cassette", help="Replay recorded responses from this directory first")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Show the pipelines' own output")
+    args = parser.parse_args()
+
+    pipelines = [p.strip() for p in args.pipelines.split(",") if p.strip()]
+    unknown = [p for p in pipelines if p not in PIPELINES]
+    if unknown:
+        parser.error(f"Unknown pipeline(s): {', '.join(unknown)} (choose from {', '.join(PIPELINES)})")
+    worker_counts = [int(w) for w in args.workers.split(",") if w.strip()]
+
+    corpus = load_corpus(args.recipes)
+    ingredients = load_ingredients(args.icons)
+    cassette = Cassette(Path(args.cassette)) if args.cassette else None
+    telemetry.sink = None  # keep benchmark calls out of data/telemetry
+
+    print(f"🏁 Benchmarking {', '.join(pipelines)} at {args.workers} workers")
+    print(f"   {len(corpus)} recipes, {len(ingredients)} icons; latency {args.latency} (+{args.per_1k_chars}s/1k chars), "
+          f"{args.error_rate:.0%} errors, {args.throttle_rate:.0%} throttled, quota {args.quota or '∞'}, rpm {args.rpm or '∞'}")
+    if cassette is not None:
+        print(f"   Cassette: {args.cassette} ({len(cassette)} responses)")
+
+    rows = []
+    for name in pipelines:
+        for workers in worker_counts:
+            profile = FaultProfile(
+                latency=args.latency,
+                per_1k_chars=args.per_1k_chars,
+                error_rate=args.error_rate,
+                throttle_rate=args.throttle_rate,
+                max_concurrent=args.quota,
+                rpm=args.rpm,
+                seed=args.seed,
+            )
+            row = benchmark(name, workers, corpus, ingredients, profile, cassette, args.verbose)
+            rows.append(row)
+            print(f"   ✓ {name} @ {workers} workers: {row['items']} items in {row['seconds']:.1f}s "
+                  f"({row['items_per_s'] or 0:.2f}/s)", flush=True)
+
+    print_table(rows)
+
+    if args.json:
+        out = Path(args.json)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump({"profile": vars(args), "results": rows}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
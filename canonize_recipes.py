@@ -14,22 +14,31 @@ Output: Canonical English JSON with structured ingredients
 import os
 import sys
 import json
-import time
 import re
+import asyncio
 from pathlib import Path
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from threading import Lock
 
 load_dotenv()
 
 import google.generativeai as genai
 
+from gemini_async import GeminiRequestLayer, iter_completed
+from llm_cache import ResponseCache, request_key
+from pipeline_journal import PipelineJournal, file_sha256
+from pipeline_state import PipelineState
+from artifact_writer import DictionaryUpdates, write_json, write_json_unique
+from llm_telemetry import telemetry
+from prompt_prefix import PromptPrefix, compact_json
+from structured_output import (
+    CANONICAL_SCHEMA, StructuredOutputError, json_config, parse_valid, request_json, response_text,
+)
+
 # ============================================================================
 # CONFIGURATION - NEVER CHANGE MODEL
 # ============================================================================
 GEMINI_MODEL = "gemini-3-pro-preview"
-genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
 
 # Paths
 # Note: safed_recipes_recime is a duplicate subset of safed_recipes, so we only use safed_recipes
@@ -45,8 +54,24 @@ OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 # Thread-safe helpers
 _progress_lock = Lock()
 _progress_count = 0
-_dictionary_lock = Lock()
-_ingredients_seen = set()
+
+# New ingredients, journaled in batches and merged into DICTIONARY_FILE at the end (see artifact_writer.py)
+ingredient_updates = DictionaryUpdates(
+    DICTIONARY_FILE, section="ingredients",
+    template={"_meta": {"description": "Ingredient dictionary"}, "ingredients": {}},
+)
+
+# Accepted Gemini responses, reused on identical reruns (see llm_cache.py)
+response_cache = ResponseCache()
+
+# Adaptive concurrency + backoff for all Gemini calls (see gemini_async.py)
+gemini = GeminiRequestLayer(max_concurrency=30, stage="canonize")
+
+# Per-recipe progress for --resume (see pipeline_journal.py)
+journal = PipelineJournal("canonize")
+
+# Per-recipe stage status shared by the pipeline scripts (see pipeline_state.py)
+pipeline_state = PipelineState()
 
 def vprint(*args, **kwargs):
     """Print with immediate flush for real-time output."""
@@ -111,19 +136,12 @@ If the source has vague quantities, use reasonable cookbook defaults:
 Return ONLY valid JSON, no markdown blocks."""
 
 
-CANONIZE_USER_PROMPT = """Convert this recipe to canonical English JSON.
-
-## INPUT RECIPE:
+CANONIZE_INSTRUCTIONS = """## REQUIRED OUTPUT STRUCTURE:
 ```json
-{input_recipe}
-```
-
-## REQUIRED OUTPUT STRUCTURE:
-```json
-{{
+{
   "id": "recipe_id",
   "slug": "recipe-id",
-  "source_file": "{source_file}",
+  "source_file": "<source file given with the recipe>",
   
   "name": "English Name",
   "name_hebrew": "שם בעברית",
@@ -134,16 +152,16 @@ CANONIZE_USER_PROMPT = """Convert this recipe to canonical English JSON.
   "is_vegan": false,
   "vegan_adaptation_notes": null,
   
-  "meta": {{
+  "meta": {
     "servings": "4-6",
     "prep_time_minutes": 15,
     "cook_time_minutes": 30,
     "total_time_minutes": 45,
     "difficulty": "easy"
-  }},
+  },
   
   "ingredients": [
-    {{
+    {
       "ingredient_id": "onion",
       "name": "Onion",
       "amount": 1,
@@ -152,28 +170,28 @@ CANONIZE_USER_PROMPT = """Convert this recipe to canonical English JSON.
       "preparation": "diced",
       "notes": null,
       "is_optional": false
-    }}
+    }
   ],
   
   "steps": [
-    {{
+    {
       "step": 1,
       "instruction": "Clear instruction in English.",
       "time_minutes": null,
       "tips": null
-    }}
+    }
   ],
   
   "variants": null,
   
-  "image": {{
+  "image": {
     "filename": "recipe_id.png",
     "prompt": null
-  }},
+  },
   
   "tags": ["north-african", "tunisian"],
   "related_recipes": []
-}}
+}
 ```
 
 CRITICAL:
@@ -181,7 +199,18 @@ CRITICAL:
 2. Infer reasonable quantities if not specified
 3. Translate all Hebrew to English
 4. Keep the original Hebrew name in name_hebrew
-5. Return ONLY valid JSON, no markdown
+5. Return ONLY valid JSON, no markdown"""
+
+# Shared by every canonize request; the requests themselves carry only the recipe
+CANONIZE_PREFIX = PromptPrefix(GEMINI_MODEL, CANONIZE_SYSTEM_PROMPT + "\n\n" + CANONIZE_INSTRUCTIONS, stage="canonize")
+
+
+CANONIZE_USER_PROMPT = """Convert this recipe to canonical English JSON (source_file: "{source_file}").
+
+## INPUT RECIPE:
+```json
+{input_recipe}
+```
 
 Return the canonical JSON:"""
 
@@ -208,7 +237,7 @@ def load_all_recipes():
     return recipes
 
 
-def canonize_recipe(input_recipe: dict, max_retries: int = 3) -> dict:
+async def canonize_recipe(input_recipe: dict, max_retries: int = 3) -> dict:
     """Transform a single recipe to canonical English format using Gemini."""
     
     recipe_name = input_recipe.get("name_hebrew", input_recipe.get("id", "unknown"))
@@ -216,80 +245,49 @@ def canonize_recipe(input_recipe: dict, max_retries: int = 3) -> dict:
     
     vprint(f"  📝 Canonizing: {recipe_name}")
     
-    # Remove internal fields before sending to API
-    recipe_for_api = {k: v for k, v in input_recipe.items() if not k.startswith('_')}
-    
+    # compact_json leaves out internal (_-prefixed) fields
     prompt = CANONIZE_USER_PROMPT.format(
-        input_recipe=json.dumps(recipe_for_api, ensure_ascii=False, indent=2),
+        input_recipe=compact_json(input_recipe),
         source_file=source_file
     )
     
-    model = genai.GenerativeModel(
-        GEMINI_MODEL,
-        system_instruction=CANONIZE_SYSTEM_PROMPT
-    )
+    model = CANONIZE_PREFIX.generative_model()
+    cache_key = request_key(GEMINI_MODEL, CANONIZE_PREFIX.text, prompt, {"temperature": 0.3, "max_output_tokens": 8192})
     
-    for attempt in range(max_retries):
-        try:
-            response = model.generate_content(
-                prompt,
-                generation_config=genai.GenerationConfig(
-                    temperature=0.3 + (attempt * 0.1),  # Low temp for consistency
-                    max_output_tokens=8192,
-                )
+    async def ask(text: str, schema: dict, attempt: int):
+        response = await gemini.call(lambda: model.generate_content_async(
+            text,
+            generation_config=genai.GenerationConfig(
+                temperature=0.3 + (attempt * 0.1),  # Low temp for consistency
+                max_output_tokens=8192,
+                **json_config(schema),
             )
-            
-            # Check for valid response
-            if not response.candidates or not response.candidates[0].content.parts:
-                if attempt < max_retries - 1:
-                    vprint(f"    ⚠️  Empty response, retrying ({attempt + 2}/{max_retries})...")
-                    time.sleep(2)
-                    continue
-                else:
-                    raise RuntimeError(f"Gemini returned empty response after {max_retries} attempts for {recipe_name}")
-            
-            response_text = response.text.strip()
-            
-            # Remove markdown code blocks if present
-            if response_text.startswith("```"):
-                response_text = re.sub(r'^```(?:json)?\n?', '', response_text)
-                response_text = re.sub(r'\n?```$', '', response_text)
-            
-            result = json.loads(response_text)
-            
-            # Track ingredients for dictionary
-            with _dictionary_lock:
-                for ing in result.get("ingredients", []):
-                    ing_id = ing.get("ingredient_id")
-                    if ing_id:
-                        _ingredients_seen.add((ing_id, ing.get("name", ing_id)))
-            
-            vprint(f"    ✅ Canonized successfully: {result.get('id', 'unknown')}")
-            return result
-            
-        except ValueError as e:
-            if "finish_reason" in str(e) and attempt < max_retries - 1:
-                vprint(f"    ⚠️  Safety filter triggered, retrying ({attempt + 2}/{max_retries})...")
-                time.sleep(2)
-                continue
-            elif attempt == max_retries - 1:
-                raise RuntimeError(f"Safety filter blocked after {max_retries} attempts for {recipe_name}")
-            raise
-        except json.JSONDecodeError as e:
-            if attempt < max_retries - 1:
-                vprint(f"    ⚠️  JSON parse error, retrying ({attempt + 2}/{max_retries})...")
-                time.sleep(2)
-                continue
-            else:
-                vprint(f"    ❌ Failed to parse JSON: {e}")
-                vprint(f"    Response preview: {response_text[:500]}...")
-                raise RuntimeError(f"JSON parse failed after {max_retries} attempts for {recipe_name}: {e}")
+        ), model=GEMINI_MODEL)
+        return response_text(response)
     
-    raise RuntimeError(f"Unexpected state in canonize_recipe for {recipe_name}")
+    result = parse_valid(response_cache.get(cache_key), CANONICAL_SCHEMA)
+    if result is not None:
+        vprint(f"    💾 Cached response")
+    else:
+        try:
+            result = await request_json(ask, prompt, CANONICAL_SCHEMA, model=GEMINI_MODEL, stage=gemini.stage,
+                                        max_attempts=max_retries, log=vprint)
+        except StructuredOutputError as e:
+            raise RuntimeError(f"{e} for {recipe_name}")
+        response_cache.put(cache_key, json.dumps(result, ensure_ascii=False), model=GEMINI_MODEL)
+    
+    # Track ingredients for dictionary
+    for ing in result.get("ingredients", []):
+        ing_id = ing.get("ingredient_id")
+        if ing_id:
+            ingredient_updates.add(ing_id, {"en": ing.get("name", ing_id), "he": None, "es": None, "ar": None})
+    
+    vprint(f"    ✅ Canonized successfully: {result.get('id', 'unknown')}")
+    return result
 
 
-def process_single_recipe(recipe: dict, total: int) -> dict:
-    """Process a single recipe (for parallel execution)."""
+async def process_single_recipe(recipe: dict, total: int) -> dict:
+    """Process a single recipe (for concurrent execution)."""
     global _progress_count
     
     result = {
@@ -299,35 +297,32 @@ def process_single_recipe(recipe: dict, total: int) -> dict:
         "error": None
     }
     
+    source_file = recipe.get("_source_file", "unknown")
+    journal.in_flight(source_file)
+    
     try:
         # Canonize
-        canonical = canonize_recipe(recipe)
+        canonical = await canonize_recipe(recipe)
         
         # Generate output filename
         recipe_id = canonical.get("id", Path(recipe.get("_source_file", "unknown")).stem)
         # Ensure valid filename
         recipe_id = re.sub(r'[^\w\-]', '_', recipe_id.lower())
         
-        output_file = OUTPUT_DIR / f"{recipe_id}.json"
-        
-        # Handle duplicates
-        counter = 1
-        while output_file.exists():
-            output_file = OUTPUT_DIR / f"{recipe_id}_{counter}.json"
-            counter += 1
-        
-        # Save
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(canonical, f, ensure_ascii=False, indent=2)
+        # Save, handling duplicates (recipe_id, recipe_id_1, ... claimed atomically across workers)
+        output_file = write_json_unique(OUTPUT_DIR, recipe_id, canonical)
+        record_canonical(output_file.stem, source_file, output_file)
         
         result["success"] = True
         result["output_file"] = str(output_file)
+        journal.done(source_file, output_file)
         
         with _progress_lock:
             _progress_count += 1
             vprint(f"✅ [{_progress_count}/{total}] Saved: {output_file.name}")
             
     except Exception as e:
+        journal.failed(source_file, e)
         with _progress_lock:
             _progress_count += 1
             vprint(f"❌ [{_progress_count}/{total}] Failed: {recipe.get('_source_file', 'unknown')}: {e}")
@@ -336,34 +331,19 @@ def process_single_recipe(recipe: dict, total: int) -> dict:
     return result
 
 
+def record_canonical(recipe_id: str, source_file: str, output_file: Path):
+    """Record a newly written canonical recipe; veganize and intro, which edit it in place, run again."""
+    pipeline_state.record(recipe_id, "canonize", output=output_file, input_hash=file_sha256(Path(source_file)))
+    pipeline_state.reset(recipe_id, "veganize", "intro")
+
+
 def update_ingredients_dictionary():
-    """Update the ingredients dictionary with newly seen ingredients."""
-    try:
-        with open(DICTIONARY_FILE, 'r', encoding='utf-8') as f:
-            dictionary = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        dictionary = {"_meta": {"description": "Ingredient dictionary"}, "ingredients": {}}
-    
-    # Add new ingredients
-    for ing_id, ing_name in _ingredients_seen:
-        if ing_id not in dictionary["ingredients"]:
-            dictionary["ingredients"][ing_id] = {
-                "en": ing_name,
-                "he": None,
-                "es": None,
-                "ar": None
-            }
-    
-    # Sort ingredients
-    dictionary["ingredients"] = dict(sorted(dictionary["ingredients"].items()))
-    
-    with open(DICTIONARY_FILE, 'w', encoding='utf-8') as f:
-        json.dump(dictionary, f, ensure_ascii=False, indent=2)
-    
-    vprint(f"📚 Updated ingredient dictionary with {len(_ingredients_seen)} ingredients")
+    """Merge the newly seen ingredients (and any journaled by a crashed run) into the dictionary."""
+    added = ingredient_updates.commit()
+    vprint(f"📚 Updated ingredient dictionary: {added} new ingredients")
 
 
-def canonize_all(workers: int = 30, limit: int = None):
+def canonize_all(workers: int = 30, limit: int = None, resume: bool = False):
     """Canonize all recipes from both source directories."""
     global _progress_count
     _progress_count = 0
@@ -374,41 +354,40 @@ def canonize_all(workers: int = 30, limit: int = None):
     if limit:
         recipes = recipes[:limit]
     
+    # Skip recipes finished by the interrupted run
+    todo = set(journal.start_run([r["_source_file"] for r in recipes], resume=resume))
+    recipes = [r for r in recipes if r["_source_file"] in todo]
+    
     total = len(recipes)
     
     vprint(f"🍳 Canonizing {total} recipes to structured English...")
     vprint(f"   Model: {GEMINI_MODEL}")
-    vprint(f"   Workers: {workers}")
+    vprint(f"   Max concurrent requests: {workers}")
     vprint(f"   Output: {OUTPUT_DIR}/")
     vprint()
     vprint("=" * 60)
     
     results = {"success": [], "failed": []}
+    gemini.set_max_concurrency(workers)
     
-    # Process in parallel
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        future_to_recipe = {
-            executor.submit(process_single_recipe, recipe, total): recipe
-            for recipe in recipes
-        }
-        
-        for future in as_completed(future_to_recipe):
-            recipe = future_to_recipe[future]
-            try:
-                result = future.result()
-                if result["success"]:
-                    results["success"].append(result["output_file"])
-                else:
-                    results["failed"].append({
-                        "source": result["source_file"],
-                        "error": result["error"]
-                    })
-            except Exception as e:
-                vprint(f"❌ Exception: {e}")
+    async def run():
+        async for recipe, result, error in iter_completed(lambda r: process_single_recipe(r, total), recipes):
+            if error is not None:
+                vprint(f"❌ Exception: {error}")
                 results["failed"].append({
                     "source": recipe.get("_source_file", "unknown"),
-                    "error": str(e)
+                    "error": str(error)
                 })
+            elif result["success"]:
+                results["success"].append(result["output_file"])
+            else:
+                results["failed"].append({
+                    "source": result["source_file"],
+                    "error": result["error"]
+                })
+    
+    # Process concurrently
+    asyncio.run(run())
     
     # Update dictionary
     update_ingredients_dictionary()
@@ -420,6 +399,10 @@ def canonize_all(workers: int = 30, limit: int = None):
     vprint("=" * 60)
     vprint(f"✅ Successful: {len(results['success'])}")
     vprint(f"❌ Failed: {len(results['failed'])}")
+    vprint(f"💾 LLM cache: {response_cache.summary()}")
+    vprint(f"📡 Gemini: {gemini.summary()}")
+    if telemetry.records:
+        vprint(telemetry.report())
     
     if results["failed"]:
         vprint("\nFailed recipes:")
@@ -452,14 +435,14 @@ def canonize_single(filename: str):
             recipe['_source_file'] = str(recipe_file)
             recipe['_source_dir'] = recipe_file.parent.name
         
-        canonical = canonize_recipe(recipe)
+        canonical = asyncio.run(canonize_recipe(recipe))
         
         recipe_id = canonical.get("id", recipe_file.stem)
         recipe_id = re.sub(r'[^\w\-]', '_', recipe_id.lower())
         output_file = OUTPUT_DIR / f"{recipe_id}.json"
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(canonical, f, ensure_ascii=False, indent=2)
+        write_json(output_file, canonical)
+        record_canonical(recipe_id, recipe['_source_file'], output_file)
         
         # Update dictionary after single recipe
         update_ingredients_dictionary()
@@ -483,10 +466,13 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Canonize recipes to structured English format")
     parser.add_argument("--single", "-s", help="Process single recipe file")
     parser.add_argument("--limit", "-n", type=int, help="Process only N recipes")
-    parser.add_argument("--workers", "-w", type=int, default=30, help="Number of parallel workers")
+    parser.add_argument("--workers", "-w", type=int, default=30, help="Maximum concurrent Gemini requests (adapts below this)")
     parser.add_argument("--list", "-l", action="store_true", help="List available recipes")
+    parser.add_argument("--resume", action="store_true", help="Continue the last run, skipping recipes it finished")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached LLM responses (new responses are still cached)")
     
     args = parser.parse_args()
+    response_cache.read = not args.no_cache
     
     if args.list:
         print("Available recipes:")
@@ -499,5 +485,5 @@ if __name__ == "__main__":
     if args.single:
         canonize_single(args.single)
     else:
-        canonize_all(workers=args.workers, limit=args.limit)
+        canonize_all(workers=args.workers, limit=args.limit, resume=args.resume)
 
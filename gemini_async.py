@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Async Gemini Request Layer
+
+Shared by the recipe pipelines (canonize, veganize, intro, multilingualize,
+review) and the ingredient icon generator. Instead of a fixed thread pool and
+a flat sleep(2) between retries, requests run as asyncio tasks behind an
+adaptive concurrency limit:
+
+- Slow start: every successful request raises the limit by 1, doubling it
+  each round of requests, until the first 429, 5xx, timeout or latency rise.
+- AIMD after that: every successful request raises the limit by 1/limit
+  (about +1 per round); a 429, 5xx or timeout halves it, at most once per
+  observed round trip. Increases pause while latency is more than twice its
+  best observed level (the backend is already queueing).
+- Throttled and failed requests are retried with full-jitter exponential
+  backoff (uniform in [0, min(cap, base·2^attempt)]), outside the limit.
+
+The scripts' --workers flag is the ceiling; the limit starts low and finds
+the quota on its own (without throttling it reaches the ceiling within a few
+rounds). Every attempt is recorded by llm_telemetry.py.
+
+Usage:
+    gemini = GeminiRequestLayer(max_concurrency=30)
+
+    async def work(recipe):
+        response = await gemini.call(lambda: model.generate_content_async(prompt), model=MODEL)
+        ...
+
+    async def run():
+        async for recipe, result, error in iter_completed(work, recipes):
+            ...
+
+    asyncio.run(run())
+    print(gemini.summary())
+"""
+
+import time
+import random
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Optional, Tuple, TypeVar
+
+from llm_telemetry import telemetry
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# HTTP statuses worth retrying; all of them also shrink the concurrency limit
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+DEFAULT_INITIAL_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 6
+DEFAULT_TIMEOUT = 600.0  # seconds; long multilingual responses take minutes
+
+
+def error_status(exc: BaseException) -> Optional[int]:
+    """HTTP status of an API error (google.api_core and google.genai both set .code)."""
+    for attr in ("code", "status_code"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """True for throttling, server errors and timeouts."""
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    status = error_status(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return "RESOURCE_EXHAUSTED" in str(exc) or "UNAVAILABLE" in str(exc)
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Full-jitter exponential backoff for retry number `attempt` (0-based)."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class AdaptiveLimiter:
+    """Slow-start + AIMD concurrency limit for one asyncio event loop."""
+
+    def __init__(
+        self,
+        maximum: int = 30,
+        initial: Optional[int] = None,
+        minimum: int = 1,
+        decrease: float = 0.5,
+        latency_factor: float = 2.0,
+    ):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.limit = float(min(maximum, initial or DEFAULT_INITIAL_CONCURRENCY))
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.in_flight = 0
+        self.peak = self.limit
+        self.decreases = 0
+        self.slow_start = True  # until the first congestion or latency signal
+        self._latency: Optional[float] = None   # EWMA, seconds
+        self._baseline: Optional[float] = None  # lowest EWMA seen
+        self._last_decrease = 0.0
+        self._condition: Optional[asyncio.Condition] = None
+
+    def _allowed(self) -> int:
+        return max(self.minimum, int(min(self.limit, self.maximum)))
+
+    async def acquire(self) -> None:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self._allowed())
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self, latency: float) -> None:
+        """Slow-start or additive increase, unless latency shows the backend is queueing."""
+        self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+        self._baseline = self._latency if self._baseline is None else min(self._baseline, self._latency)
+        if self._latency > self.latency_factor * self._baseline:
+            self.slow_start = False
+            return
+        step = 1.0 if self.slow_start else 1.0 / self.limit
+        self.limit = min(float(self.maximum), self.limit + step)
+        self.peak = max(self.peak, self.limit)
+
+    def on_congestion(self) -> None:
+        """Multiplicative decrease, once per round trip."""
+        now = time.monotonic()
+        if now - self._last_decrease < (self._latency or 1.0):
+            return
+        self._last_decrease = now
+        self.slow_start = False
+        self.limit = max(float(self.minimum), self.limit * self.decrease)
+        self.decreases += 1
+
+
+class GeminiRequestLayer:
+    """Runs Gemini requests under an AdaptiveLimiter with jittered retries."""
+
+    def __init__(
+        self,
+        max_concurrency: int = 30,
+        initial_concurrency: Optional[int] = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        timeout: Optional[float] = DEFAULT_TIMEOUT,
+        stage: Optional[str] = None,
+    ):
+        """
+        Args:
+            max_concurrency: Upper bound for concurrent requests
+            initial_concurrency: Starting limit (default: min(4, max_concurrency))
+            max_retries: Retries for throttled/failed requests before giving up
+            base_delay: Backoff base in seconds
+            max_delay: Backoff cap in seconds
+            timeout: Per-request timeout in seconds (None = no timeout)
+            stage: Stage name for telemetry (e.g. "canonize")
+        """
+        self.limiter = AdaptiveLimiter(maximum=max_concurrency, initial=initial_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.stage = stage
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.failures = 0
+
+    def set_max_concurrency(self, maximum: int) -> None:
+        """Change the ceiling (e.g. from a --workers flag) before running."""
+        self.limiter.maximum = max(1, maximum)
+        self.limiter.limit = min(self.limiter.limit, float(self.limiter.maximum))
+        self.limiter.peak = self.limiter.limit
+
+    def backoff(self, attempt: int) -> float:
+        """Backoff delay for retry `attempt` with this layer's settings."""
+        return backoff_delay(attempt, self.base_delay, self.max_delay)
+
+    async def call(self, make_request: Callable[[], Awaitable[T]], model: str = "") -> T:
+        """
+        Run one request, retrying throttling, 5xx and timeouts.
+
+        Args:
+            make_request: Returns a new awaitable per attempt, e.g.
+                lambda: model.generate_content_async(prompt)
+            model: Model name, for telemetry
+
+        Returns:
+            The response; non-retryable errors (and the last retryable one) are raised
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire()
+            start = time.monotonic()
+            # The slot is given back however the attempt ends, cancellation included
+            try:
+                try:
+                    if self.timeout:
+                        result = await asyncio.wait_for(make_request(), self.timeout)
+                    else:
+                        result = await make_request()
+                except Exception as e:
+                    retry = is_retryable(e)
+                    status = error_status(e)
+                    if isinstance(e, (asyncio.TimeoutError, TimeoutError)):
+                        outcome = "timeout"
+                    else:
+                        outcome = "throttled" if status == 429 else "error"
+                    self.requests += 1
+                    if retry:
+                        self.limiter.on_congestion()
+                        if status == 429:
+                            self.throttled += 1
+                    telemetry.record(model, self.stage, time.monotonic() - start, outcome, attempt, error=e, status=status)
+                    if not retry or attempt == self.max_retries:
+                        self.failures += 1
+                        raise
+                    self.retries += 1
+                else:
+                    latency = time.monotonic() - start
+                    self.requests += 1
+                    self.limiter.on_success(latency)
+                    telemetry.record(model, self.stage, latency, "ok", attempt, response=result)
+                    return result
+            finally:
+                await self.limiter.release()
+            await asyncio.sleep(self.backoff(attempt))
+        raise RuntimeError("unreachable")
+
+    def summary(self) -> str:
+        """One-line report of requests, retries and where the limit settled."""
+        limiter = self.limiter
+        return (
+            f"{self.requests} requests, {self.retries} retried ({self.throttled} throttled), "
+            f"{self.failures} failed; concurrency {limiter._allowed()} "
+            f"(peak {int(limiter.peak)}, max {limiter.maximum}, {limiter.decreases} backoffs)"
+        )
+
+
+async def iter_completed(
+    worker: Callable[[T], Awaitable[R]],
+    items: Iterable[T],
+) -> AsyncIterator[Tuple[T, Optional[R], Optional[BaseException]]]:
+    """
+    Run worker(item) for every item concurrently (the request layer bounds
+    the actual API concurrency) and yield (item, result, error) as each finishes.
+    """
+    async def run(item: T) -> Tuple[T, Any, Optional[BaseException]]:
+        try:
+            return item, await worker(item), None
+        except Exception as e:
+            return item, None, e
+
+    tasks = [asyncio.ensure_future(run(item)) for item in items]
+    for next_done in asyncio.as_completed(tasks):
+        yield await next_done
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Gemini Stand-in
+
+Offline replacement for the Gemini API, so the pipelines can be run,
+benchmarked and their retry paths exercised without API keys or network.
+It plugs in through llm_clients.py: every genai_client() / generative_model()
+handed out while a stand-in is installed talks to it instead of Google.
+
+Responses come from a cassette, a directory of recorded responses keyed by
+request (model, system prompt, prompt, generation config). Requests the
+cassette doesn't have go to an optional responder function. Each request is
+delayed by a configurable latency distribution. Throttling is simulated as
+429s, either once more than max_concurrent requests are in flight or once
+more than rpm requests came in the last minute. On top of that, random 429s
+and 5xx errors are raised at the configured rates.
+
+Record a cassette from a real run, then replay it:
+    LLM_STANDIN=record:data/cassettes/run1 python multilingualize_recipes.py --limit 5 --no-cache
+    LLM_STANDIN=replay:data/cassettes/run1 python multilingualize_recipes.py --limit 5 --no-cache
+
+Programmatic use (see benchmark_pipelines.py):
+    standin = GeminiStandin(Cassette(path), responder=fn, profile=FaultProfile(latency="lognormal:2,0.5", error_rate=0.02))
+    install_standin(standin)   # from llm_clients
+"""
+
+import json
+import time
+import random
+import asyncio
+import dataclasses
+from pathlib import Path
+from threading import Lock
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from llm_cache import request_key
+
+
+class StandinAPIError(Exception):
+    """Simulated API error; .code is the HTTP status, as on the SDKs' errors."""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class NoRecordedResponse(LookupError):
+    """The cassette has no response for a request and no responder produced one."""
+
+
+# ============================================================================
+# REQUESTS AND RESPONSES
+# ============================================================================
+
+@dataclasses.dataclass
+class StandinRequest:
+    model: str
+    system: str
+    prompt: str
+    config: Dict[str, Any]
+
+    @property
+    def key(self) -> str:
+        return request_key(self.model, self.system, self.prompt, self.config)
+
+
+@dataclasses.dataclass
+class StandinReply:
+    """What the model answered: text and/or images (PNG bytes)."""
+    text: str = ""
+    images: List[bytes] = dataclasses.field(default_factory=list)
+
+
+def _config_dict(config: Any) -> Dict[str, Any]:
+    """Generation config of either SDK as a plain dict (for request keys)."""
+    if config is None:
+        return {}
+    if isinstance(config, dict):
+        return {k: v for k, v in config.items() if v is not None}
+    if hasattr(config, "model_dump"):  # google.genai (pydantic)
+        return config.model_dump(mode="json", exclude_none=True)
+    if dataclasses.is_dataclass(config):  # google.generativeai
+        return {k: v for k, v in dataclasses.asdict(config).items() if v is not None}
+    return {"repr": repr(config)}
+
+
+def _prompt_text(contents: Any) -> str:
+    if isinstance(contents, str):
+        return contents
+    if isinstance(contents, (list, tuple)):
+        return "\n".join(part for part in contents if isinstance(part, str))
+    return str(contents)
+
+
+class _Image:
+    """Stands in for google.genai's types.Image (only .save is used)."""
+
+    def __init__(self, data: bytes):
+        self.image_bytes = data
+
+    def save(self, path: str) -> None:
+        Path(path).write_bytes(self.image_bytes)
+
+
+class _Part:
+    def __init__(self, text: Optional[str] = None, image: Optional[bytes] = None):
+        self.text = text
+        self.inline_data = type("Blob", (), {"mime_type": "image/png", "data": image})() if image else None
+
+    def as_image(self) -> Optional[_Image]:
+        return _Image(self.inline_data.data) if self.inline_data else None
+
+
+class StandinResponse:
+    """Response shaped like both SDKs' GenerateContentResponse."""
+
+    def __init__(self, reply: StandinReply, prompt_chars: int):
+        self.parts = ([_Part(text=reply.text)] if reply.text else []) + [_Part(image=data) for data in reply.images]
+        content = type("Content", (), {"parts": self.parts})()
+        self.candidates = [type("Candidate", (), {"content": content, "finish_reason": "STOP"})()]
+        self.prompt_feedback = None
+        self.usage_metadata = type("Usage", (), {
+            "prompt_token_count": prompt_chars // 4,
+            "candidates_token_count": len(reply.text) // 4 + 1290 * len(reply.images),
+            "thoughts_token_count": None,
+        })()
+        self._text = reply.text
+
+    @property
+    def text(self) -> str:
+        if not self._text:
+            raise ValueError("Response has no text parts (finish_reason: STOP)")
+        return self._text
+
+
+def _reply_from_response(response: Any) -> StandinReply:
+    """Text and images of a real SDK response, for recording."""
+    reply = StandinReply()
+    try:
+        reply.text = response.text or ""
+    except (ValueError, AttributeError):
+        pass
+    parts = getattr(response, "parts", None)
+    if parts is None:
+        try:
+            parts = response.candidates[0].content.parts
+        except (AttributeError, IndexError, TypeError):
+            parts = []
+    for part in parts or []:
+        blob = getattr(part, "inline_data", None)
+        if blob is not None and getattr(blob, "data", None):
+            reply.images.append(blob.data)
+    return reply
+
+
+# ============================================================================
+# CASSETTE
+# ============================================================================
+
+class Cassette:
+    """
+    Directory of recorded responses: index.jsonl (one line per response:
+    key, model, text, image filenames) plus the images as <key>_<n>.png.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.index_file = self.path / "index.jsonl"
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = Lock()
+        if self.index_file.exists():
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line
+                    self._entries[entry["key"]] = entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[StandinReply]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        images = [(self.path / name).read_bytes() for name in entry.get("images", [])]
+        return StandinReply(text=entry.get("text", ""), images=images)
+
+    def put(self, key: str, model: str, reply: StandinReply) -> None:
+        with self._lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            names = []
+            for n, data in enumerate(reply.images):
+                name = f"{key[:16]}_{n}.png"
+                (self.path / name).write_bytes(data)
+                names.append(name)
+            entry = {"key": key, "model": model, "text": reply.text, "images": names}
+            with open(self.index_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._entries[key] = entry
+
+
+# ============================================================================
+# FAULT PROFILE
+# ============================================================================
+
+@dataclasses.dataclass
+class FaultProfile:
+    """
+    Simulated service behavior.
+
+    latency: "lognormal:<median>,<sigma>", "uniform:<low>,<high>" or "fixed:<seconds>"
+    per_1k_chars: Extra seconds per 1,000 characters of output (long answers take longer)
+    error_rate: Fraction of requests failing with a 500/503
+    throttle_rate: Fraction of requests throttled (429) at random
+    max_concurrent: Requests in flight beyond this are throttled (0 = no limit)
+    rpm: Requests per rolling minute beyond this are throttled (0 = no limit)
+    seed: Random seed, for reproducible runs
+    """
+    latency: str = "lognormal:1.0,0.5"
+    per_1k_chars: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    max_concurrent: int = 0
+    rpm: int = 0
+    seed: Optional[int] = None
+
+    def sample_latency(self, rng: random.Random, output_chars: int) -> float:
+        kind, _, args = self.latency.partition(":")
+        values = [float(v) for v in args.split(",") if v]
+        if kind == "lognormal":
+            median, sigma = (values + [0.5])[:2]
+            base = rng.lognormvariate(0, sigma) * median
+        elif kind == "uniform":
+            base = rng.uniform(values[0], values[1])
+        elif kind == "fixed":
+            base = values[0]
+        else:
+            raise ValueError(f"Unknown latency distribution: {self.latency}")
+        return base + self.per_1k_chars * output_chars / 1000
+
+
+# ============================================================================
+# STAND-IN
+# ============================================================================
+
+class GeminiStandin:
+    """Replays (or records) Gemini responses under a FaultProfile."""
+
+    def __init__(
+        self,
+        cassette: Optional[Cassette] = None,
+        responder: Optional[Callable[[StandinRequest], Optional[StandinReply]]] = None,
+        profile: Optional[FaultProfile] = None,
+        record: bool = False,
+    ):
+        """
+        Args:
+            cassette: Recorded responses (and, when recording, where to store them)
+            responder: Produces a reply for requests the cassette doesn't have
+            profile: Latency and fault simulation (replay only)
+            record: Pass requests to the real SDK clients and record the responses
+        """
+        self.cassette = cassette
+        self.responder = responder
+        self.profile = profile or FaultProfile()
+        self.record = record
+        self.replaying = not record
+        self._rng = random.Random(self.profile.seed)
+        self._lock = Lock()
+        self._in_flight = 0
+        self._recent: deque = deque()
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self.replayed = 0
+        self.generated = 0
+        self.recorded = 0
+
+    # ── clients handed out by llm_clients.py ──────────────────────────────
+
+    def genai_client(self, real: Any = None) -> "_GenaiClient":
+        return _GenaiClient(self, real)
+
+    def generative_model(self, model_name: str, system_instruction: Optional[str] = None, real: Any = None) -> "_GenerativeModel":
+        return _GenerativeModel(self, model_name, system_instruction, real)
+
+    # ── replay ─────────────────────────────────────────────────────────────
+
+    def _lookup(self, request: StandinRequest) -> StandinReply:
+        reply = self.cassette.get(request.key) if self.cassette is not None else None
+        if reply is not None:
+            with self._lock:
+                self.replayed += 1
+            return reply
+        reply = self.responder(request) if self.responder is not None else None
+        if reply is None:
+            raise NoRecordedResponse(f"No recorded response for {request.model} request {request.key[:12]}")
+        with self._lock:
+            self.generated += 1
+        return reply
+
+    def _admit(self) -> Optional[StandinAPIError]:
+        """Count the request in; returns the fault to raise, if any."""
+        profile = self.profile
+        with self._lock:
+            self.requests += 1
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            self._recent.append(now)
+            roll = self._rng.random()
+            if (
+                (profile.max_concurrent and self._in_flight >= profile.max_concurrent)
+                or (profile.rpm and len(self._recent) > profile.rpm)
+                or roll < profile.throttle_rate
+            ):
+                self.throttled += 1
+                return StandinAPIError(429, "RESOURCE_EXHAUSTED: quota exceeded (stand-in)")
+            if roll < profile.throttle_rate + profile.error_rate:
+                self.errors += 1
+                return StandinAPIError(self._rng.choice((500, 503)), "INTERNAL: simulated server error (stand-in)")
+            self._in_flight += 1
+            return None
+
+    def _latency(self, reply: Optional[StandinReply]) -> float:
+        with self._lock:
+            return self.profile.sample_latency(self._rng, len(reply.text) if reply else 0)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    async def respond(self, request: StandinRequest) -> StandinResponse:
+        fault = self._admit()
+        if fault is not None:
+            await asyncio.sleep(min(0.05, self._latency(None)))  # rejections come back fast
+            raise fault
+        try:
+            reply = self._lookup(request)
+            await asyncio.sleep(self._latency(reply))
+            return StandinResponse(reply, len(request.system) + len(request.prompt))
+        finally:
+            self._release()
+
+    def respond_sync(self, request: StandinRequest) -> StandinResponse:
+        fault = self._admit()
+        if fault is not None:
+            time.sleep(min(0.05, self._latency(None)))
+            raise fault
+        try:
+            reply = self._lookup(request)
+            time.sleep(self._latency(reply))
+            return StandinResponse(reply, len(request.system) + len(request.prompt))
+        finally:
+            self._release()
+
+    # ── record ─────────────────────────────────────────────────────────────
+
+    def store(self, request: StandinRequest, response: Any) -> None:
+        if self.cassette is None:
+            return
+        self.cassette.put(request.key, request.model, _reply_from_response(response))
+        with self._lock:
+            self.recorded += 1
+
+    def summary(self) -> str:
+        if self.record:
+            return f"{self.recorded} responses recorded to {self.cassette.path if self.cassette else '-'}"
+        return (
+            f"{self.requests} requests ({self.replayed} replayed, {self.generated} generated), "
+            f"{self.throttled} throttled, {self.errors} errors"
+        )
+
+
+class _Models:
+    """client.models / client.aio.models of a stand-in google.genai Client."""
+
+    def __init__(self, standin: GeminiStandin, real: Any, is_async: bool):
+        self._standin = standin
+        self._real = real
+        self._async = is_async
+
+    def _request(self, model: str, contents: Any, config: Any) -> StandinRequest:
+        system = getattr(config, "system_instruction", None) if config is not None else None
+        return StandinRequest(model, system if isinstance(system, str) else "", _prompt_text(contents), _config_dict(config))
+
+    def generate_content(self, model: str, contents: Any, config: Any = None):
+        request = self._request(model, contents, config)
+        standin = self._standin
+        if self._async:
+            async def call():
+                if not standin.record:
+                    return await standin.respond(request)
+                response = await self._real.generate_content(model=model, contents=contents, config=config)
+                standin.store(request, response)
+                return response
+            return call()
+        if not standin.record:
+            return standin.respond_sync(request)
+        response = self._real.generate_content(model=model, contents=contents, config=config)
+        standin.store(request, response)
+        return response
+
+
+class _GenaiClient:
+    def __init__(self, standin: GeminiStandin, real: Any):
+        self.models = _Models(standin, getattr(real, "models", None), is_async=False)
+        self.aio = type("Aio", (), {})()
+        self.aio.models = _Models(standin, getattr(getattr(real, "aio", None), "models", None), is_async=True)
+
+
+class _GenerativeModel:
+    """Stand-in for google.generativeai's GenerativeModel."""
+
+    def __init__(self, standin: GeminiStandin, model_name: str, system_instruction: Optional[str], real: Any):
+        self._standin = standin
+        self._real = real
+        self.model_name = model_name
+        self._system = system_instruction or ""
+
+    async def generate_content_async(self, contents: Any, generation_config: Any = None, **kwargs):
+        request = StandinRequest(self.model_name, self._system, _prompt_text(contents), _config_dict(generation_config))
+        if not self._standin.record:
+            return await self._standin.respond(request)
+        response = await self._real.generate_content_async(contents, generation_config=generation_config, **kwargs)
+        self._standin.store(request, response)
+        return response
+
+
+def standin_from_env(value: str) -> GeminiStandin:
+    """GeminiStandin for an LLM_STANDIN value: "record:<dir>" or "replay:<dir>"."""
+    mode, _, path = value.partition(":")
+    if mode not in ("record", "replay") or not path:
+        raise ValueError(f'LLM_STANDIN must be "record:<dir>" or "replay:<dir>", got {value!r}')
+    return GeminiStandin(Cassette(Path(path)), record=(mode == "record"))
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Build Benchmark
+
+Times every build.py stage against synthetic corpora generated from the
+real recipes, to see which stage dominates and how each one scales.
+
+A corpus of N recipes cycles through data/recipes_multilingual_v2:
+copies get a new id ("adafina_1"), a numbered name in every language, the
+source recipe's category, ingredient icons and dish image. Each run builds
+into a temporary directory, print assets included (they are pruned to the
+current DPI, so sharing them could delete the real build's).
+
+Usage:
+    python gen_book/benchmark_build.py                      # 87, 1000, 10000 recipes
+    python gen_book/benchmark_build.py --sizes 87,500 --jobs 4
+    python gen_book/benchmark_build.py --output bench.json --pdf-max-recipes 0
+
+PDF layout is skipped above --pdf-max-recipes (default 1000) and when
+WeasyPrint is not installed; skipped stages are listed in the report.
+"""
+
+import io
+import copy
+import json
+import argparse
+import tempfile
+from contextlib import nullcontext, redirect_stdout
+from pathlib import Path
+from typing import Any, Dict, List
+
+import build
+from build_profile import BuildProfiler, machine_info
+
+
+DEFAULT_SIZES = [87, 1000, 10000]
+DEFAULT_OUTPUT = build.ROOT / "gen_book" / "output" / "build-benchmark.json"
+
+
+def weasyprint_available() -> bool:
+    """True if WeasyPrint and its system libraries load."""
+    try:
+        import weasyprint  # noqa: F401
+    except (ImportError, OSError):
+        return False
+    return True
+
+
+def make_corpus(originals: List[Dict[str, Any]], size: int, recipes_dir: Path) -> Dict[str, str]:
+    """
+    Write `size` recipe JSONs to recipes_dir, cycling through originals.
+
+    Returns:
+        {recipe id: id of the original it was copied from}
+    """
+    recipes_dir.mkdir(parents=True, exist_ok=True)
+    sources = {}
+    for i in range(size):
+        source = originals[i % len(originals)]
+        copy_num = i // len(originals)
+        recipe = copy.deepcopy(source)
+        if copy_num:
+            recipe["id"] = f"{source['id']}_{copy_num}"
+            recipe["name"] = {
+                lang: f"{name} {copy_num + 1}" if isinstance(name, str) else name
+                for lang, name in source["name"].items()
+            }
+        recipe["index"] = i + 1
+        sources[recipe["id"]] = source["id"]
+        with open(recipes_dir / f"{recipe['id']}.json", "w", encoding="utf-8") as f:
+            json.dump(recipe, f, ensure_ascii=False)
+    return sources
+
+
+def point_build_at(work_dir: Path, sources: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Redirect build.py's inputs and outputs to work_dir and register the
+    synthetic recipes' categories and ingredients. Returns what to restore.
+    """
+    saved = {
+        name: getattr(build, name)
+        for name in ("RECIPES_DIR", "OUTPUT_WEB", "OUTPUT_IMAGES", "OUTPUT_PRINT",
+                     "OUTPUT_PRINT_BLEED", "OUTPUT_PRINT_ASSETS", "OUTPUT_PRINT_FONTS", "PDF_FRAGMENT_CACHE", "OUTPUT_FLIPBOOK",
+                     "RECIPE_CATEGORIES")
+    }
+    build.RECIPES_DIR = work_dir / "recipes"
+    build.OUTPUT_WEB = work_dir / "web"
+    build.OUTPUT_IMAGES = work_dir / "images"
+    build.OUTPUT_PRINT = work_dir / "print"
+    build.OUTPUT_PRINT_BLEED = work_dir / "print-bleed"
+    build.OUTPUT_PRINT_ASSETS = work_dir / "print-assets"
+    build.OUTPUT_PRINT_FONTS = work_dir / "print-fonts"
+    build.PDF_FRAGMENT_CACHE = work_dir / ".pdf-fragments"
+    build.OUTPUT_FLIPBOOK = work_dir / "flipbook"
+
+    copies: Dict[str, List[str]] = {}
+    for recipe_id, source_id in sources.items():
+        copies.setdefault(source_id, []).append(recipe_id)
+    build.RECIPE_CATEGORIES = {
+        cat: [recipe_id for source_id in ids for recipe_id in copies.get(source_id, [])]
+        for cat, ids in saved["RECIPE_CATEGORIES"].items()
+    }
+
+    matrix = build.load_ingredients_matrix()
+    for recipe_id, source_id in sources.items():
+        if recipe_id != source_id:
+            matrix[recipe_id] = matrix.get(source_id, [])
+    return saved
+
+
+def restore_build(saved: Dict[str, Any], sources: Dict[str, str]) -> None:
+    """Undo point_build_at."""
+    for name, value in saved.items():
+        setattr(build, name, value)
+    matrix = build.load_ingredients_matrix()
+    for recipe_id, source_id in sources.items():
+        if recipe_id != source_id:
+            matrix.pop(recipe_id, None)
+
+
+def run_benchmark(
+    originals: List[Dict[str, Any]],
+    size: int,
+    jobs: int = 1,
+    pdf: bool = True,
+    images: bool = False,
+    dpi: int = 300,
+    verbose: bool = False,
+) -> Dict[str, Any]:
+    """Build a synthetic corpus of `size` recipes once, timing every stage."""
+    css_content = build.CSS_FILE.read_text(encoding="utf-8")
+    with tempfile.TemporaryDirectory(prefix=f"cookbook-bench-{size}-") as tmp:
+        work_dir = Path(tmp)
+        sources = make_corpus(originals, size, work_dir / "recipes")
+        saved = point_build_at(work_dir, sources)
+        profiler = BuildProfiler(build.output_dirs())
+        skipped = []
+        try:
+            with (nullcontext() if verbose else redirect_stdout(io.StringIO())):
+                with profiler.stage("load_all_recipes"):
+                    recipes = build.load_all_recipes()
+                with profiler.stage("build_web"):
+                    build.build_web(recipes, css_content, jobs=jobs, external_css=True, responsive_images=images)
+
+                for variant, inches, bleed in (("print", 8.0, False), ("print-bleed", 8.5, True)):
+                    suffix = "_bleed" if bleed else ""
+                    with profiler.stage(f"prepare_print_assets{suffix}"):
+                        assets = build.prepare_print_assets(recipes, variant, inches, dpi, jobs) if dpi else None
+                    with profiler.stage(f"build_print{suffix}"):
+                        (build.build_print_bleed if bleed else build.build_print)(recipes, css_content, assets)
+                    with profiler.stage(f"render_pdf_chunks{suffix}"):
+                        chunks = build.render_pdf_chunks(recipes, css_content, bleed=bleed, per_recipe=True, assets=assets)
+                    if pdf:
+                        with profiler.stage(f"build_pdf{suffix}"):
+                            (build.build_pdf_bleed if bleed else build.build_pdf)(len(recipes), chunks, jobs, use_cache=True)
+                    else:
+                        skipped.append(f"build_pdf{suffix}")
+                    del chunks
+
+                with profiler.stage("build_flipbook_index"):
+                    build.build_flipbook_index(recipes)
+        finally:
+            restore_build(saved, sources)
+
+    return profiler.report(recipes=size, jobs=jobs, responsive_images=images, print_dpi=dpi, skipped=skipped)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark build.py stages on synthetic corpora")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Comma-separated corpus sizes (default: 87,1000,10000)")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Worker processes (default: 1)")
+    parser.add_argument("--pdf-max-recipes", type=int, default=1000, help="Skip PDF layout for larger corpora (default: 1000)")
+    parser.add_argument("--images", action="store_true", help="Include responsive image encoding in build_web (encodes every synthetic recipe)")
+    parser.add_argument("--print-dpi", type=int, default=300, help="Print asset DPI (0 = original images)")
+    parser.add_argument("--output", "-o", default=str(DEFAULT_OUTPUT), help=f"JSON report path (default: {DEFAULT_OUTPUT.relative_to(build.ROOT)})")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Show build output")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    has_pdf = weasyprint_available()
+    if not has_pdf:
+        print("⚠ WeasyPrint not available; PDF layout stages will be skipped")
+
+    originals = build.load_all_recipes()
+    print(f"Benchmarking build.py on {len(originals)} source recipes, sizes: {sizes}")
+
+    runs = []
+    for size in sizes:
+        print(f"\n📚 {size} recipes")
+        result = run_benchmark(
+            originals, size, jobs=args.jobs,
+            pdf=has_pdf and size <= args.pdf_max_recipes,
+            images=args.images, dpi=args.print_dpi, verbose=args.verbose,
+        )
+        for stage in sorted(result["stages"], key=lambda s: s["wall_s"], reverse=True):
+            print(f"  {stage['stage']:<28} {stage['wall_s']:>8.2f}s  {stage['bytes_written'] / (1024 * 1024):>8.1f} MB  (peak RSS {stage['peak_rss_mb']:.0f} MB)")
+        if result["skipped"]:
+            print(f"  skipped: {', '.join(result['skipped'])}")
+        runs.append(result)
+
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "machine": machine_info(), "runs": runs}, f, indent=2)
+    print(f"\n✓ Results written to {output_path}")
@@ -12,8 +12,12 @@ import json
 import html
 import csv
 import random
+from itertools import groupby
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from build_manifest import BuildManifest, hash_json, hash_text
+from build_profile import BuildProfiler
 
 # Paths
 ROOT = Path(__file__).parent.parent  # Go up to RecipeDjerba root
@@ -23,15 +27,37 @@ IMAGES_INDEX = IMAGES_DIR / "index.json"
 INGREDIENTS_DIR = IMAGES_DIR / "ingredients" / "final"
 INGREDIENTS_MATRIX = ROOT / "recipes_ingredients_matrix.csv"
 OUTPUT_WEB = ROOT / "gen_book" / "output" / "web"
+OUTPUT_IMAGES = ROOT / "gen_book" / "output" / "images"  # web image derivatives (../images/ from web pages)
 OUTPUT_PRINT = ROOT / "gen_book" / "output" / "print"
 OUTPUT_PRINT_BLEED = ROOT / "gen_book" / "output" / "print-bleed"
+OUTPUT_PRINT_ASSETS = ROOT / "gen_book" / "output" / "print-assets"  # print-resolution images per variant
+OUTPUT_PRINT_FONTS = ROOT / "gen_book" / "output" / "print-fonts"  # local copies of BOOK_FONTS_URL for PDF chunks
 OUTPUT_FLIPBOOK = ROOT / "gen_book" / "flipbook"
 CSS_FILE = ROOT / "gen_book" / "cookbook.css"
+BUILD_SCRIPT = Path(__file__)
+# Builder code whose changes invalidate the manifest keys: this script and the gen_book modules it imports
+BUILD_MODULES = tuple(BUILD_SCRIPT.parent / name for name in (
+    "build.py", "sprite_atlas.py", "image_derivatives.py", "print_assets.py", "pdf_chunks.py", "print_fonts.py",
+))
+BOOK_FONTS_URL = "https://fonts.googleapis.com/css2?family=Bona+Nova:wght@400;700&family=Fraunces:opsz,wght@9..144,400;9..144,600;9..144,700&family=Heebo:wght@400;600;700&family=Noto+Naskh+Arabic:wght@400;600;700&family=Sora:wght@400;600;700&display=swap"
+BUILD_MANIFEST = ROOT / "gen_book" / "output" / "build-manifest.json"
+PDF_FRAGMENT_CACHE = ROOT / "gen_book" / "output" / ".pdf-fragments"
+BUILD_PROFILE = ROOT / "gen_book" / "output" / "build-profile.json"
+
+def output_dirs() -> list[Path]:
+    """Every directory the build writes to (watched by --profile for bytes written)."""
+    return [
+        OUTPUT_WEB, OUTPUT_IMAGES, OUTPUT_PRINT, OUTPUT_PRINT_BLEED,
+        OUTPUT_PRINT_ASSETS, PDF_FRAGMENT_CACHE, OUTPUT_FLIPBOOK,
+    ]
+
 
 # Load image index
 _image_index_cache = None
 _ingredients_matrix_cache = None
 _ingredient_name_to_file = None
+# Ingredient icon sprite atlas for web pages (set by build_web, see sprite_atlas.py)
+_sprite_atlas = None
 
 def load_ingredients_matrix() -> Dict[str, List[str]]:
     """Load the ingredients matrix and return dict of recipe_id -> list of ingredient image filenames."""
@@ -109,8 +135,10 @@ def render_page_decorations(recipe_id: str, page_variant: str, use_absolute: boo
     if not ingredient_paths:
         return ""
     
-    # SAME seed for both pages - positions will be identical
-    random.seed(hash(recipe_id))
+    # SAME seed for both pages - positions will be identical.
+    # Private RNG seeded by the id string (not hash(), which is salted per
+    # process) so output is identical across runs and pool workers.
+    rng = random.Random(recipe_id)
     
     # Pre-planned grid positions for optimal spacing:
     # Empty areas: Top-right (50-100% x, 0-35% y) and Bottom-left (0-45% x, 65-95% y)
@@ -141,7 +169,7 @@ def render_page_decorations(recipe_id: str, page_variant: str, use_absolute: boo
     # Select ingredients (deterministic for this recipe)
     num_icons = min(len(ingredient_paths), len(grid_positions))
     shuffled_ingredients = ingredient_paths.copy()
-    random.shuffle(shuffled_ingredients)
+    rng.shuffle(shuffled_ingredients)
     selected = shuffled_ingredients[:num_icons]
     
     # Assign ingredients to grid positions (1:1 mapping)
@@ -152,10 +180,19 @@ def render_page_decorations(recipe_id: str, page_variant: str, use_absolute: boo
         top_pct = pos[1] * 100
         
         # Subtle random transformations (deterministic per recipe)
-        rotation = random.randint(-20, 20)
-        skew_x = random.randint(-6, 6)
-        skew_y = random.randint(-4, 4)
-        scale = random.uniform(0.85, 1.15)
+        rotation = rng.randint(-20, 20)
+        skew_x = rng.randint(-6, 6)
+        skew_y = rng.randint(-4, 4)
+        scale = rng.uniform(0.85, 1.15)
+        
+        transform = f"rotate({rotation}deg) skewX({skew_x}deg) skewY({skew_y}deg) scale({scale})"
+        
+        # Web pages draw the icon from the sprite atlas when one is built
+        sprite = get_sprite_style(img_path) if not use_absolute else None
+        if sprite:
+            icons_html.append(f'''<span class="corner-ingredient corner-ingredient--sprite" 
+             style="left: {left_pct:.1f}%; top: {top_pct:.1f}%; transform: {transform}; {sprite}"></span>''')
+            continue
         
         # Use relative or absolute path
         if use_absolute:
@@ -163,8 +200,6 @@ def render_page_decorations(recipe_id: str, page_variant: str, use_absolute: boo
         else:
             src = img_path
         
-        transform = f"rotate({rotation}deg) skewX({skew_x}deg) skewY({skew_y}deg) scale({scale})"
-        
         icons_html.append(f'''<img class="corner-ingredient" 
              src="{src}" 
              alt="" 
@@ -173,6 +208,14 @@ def render_page_decorations(recipe_id: str, page_variant: str, use_absolute: boo
     return "\n        ".join(icons_html)
 
 
+def get_sprite_style(img_path: str) -> Optional[str]:
+    """CSS background for an ingredient icon from the web sprite atlas, if one is active."""
+    if _sprite_atlas is None:
+        return None
+    from sprite_atlas import sprite_style
+    return sprite_style(_sprite_atlas, Path(img_path).name, "../images/sprites/")
+
+
 def load_image_index() -> Dict:
     """Load the image index, caching it."""
     global _image_index_cache
@@ -314,7 +357,7 @@ def render_title_page_ingredients(use_absolute: bool = False) -> str:
         return ""
     
     # Seed for reproducibility
-    random.seed(42)
+    rng = random.Random(42)
     
     # Create a grid layout for ~96 ingredients on an 8x8 inch page
     # Use a 10x10 grid = 100 cells, each ~0.8in
@@ -324,7 +367,7 @@ def render_title_page_ingredients(use_absolute: bool = False) -> str:
     
     # Shuffle ingredients
     shuffled = ingredient_files.copy()
-    random.shuffle(shuffled)
+    rng.shuffle(shuffled)
     
     icons_html = []
     
@@ -338,20 +381,28 @@ def render_title_page_ingredients(use_absolute: bool = False) -> str:
         base_top = row * cell_size + cell_size / 2
         
         # Random jitter within cell (keep inside cell bounds)
-        jitter_x = random.uniform(-0.15, 0.15)
-        jitter_y = random.uniform(-0.15, 0.15)
+        jitter_x = rng.uniform(-0.15, 0.15)
+        jitter_y = rng.uniform(-0.15, 0.15)
         
         left = base_left + jitter_x
         top = base_top + jitter_y
         
         # Random size (vary between 0.5 and 0.7 inches)
-        size = random.uniform(0.5, 0.7)
+        size = rng.uniform(0.5, 0.7)
         
         # Random rotation
-        rotation = random.randint(-30, 30)
+        rotation = rng.randint(-30, 30)
         
         # Random slight scale variation
-        scale = random.uniform(0.9, 1.1)
+        scale = rng.uniform(0.9, 1.1)
+        
+        transform = f"rotate({rotation}deg) scale({scale})"
+        
+        sprite = get_sprite_style(str(img_path)) if not use_absolute else None
+        if sprite:
+            icons_html.append(f'''<span class="title-ingredient title-ingredient--sprite" 
+             style="left: {left:.2f}in; top: {top:.2f}in; width: {size:.2f}in; height: {size:.2f}in; transform: {transform}; {sprite}"></span>''')
+            continue
         
         # Use absolute or relative path
         if use_absolute:
@@ -359,8 +410,6 @@ def render_title_page_ingredients(use_absolute: bool = False) -> str:
         else:
             src = str(img_path)
         
-        transform = f"rotate({rotation}deg) scale({scale})"
-        
         icons_html.append(f'''<img class="title-ingredient" 
              src="{src}" 
              alt=""
@@ -939,15 +988,37 @@ def render_page1(recipe: dict, page_num: int, chapter_index: int = 1) -> str:
 '''
 
 
-def render_page2(recipe: dict, page_num: int, image_path: str) -> str:
-    """Render Page 2: Full-bleed image."""
+def render_responsive_image(recipe_id: str, derivatives: dict, alt_text: str, base_path: str = "../images/") -> str:
+    """
+    Render the hero image as <picture> with AVIF/WebP srcsets, a JPEG
+    fallback and the blurred placeholder as its background.
+    """
+    from image_derivatives import HERO_SIZES, MIME_TYPES, render_srcset
+    
+    sources = "\n".join(
+        f'        <source type="{MIME_TYPES[fmt]}" srcset="{render_srcset(recipe_id, derivatives, fmt, base_path)}" sizes="{HERO_SIZES}">'
+        for fmt in derivatives["formats"]
+    )
+    return f'''<picture class="hero-picture">
+{sources}
+        <img class="hero-image" src="{base_path}{derivatives["fallback"]}" alt="{escape(alt_text)}" width="{derivatives["width"]}" height="{derivatives["height"]}" decoding="async" style="background-image: url({derivatives["placeholder"]});">
+      </picture>'''
+
+
+def render_page2(recipe: dict, page_num: int, image_path: str, derivatives: Optional[dict] = None) -> str:
+    """Render Page 2: Full-bleed image (responsive <picture> if derivatives are given)."""
     alt_text = f'{recipe["name"]["en"]} dish'
     
+    if derivatives:
+        image_html = render_responsive_image(recipe["id"], derivatives, alt_text)
+    else:
+        image_html = f'<img class="hero-image" src="{image_path}" alt="{escape(alt_text)}">'
+    
     return f'''
   <!-- PAGE {page_num}: FULL-BLEED IMAGE -->
   <section class="page page--image">
     <div class="page-inner">
-      <img class="hero-image" src="{image_path}" alt="{escape(alt_text)}">
+      {image_html}
       <div class="page-num">{page_num}</div>
     </div>
   </section>
@@ -1143,11 +1214,11 @@ def render_page4(recipe: dict, page_num: int, use_absolute: bool = False) -> str
 '''
 
 
-def render_recipe(recipe: dict, start_page: int, image_path: str, use_absolute: bool = False, chapter_index: int = 1) -> str:
+def render_recipe(recipe: dict, start_page: int, image_path: str, use_absolute: bool = False, chapter_index: int = 1, image_derivatives: Optional[dict] = None) -> str:
     """Render all 4 pages for a recipe."""
     pages = [
         render_page1(recipe, start_page, chapter_index),
-        render_page2(recipe, start_page + 1, image_path),
+        render_page2(recipe, start_page + 1, image_path, image_derivatives),
         render_page3(recipe, start_page + 2, use_absolute),
         render_page4(recipe, start_page + 3, use_absolute),
     ]
@@ -1160,46 +1231,92 @@ def order_recipes_by_category(recipes: list[dict]) -> list[dict]:
     return [recipe for _, recipe, _ in ordered]
 
 
-def render_html(recipes: list[dict], css_content: str, image_base_path: str = "../images/", use_absolute: bool = False) -> str:
-    """Render complete HTML document."""
-    # Reorder recipes to match TOC category order
-    recipes = order_recipes_by_category(recipes)
-    
-    # Render front matter (title, copyright, intro, blank)
-    front_matter = render_front_matter(use_absolute=use_absolute)
-    
-    # Render table of contents
-    toc = render_table_of_contents(recipes)
+def iter_book_chunks(recipes: list[dict], image_base_path: str = "", use_absolute: bool = True, bleed: bool = False, per_recipe: bool = False) -> Iterator[tuple[str, str]]:
+    """
+    Yield the book body as (name, html) chunks, rendered lazily in book
+    order: front matter, table of contents, then one chunk per category
+    (from RECIPE_CATEGORIES), or one per recipe if per_recipe.
+    Concatenating the chunks gives the full document body.
+    
+    For the bleed variant, the TOC chunk ends with the blank page that puts
+    recipes on a verso page, and recto/verso classes are assigned as each
+    chunk is emitted, from a running count of physical pages.
+    """
+    ordered = get_category_ordered_recipes(recipes)
+    physical_page = 1
     
-    recipe_html_parts = []
-    page_num = 1  # Recipes start at page 1 (front matter uses roman numerals)
+    def emit(name: str, chunk_html: str) -> tuple[str, str]:
+        nonlocal physical_page
+        if bleed:
+            chunk_html, pages = mark_recto_verso(chunk_html, physical_page)
+            physical_page += pages
+        return name, chunk_html
     
-    for chapter_index, recipe in enumerate(recipes, start=1):
-        image_path = get_image_path(recipe, image_base_path, use_absolute=use_absolute)
-        recipe_html_parts.append(render_recipe(recipe, page_num, image_path, use_absolute, chapter_index))
-        page_num += 4  # Each recipe is 4 pages
+    # Front matter (title, copyright, intro, vegan guides, blank)
+    yield emit("front-matter", render_front_matter(use_absolute=use_absolute))
     
-    recipes_html = front_matter + toc + "\n".join(recipe_html_parts)
+    # Table of contents
+    toc = render_table_of_contents([recipe for _, recipe, _ in ordered])
+    if bleed:
+        toc += render_bleed_blank_page(len(ordered))
+    yield emit("toc", toc)
     
+    page_num = 1  # Recipes start at page 1 (front matter uses roman numerals)
+    separator = ""  # Recipes are newline-separated, across chunk boundaries too
+    for cat_name, group in groupby(ordered, key=lambda entry: entry[2]):
+        category_parts = []
+        for chapter_index, recipe, _ in group:
+            image_path = get_image_path(recipe, image_base_path, use_absolute=use_absolute)
+            recipe_html = separator + render_recipe(recipe, page_num, image_path, use_absolute, chapter_index)
+            separator = "\n"
+            page_num += 4  # Each recipe is 4 pages
+            if per_recipe:
+                yield emit(f"recipe:{recipe['id']}", recipe_html)
+            else:
+                category_parts.append(recipe_html)
+        if not per_recipe:
+            yield emit(f"category:{cat_name}", "".join(category_parts))
+
+
+def count_pages(html_content: str) -> int:
+    """Count page sections in rendered HTML (each section is exactly one page)."""
+    return html_content.count('<section class="page')
+
+
+def render_document_head(css_content: str, title: str = "Four-Language Cookbook", body_class: str = "", font_css: Optional[str] = None) -> str:
+    """
+    Everything in a book document before the page sections. With font_css
+    (local @font-face rules, see print_fonts.py) the fonts are inlined
+    instead of linked from Google Fonts.
+    """
+    body_tag = f'<body class="{body_class}">' if body_class else "<body>"
+    if font_css:
+        fonts = f"<style>\n{font_css}\n</style>"
+    else:
+        fonts = f'''<!-- Google Fonts -->
+<link rel="preconnect" href="https://fonts.googleapis.com">
+<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+<link href="{BOOK_FONTS_URL}" rel="stylesheet">'''
     return f'''<!DOCTYPE html>
 <html lang="en">
 <head>
 <meta charset="UTF-8">
-<title>Four-Language Cookbook</title>
+<title>{title}</title>
 
-<!-- Google Fonts -->
-<link rel="preconnect" href="https://fonts.googleapis.com">
-<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-<link href="https://fonts.googleapis.com/css2?family=Bona+Nova:wght@400;700&family=Fraunces:opsz,wght@9..144,400;9..144,600;9..144,700&family=Heebo:wght@400;600;700&family=Noto+Naskh+Arabic:wght@400;600;700&family=Sora:wght@400;600;700&display=swap" rel="stylesheet">
+{fonts}
 
 <style>
 {css_content}
 </style>
 </head>
-<body>
+{body_tag}
 
 <div class="book">
-{recipes_html}
+'''
+
+
+# Everything in a book document after the page sections
+DOCUMENT_TAIL = '''
 </div>
 
 </body>
@@ -1207,9 +1324,100 @@ def render_html(recipes: list[dict], css_content: str, image_base_path: str = ".
 '''
 
 
-def render_single_recipe_html(recipe: dict, css_content: str, image_path: str, chapter_index: int = 1) -> str:
-    """Render HTML for a single recipe."""
-    recipe_html = render_recipe(recipe, 1, image_path, chapter_index=chapter_index)
+def render_document(body_html: str, css_content: str, title: str = "Four-Language Cookbook", body_class: str = "", font_css: Optional[str] = None) -> str:
+    """Wrap rendered page sections in a complete HTML document."""
+    return render_document_head(css_content, title, body_class, font_css) + body_html + DOCUMENT_TAIL
+
+
+def write_book_html(
+    output_path: Path,
+    chunks: Iterable[tuple[str, str]],
+    css_content: str,
+    title: str = "Four-Language Cookbook",
+    body_class: str = "",
+    assets: Optional[Dict[str, str]] = None,
+) -> int:
+    """
+    Stream a book document to output_path chunk by chunk (from
+    iter_book_chunks), so only one chunk is in memory at a time. Written to
+    a temp file and renamed into place.
+    
+    Returns:
+        Number of pages written
+    """
+    from print_assets import rewrite_asset_paths
+    
+    pages = 0
+    tmp_path = output_path.with_name(f".{output_path.name}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_document_head(css_content, title, body_class))
+        for _, chunk_html in chunks:
+            if assets:
+                chunk_html = rewrite_asset_paths(chunk_html, assets)
+            f.write(chunk_html)
+            pages += count_pages(chunk_html)
+        f.write(DOCUMENT_TAIL)
+    tmp_path.replace(output_path)
+    return pages
+
+
+def render_html(recipes: list[dict], css_content: str, image_base_path: str = "../images/", use_absolute: bool = False) -> str:
+    """Render complete HTML document."""
+    chunks = iter_book_chunks(recipes, image_base_path, use_absolute)
+    recipes_html = "".join(chunk_html for _, chunk_html in chunks)
+    return render_document(recipes_html, css_content)
+
+
+def minify_css(css_content: str) -> str:
+    """
+    Strip comments and redundant whitespace from CSS.
+    
+    Conservative: only whitespace around { } ; , > and after : is removed,
+    which leaves selectors, calc() expressions and quoted strings intact.
+    """
+    import re
+    
+    css = re.sub(r"/\*.*?\*/", "", css_content, flags=re.DOTALL)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip() + "\n"
+
+
+def write_shared_stylesheet(css_content: str) -> str:
+    """
+    Write minified CSS to OUTPUT_WEB/cookbook.<hash>.css for web pages to link.
+    
+    The content hash in the filename changes whenever the CSS does, so the
+    file can be cached indefinitely. Stylesheets from older builds are removed.
+    
+    Returns:
+        Stylesheet filename (relative to OUTPUT_WEB)
+    """
+    minified = minify_css(css_content)
+    filename = f"cookbook.{hash_text(minified)[:10]}.css"
+    OUTPUT_WEB.mkdir(parents=True, exist_ok=True)
+    
+    for old in OUTPUT_WEB.glob("cookbook.*.css"):
+        if old.name != filename:
+            old.unlink()
+    output_path = OUTPUT_WEB / filename
+    if not output_path.exists():
+        output_path.write_text(minified, encoding="utf-8")
+    print(f"  ✓ {filename} ({len(minified.encode('utf-8')) // 1024} KB, shared by all pages)")
+    return filename
+
+
+def render_style_block(css_content: str, stylesheet: Optional[str] = None) -> str:
+    """Link to the shared stylesheet if given, otherwise inline css_content."""
+    if stylesheet:
+        return f'<link rel="stylesheet" href="{stylesheet}">'
+    return f"<style>\n{css_content}\n</style>"
+
+
+def render_single_recipe_html(recipe: dict, css_content: str, image_path: str, chapter_index: int = 1, stylesheet: Optional[str] = None, image_derivatives: Optional[dict] = None) -> str:
+    """Render HTML for a single recipe (linking stylesheet instead of inlining CSS if given)."""
+    recipe_html = render_recipe(recipe, 1, image_path, chapter_index=chapter_index, image_derivatives=image_derivatives)
     recipe_name = recipe["name"]["en"]
     
     return f'''<!DOCTYPE html>
@@ -1223,9 +1431,7 @@ def render_single_recipe_html(recipe: dict, css_content: str, image_path: str, c
 <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
 <link href="https://fonts.googleapis.com/css2?family=Bona+Nova:wght@400;700&family=Fraunces:opsz,wght@9..144,400;9..144,600;9..144,700&family=Heebo:wght@400;600;700&family=Noto+Naskh+Arabic:wght@400;600;700&family=Sora:wght@400;600;700&display=swap" rel="stylesheet">
 
-<style>
-{css_content}
-</style>
+{render_style_block(css_content, stylesheet)}
 </head>
 <body>
 
@@ -1238,8 +1444,55 @@ def render_single_recipe_html(recipe: dict, css_content: str, image_path: str, c
 '''
 
 
-def build_front_matter_pages(css_content: str) -> None:
+def web_inputs_key(css_content: str, manifest: BuildManifest) -> str:
+    """Key for inputs shared by every web page (builder code, CSS, image index, ingredients matrix)."""
+    return hash_text(
+        manifest.files_hash(BUILD_MODULES),
+        hash_text(css_content),
+        manifest.file_hash(IMAGES_INDEX),
+        manifest.file_hash(INGREDIENTS_MATRIX),
+    )
+
+
+def recipe_page_key(recipe: dict, chapter_num: int, base_key: str, image_derivatives: Optional[dict] = None) -> str:
+    """Key for a single recipe web page: its JSON, chapter number, image (path or derivatives) and decorations."""
+    recipe_id = recipe["id"]
+    return hash_text(
+        base_key,
+        hash_json(recipe),
+        str(chapter_num),
+        get_image_path(recipe, "../images/"),
+        hash_json(image_derivatives),
+        hash_json(load_ingredients_matrix().get(recipe_id, [])),
+    )
+
+
+def print_inputs_key(recipes: list[dict], css_content: str, manifest: BuildManifest) -> str:
+    """
+    Key for everything that feeds the print HTML and PDF: all recipes in
+    book order, plus the content of every referenced dish image and
+    ingredient icon (the title page uses all icons).
+    """
+    parts = [web_inputs_key(css_content, manifest)]
+    for chapter_num, recipe, _ in get_category_ordered_recipes(recipes):
+        parts.append(recipe_page_key(recipe, chapter_num, ""))
+        dish_image = Path(get_image_path(recipe, use_absolute=True))
+        parts.append(manifest.file_hash(dish_image))
+    icon_files = sorted(INGREDIENTS_DIR.glob("*.png")) if INGREDIENTS_DIR.exists() else []
+    parts.append(manifest.files_hash(icon_files))
+    return hash_text(*parts)
+
+
+def build_front_matter_pages(css_content: str, manifest: Optional[BuildManifest] = None, stylesheet: Optional[str] = None) -> None:
     """Build individual front matter HTML pages for web deployment."""
+    if manifest is not None:
+        icon_names = sorted(f.name for f in INGREDIENTS_DIR.glob("*.png")) if INGREDIENTS_DIR.exists() else []
+        atlas_name = _sprite_atlas["image"] if _sprite_atlas else ""
+        key = hash_text(web_inputs_key(css_content, manifest), stylesheet or "", atlas_name, *icon_names)
+        if manifest.is_fresh("web:front-matter", key, OUTPUT_WEB / "_title.html"):
+            print("  ✓ front matter unchanged")
+            return
+    
     front_matter_html = render_front_matter(use_absolute=False)
     
     # Parse the front matter HTML to extract individual pages
@@ -1266,9 +1519,7 @@ def build_front_matter_pages(css_content: str) -> None:
 <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
 <link href="https://fonts.googleapis.com/css2?family=Bona+Nova:wght@400;700&family=Fraunces:opsz,wght@9..144,400;9..144,600;9..144,700&family=Heebo:wght@400;600;700&family=Noto+Naskh+Arabic:wght@400;600;700&family=Sora:wght@400;600;700&display=swap" rel="stylesheet">
 
-<style>
-{css_content}
-</style>
+{render_style_block(css_content, stylesheet)}
 </head>
 <body>
 
@@ -1282,36 +1533,185 @@ def build_front_matter_pages(css_content: str) -> None:
         output_path = OUTPUT_WEB / f"{name}.html"
         output_path.write_text(html_content, encoding="utf-8")
         print(f"  ✓ {name}.html")
+    
+    if manifest is not None:
+        manifest.record("web:front-matter", key)
+
+
+def write_recipe_page(recipe: dict, css_content: str, chapter_num: int, stylesheet: Optional[str] = None, image_derivatives: Optional[dict] = None) -> Path:
+    """Render a single recipe web page and write it to OUTPUT_WEB."""
+    image_path = get_image_path(recipe, "../images/")
+    html_content = render_single_recipe_html(
+        recipe, css_content, image_path, chapter_index=chapter_num,
+        stylesheet=stylesheet, image_derivatives=image_derivatives,
+    )
+    output_path = OUTPUT_WEB / f"{recipe['id']}.html"
+    output_path.write_text(html_content, encoding="utf-8")
+    return output_path
+
+
+def build_image_derivatives(recipes: list[dict], jobs: int = 1) -> Dict[str, dict]:
+    """
+    Encode responsive web variants of every dish image into OUTPUT_IMAGES
+    (see image_derivatives.py). Returns {recipe_id: derivatives entry}, or
+    {} if Pillow is not installed.
+    """
+    from image_derivatives import build_derivatives, pillow_available
+    
+    if not pillow_available():
+        print("  ⚠ Pillow not installed (pip install Pillow); web pages use the original PNGs")
+        return {}
+    
+    sources = {}
+    for recipe in recipes:
+        image_path = Path(get_image_path(recipe, use_absolute=True))
+        if image_path.exists():
+            sources[recipe["id"]] = image_path
+    return build_derivatives(sources, OUTPUT_IMAGES, jobs=jobs)
+
+
+def build_sprite_atlas() -> Optional[dict]:
+    """
+    Pack ingredient icons into one sprite atlas in OUTPUT_IMAGES/sprites (see
+    sprite_atlas.py). Returns the atlas manifest, or None if Pillow is not
+    installed or there are no icons.
+    """
+    from sprite_atlas import build_atlas, pillow_available
+    
+    icons = sorted(INGREDIENTS_DIR.glob("*.png")) if INGREDIENTS_DIR.exists() else []
+    if not icons:
+        return None
+    if not pillow_available():
+        print("  ⚠ Pillow not installed (pip install Pillow); web pages link each icon PNG")
+        return None
+    return build_atlas(icons, OUTPUT_IMAGES / "sprites")
+
+
+# CSS and image derivatives for pool workers, set once per process by the
+# pool initializer instead of being pickled with every task
+_worker_css_content = None
+_worker_stylesheet = None
+_worker_image_derivatives: Dict[str, dict] = {}
+
+
+def _init_page_worker(
+    css_content: str,
+    stylesheet: Optional[str] = None,
+    image_derivatives: Optional[Dict[str, dict]] = None,
+    sprite_atlas: Optional[dict] = None,
+) -> None:
+    """Process pool initializer for write_recipe_page workers."""
+    global _worker_css_content, _worker_stylesheet, _worker_image_derivatives, _sprite_atlas
+    _worker_css_content = css_content
+    _worker_stylesheet = stylesheet
+    _worker_image_derivatives = image_derivatives or {}
+    _sprite_atlas = sprite_atlas
+
+
+def _pool_write_recipe_page(recipe: dict, chapter_num: int) -> Path:
+    """Pool task wrapper around write_recipe_page."""
+    return write_recipe_page(
+        recipe, _worker_css_content, chapter_num, _worker_stylesheet,
+        _worker_image_derivatives.get(recipe["id"]),
+    )
 
 
-def build_web(recipes: list[dict], css_content: str) -> None:
-    """Build individual HTML pages for web deployment."""
+def build_web(recipes: list[dict], css_content: str, manifest: Optional[BuildManifest] = None, jobs: int = 1, external_css: bool = False, responsive_images: bool = False) -> None:
+    """
+    Build individual HTML pages for web deployment.
+    
+    If a manifest is given (incremental mode), pages whose inputs are
+    unchanged since the last build are skipped.
+    With jobs > 1, recipe pages are rendered in a process pool; output is
+    byte-identical to the serial build.
+    With external_css, pages link one shared cookbook.<hash>.css instead of
+    each inlining the full stylesheet. With responsive_images, dish photos
+    are served as sized AVIF/WebP variants via srcset and ingredient icons
+    come from one sprite atlas.
+    """
+    global _sprite_atlas
     OUTPUT_WEB.mkdir(parents=True, exist_ok=True)
     
+    stylesheet = None
+    if external_css:
+        stylesheet = write_shared_stylesheet(css_content)
+    else:
+        for old in OUTPUT_WEB.glob("cookbook.*.css"):
+            old.unlink()
+    
+    image_derivatives = {}
+    _sprite_atlas = None
+    if responsive_images:
+        print("  Building image derivatives...")
+        image_derivatives = build_image_derivatives(recipes, jobs)
+        print("  Building ingredient sprite atlas...")
+        _sprite_atlas = build_sprite_atlas()
+    
     # Build front matter pages first
     print("  Building front matter...")
-    build_front_matter_pages(css_content)
+    build_front_matter_pages(css_content, manifest, stylesheet)
     
     print("  Building recipe pages...")
+    atlas_name = _sprite_atlas["image"] if _sprite_atlas else ""
+    base_key = hash_text(web_inputs_key(css_content, manifest), stylesheet or "", atlas_name) if manifest is not None else ""
     # Use category order for consistent chapter numbering
     ordered = get_category_ordered_recipes(recipes)
     total = len(ordered)
+    
+    # Select pages to (re)build
+    pending = []  # (position, chapter_num, recipe, manifest key)
     for i, (chapter_num, recipe, _) in enumerate(ordered, 1):
-        recipe_id = recipe["id"]
-        image_path = get_image_path(recipe, "../images/")
-        html_content = render_single_recipe_html(recipe, css_content, image_path, chapter_index=chapter_num)
-        
-        output_path = OUTPUT_WEB / f"{recipe_id}.html"
-        output_path.write_text(html_content, encoding="utf-8")
-        if i % 10 == 0 or i == total:
+        key = None
+        if manifest is not None:
+            key = recipe_page_key(recipe, chapter_num, base_key, image_derivatives.get(recipe["id"]))
+            if manifest.is_fresh(f"web:{recipe['id']}", key, OUTPUT_WEB / f"{recipe['id']}.html"):
+                continue
+        pending.append((i, chapter_num, recipe, key))
+    skipped = total - len(pending)
+    
+    if jobs > 1 and len(pending) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        workers = min(jobs, len(pending))
+        print(f"  Rendering {len(pending)} page(s) with {workers} processes...")
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_page_worker, initargs=(css_content, stylesheet, image_derivatives, _sprite_atlas)) as pool:
+            written = pool.map(
+                _pool_write_recipe_page,
+                [recipe for _, _, recipe, _ in pending],
+                [chapter_num for _, chapter_num, _, _ in pending],
+                chunksize=max(1, len(pending) // (workers * 4)),
+            )
+            written = list(written)
+    else:
+        written = (
+            write_recipe_page(recipe, css_content, chapter_num, stylesheet, image_derivatives.get(recipe["id"]))
+            for _, chapter_num, recipe, _ in pending
+        )
+    
+    for (i, _, recipe, key), output_path in zip(pending, written):
+        if manifest is not None:
+            manifest.record(f"web:{recipe['id']}", key)
             print(f"  [{i}/{total}] ✓ {output_path.name}")
+        elif i % 10 == 0 or i == total:
+            print(f"  [{i}/{total}] ✓ {output_path.name}")
+    
+    if skipped:
+        print(f"  ✓ {skipped} unchanged recipe page(s) skipped")
     
     # Build index page
-    build_index(recipes, css_content)
+    build_index(recipes, css_content, manifest)
 
 
-def build_index(recipes: list[dict], css_content: str) -> None:
+def build_index(recipes: list[dict], css_content: str, manifest: Optional[BuildManifest] = None) -> None:
     """Build index/table of contents page."""
+    output_path = OUTPUT_WEB / "index.html"
+    if manifest is not None:
+        key = hash_text(
+            manifest.files_hash(BUILD_MODULES),
+            hash_json([(r["id"], r["name"]["en"]) for r in recipes]),
+        )
+        if manifest.is_fresh("web:index", key, output_path):
+            return
+    
     recipe_links = []
     for recipe in recipes:
         name_en = recipe["name"]["en"]
@@ -1396,26 +1796,94 @@ def build_index(recipes: list[dict], css_content: str) -> None:
 </html>
 '''
     
-    output_path = OUTPUT_WEB / "index.html"
     output_path.write_text(index_html, encoding="utf-8")
     print(f"  ✓ index.html")
+    if manifest is not None:
+        manifest.record("web:index", key)
+
+
+def prepare_print_assets(recipes: list[dict], variant: str, page_inches: float, dpi: int, jobs: int = 1) -> Dict[str, str]:
+    """
+    Resample dish photos and ingredient icons to their printed size at dpi
+    (see print_assets.py) into OUTPUT_PRINT_ASSETS/<variant>.
+    
+    Returns:
+        {source path: prepared asset path}, or {} if Pillow is not installed
+    """
+    from print_assets import build_print_assets, pillow_available
+    
+    if not pillow_available():
+        print("  ⚠ Pillow not installed (pip install Pillow); PDF embeds full-size images")
+        return {}
+    
+    photos = {get_image_path(recipe, use_absolute=True): page_inches for recipe in recipes}
+    icons = sorted(INGREDIENTS_DIR.glob("*.png")) if INGREDIENTS_DIR.exists() else []
+    return build_print_assets(photos, icons, OUTPUT_PRINT_ASSETS / variant, dpi=dpi, jobs=jobs)
 
 
-def build_print(recipes: list[dict], css_content: str) -> None:
-    """Build combined HTML for print/PDF."""
+def build_print(recipes: list[dict], css_content: str, assets: Optional[Dict[str, str]] = None) -> None:
+    """Build combined HTML for print/PDF (images swapped for prepared print assets if given)."""
     OUTPUT_PRINT.mkdir(parents=True, exist_ok=True)
     
-    # Use absolute paths for images in print version
-    image_base_path = ""  # Will use absolute paths via use_absolute flag
-    html_content = render_html(recipes, css_content, image_base_path, use_absolute=True)
+    # Use absolute paths for images in print version; stream one recipe at a time
+    chunks = iter_book_chunks(recipes, "", use_absolute=True, per_recipe=True)
+    pages = write_book_html(OUTPUT_PRINT / "full-cookbook.html", chunks, css_content, assets=assets)
+    print(f"  ✓ full-cookbook.html ({pages} pages)")
+
+
+def render_pdf_chunks(recipes: list[dict], css_content: str, bleed: bool = False, per_recipe: bool = False, assets: Optional[Dict[str, str]] = None) -> list[tuple[str, str, int]]:
+    """
+    Render the print (or bleed) book as standalone chunk documents for the
+    chunked PDF engine. Returns (name, html document, page count) in book order.
+    
+    Per-recipe chunks (4 pages each) are what the fragment cache stores, so
+    an edited recipe only re-lays out its own pages. Image paths are swapped
+    for prepared print assets if given. Fonts come from local copies (see
+    print_fonts.py), so each chunk doesn't fetch them from Google Fonts again.
+    """
+    from print_assets import rewrite_asset_paths
+    from print_fonts import local_font_css
     
-    output_path = OUTPUT_PRINT / "full-cookbook.html"
-    output_path.write_text(html_content, encoding="utf-8")
-    print(f"  ✓ full-cookbook.html")
+    if bleed:
+        css_content = css_content + "\n" + get_bleed_css()
+        title, body_class = "Four-Language Cookbook (8.5x8.5 Bleed Print)", "print-bleed"
+    else:
+        title, body_class = "Four-Language Cookbook", ""
+    
+    font_css = local_font_css(BOOK_FONTS_URL, OUTPUT_PRINT_FONTS)
+    documents = []
+    for name, chunk_html in iter_book_chunks(recipes, "", use_absolute=True, bleed=bleed, per_recipe=per_recipe):
+        if assets:
+            chunk_html = rewrite_asset_paths(chunk_html, assets)
+        documents.append((name, render_document(chunk_html, css_content, title, body_class, font_css), count_pages(chunk_html)))
+    return documents
 
 
-def build_pdf(num_recipes: int = 0) -> None:
-    """Generate PDF from HTML using WeasyPrint."""
+def write_pdf_chunked(chunks: list[tuple[str, str, int]], pdf_path: Path, jobs: int, cache_dir: Optional[Path] = None) -> bool:
+    """
+    Write pdf_path with the chunked engine. Returns False (and prints why)
+    if the engine's dependencies are missing, so callers can fall back to a
+    single-pass render.
+    """
+    from pdf_chunks import pdf_engine_available, write_chunked_pdf
+    
+    if not pdf_engine_available():
+        print("    ⚠ pypdf not installed (pip install pypdf); using single-pass PDF render")
+        return False
+    
+    write_chunked_pdf(chunks, pdf_path, jobs=jobs, cache_dir=cache_dir)
+    return True
+
+
+def build_pdf(num_recipes: int = 0, chunks: Optional[list[tuple[str, str, int]]] = None, jobs: int = 1, use_cache: bool = False) -> None:
+    """
+    Generate PDF from HTML using WeasyPrint.
+    
+    If chunks (from render_pdf_chunks) are given, the book is laid out in
+    chunks (in parallel with jobs > 1) and merged. With use_cache, chunk PDFs
+    are kept as fragments and only changed chunks are laid out again.
+    Otherwise full-cookbook.html is rendered in one pass.
+    """
     try:
         from weasyprint import HTML
     except ImportError:
@@ -1438,7 +1906,9 @@ def build_pdf(num_recipes: int = 0) -> None:
     sys.stdout.flush()  # Force output
     
     try:
-        HTML(filename=str(html_path)).write_pdf(str(pdf_path))
+        cache_dir = PDF_FRAGMENT_CACHE / "print" if use_cache else None
+        if not (chunks and write_pdf_chunked(chunks, pdf_path, jobs, cache_dir)):
+            HTML(filename=str(html_path)).write_pdf(str(pdf_path))
         print(f"  ✓ full-cookbook.pdf ({pdf_path.stat().st_size / 1024 / 1024:.1f} MB)")
     except Exception as e:
         print(f"  ❌ PDF generation failed: {e}")
@@ -1570,57 +2040,40 @@ body.print-bleed .page--image .page-num {
 '''
 
 
-def add_recto_verso_classes(html_content: str) -> str:
+def mark_recto_verso(html_content: str, first_page: int = 1) -> tuple[str, int]:
     """
-    Post-process HTML to add page--recto and page--verso classes to each page section.
+    Add page--recto / page--verso classes to each page section of a chunk.
     
     Physical page 1, 3, 5... (odd) = recto (right-hand page)
     Physical page 2, 4, 6... (even) = verso (left-hand page)
-    """
-    import re
     
-    page_count = [0]  # Use list to allow modification in nested function
+    first_page is the physical page number of the chunk's first section, so
+    chunks are classified as they are emitted instead of in a pass over the
+    whole document.
     
-    def replace_page_class(match):
-        page_count[0] += 1
-        existing_classes = match.group(1)
-        # Odd physical pages are recto (right), even are verso (left)
-        position_class = "page--recto" if page_count[0] % 2 == 1 else "page--verso"
-        return f'<section class="page {position_class}{existing_classes}"'
-    
-    # Match <section class="page" or <section class="page page--something"
-    # Capture any additional classes after "page"
-    pattern = r'<section class="page([^"]*)"'
-    result = re.sub(pattern, replace_page_class, html_content)
-    
-    return result
+    Returns:
+        (marked html, number of page sections)
+    """
+    marker = '<section class="page'
+    parts = html_content.split(marker)
+    marked = [parts[0]]
+    for offset, rest in enumerate(parts[1:]):
+        position_class = "page--recto" if (first_page + offset) % 2 == 1 else "page--verso"
+        marked.append(f"{marker} {position_class}{rest}")
+    return "".join(marked), len(parts) - 1
 
 
-def render_html_bleed(recipes: list[dict], css_content: str, image_base_path: str = "", use_absolute: bool = True) -> str:
+def render_bleed_blank_page(num_recipes: int) -> str:
     """
-    Render complete HTML document for 8.5x8.5 bleed print.
-    
-    Key differences from standard print:
-    - Adds blank page before physical page 11 so recipes start on page 12 (verso)
-    - Uses body.print-bleed class for special styling
-    - Includes bleed CSS for @page :left/:right margins
-    - Adds page--recto/page--verso classes for proper margin handling
+    Blank page inserted before the recipes in the bleed version, if needed
+    so that recipes start on physical page 12 (verso).
     """
-    # Reorder recipes to match TOC category order
-    recipes = order_recipes_by_category(recipes)
-    
-    # Render front matter (title, copyright, intro, vegan guides, blank)
-    front_matter = render_front_matter(use_absolute=use_absolute)
-    
-    # Render table of contents
-    toc = render_table_of_contents(recipes)
-    
     # Count front matter pages to determine where to insert blank
     # Front matter: title(1) + copyright(1) + intro1(1) + intro2(1) + vegan1(1) + vegan2(1) + blank(1) = 7 pages
     front_matter_pages = 7
     
     # Count TOC pages (30 recipes per page)
-    toc_pages = (len(recipes) + 29) // 30
+    toc_pages = (num_recipes + 29) // 30
     
     # Total pages before recipes
     pages_before_recipes = front_matter_pages + toc_pages
@@ -1628,73 +2081,58 @@ def render_html_bleed(recipes: list[dict], css_content: str, image_base_path: st
     # We want recipes to start on physical page 12 (an even/verso page)
     # If pages_before_recipes is odd (e.g., 10), recipes start on odd page 11
     # We need to add a blank to make it even (11), so recipes start on page 12
-    blank_page_before_recipes = ""
     if pages_before_recipes % 2 == 0:
         # Even number of pages before recipes means recipes would start on odd page
         # Add a blank to shift recipes to even page
-        blank_page_before_recipes = '''
+        return '''
   <!-- BLANK PAGE (to ensure recipes start on verso/left page 12) -->
   <section class="page page--blank">
     <div class="page-inner"></div>
   </section>
 '''
+    return ""
+
+
+def render_html_bleed(recipes: list[dict], css_content: str, image_base_path: str = "", use_absolute: bool = True) -> str:
+    """
+    Render complete HTML document for 8.5x8.5 bleed print.
     
-    recipe_html_parts = []
-    page_num = 1  # Recipes start at page 1 (front matter uses roman numerals)
-    
-    for chapter_index, recipe in enumerate(recipes, start=1):
-        image_path = get_image_path(recipe, image_base_path, use_absolute=use_absolute)
-        recipe_html_parts.append(render_recipe(recipe, page_num, image_path, use_absolute, chapter_index))
-        page_num += 4  # Each recipe is 4 pages
-    
-    recipes_html = front_matter + toc + blank_page_before_recipes + "\n".join(recipe_html_parts)
-    
-    # Add recto/verso classes to all pages
-    recipes_html = add_recto_verso_classes(recipes_html)
+    Key differences from standard print:
+    - Adds blank page before physical page 11 so recipes start on page 12 (verso)
+    - Uses body.print-bleed class for special styling
+    - Includes bleed CSS for @page :left/:right margins
+    - Adds page--recto/page--verso classes for proper margin handling
+    """
+    chunks = iter_book_chunks(recipes, image_base_path, use_absolute, bleed=True)
+    recipes_html = "".join(chunk_html for _, chunk_html in chunks)
     
     # Combine base CSS with bleed CSS
     full_css = css_content + "\n" + get_bleed_css()
     
-    return f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-<meta charset="UTF-8">
-<title>Four-Language Cookbook (8.5x8.5 Bleed Print)</title>
+    return render_document(recipes_html, full_css, "Four-Language Cookbook (8.5x8.5 Bleed Print)", "print-bleed")
 
-<!-- Google Fonts -->
-<link rel="preconnect" href="https://fonts.googleapis.com">
-<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-<link href="https://fonts.googleapis.com/css2?family=Bona+Nova:wght@400;700&family=Fraunces:opsz,wght@9..144,400;9..144,600;9..144,700&family=Heebo:wght@400;600;700&family=Noto+Naskh+Arabic:wght@400;600;700&family=Sora:wght@400;600;700&display=swap" rel="stylesheet">
 
-<style>
-{full_css}
-</style>
-</head>
-<body class="print-bleed">
-
-<div class="book">
-{recipes_html}
-</div>
-
-</body>
-</html>
-'''
-
-
-def build_print_bleed(recipes: list[dict], css_content: str) -> None:
-    """Build 8.5x8.5 bleed print version HTML."""
+def build_print_bleed(recipes: list[dict], css_content: str, assets: Optional[Dict[str, str]] = None) -> None:
+    """Build 8.5x8.5 bleed print version HTML (images swapped for prepared print assets if given)."""
     OUTPUT_PRINT_BLEED.mkdir(parents=True, exist_ok=True)
     
-    # Use absolute paths for images in print version
-    html_content = render_html_bleed(recipes, css_content, image_base_path="", use_absolute=True)
-    
-    output_path = OUTPUT_PRINT_BLEED / "full-cookbook-bleed.html"
-    output_path.write_text(html_content, encoding="utf-8")
-    print(f"  ✓ full-cookbook-bleed.html")
+    # Use absolute paths for images in print version; stream one recipe at a time
+    chunks = iter_book_chunks(recipes, "", use_absolute=True, bleed=True, per_recipe=True)
+    pages = write_book_html(
+        OUTPUT_PRINT_BLEED / "full-cookbook-bleed.html", chunks,
+        css_content + "\n" + get_bleed_css(), "Four-Language Cookbook (8.5x8.5 Bleed Print)", "print-bleed",
+        assets=assets,
+    )
+    print(f"  ✓ full-cookbook-bleed.html ({pages} pages)")
 
 
-def build_pdf_bleed(num_recipes: int = 0) -> None:
-    """Generate 8.5x8.5 bleed PDF from HTML using WeasyPrint."""
+def build_pdf_bleed(num_recipes: int = 0, chunks: Optional[list[tuple[str, str, int]]] = None, jobs: int = 1, use_cache: bool = False) -> None:
+    """
+    Generate 8.5x8.5 bleed PDF from HTML using WeasyPrint.
+    
+    Chunked rendering and the fragment cache work as in build_pdf
+    (pass render_pdf_chunks(..., bleed=True)).
+    """
     try:
         from weasyprint import HTML
     except ImportError:
@@ -1720,14 +2158,16 @@ def build_pdf_bleed(num_recipes: int = 0) -> None:
     sys.stdout.flush()  # Force output
     
     try:
-        HTML(filename=str(html_path)).write_pdf(str(pdf_path))
+        cache_dir = PDF_FRAGMENT_CACHE / "print-bleed" if use_cache else None
+        if not (chunks and write_pdf_chunked(chunks, pdf_path, jobs, cache_dir)):
+            HTML(filename=str(html_path)).write_pdf(str(pdf_path))
         print(f"  ✓ full-cookbook-bleed.pdf ({pdf_path.stat().st_size / 1024 / 1024:.1f} MB)")
     except Exception as e:
         print(f"  ❌ Bleed PDF generation failed: {e}")
         raise
 
 
-def build_flipbook_index(recipes: list[dict]) -> None:
+def build_flipbook_index(recipes: list[dict], manifest: Optional[BuildManifest] = None) -> None:
     """Build search index JSON for flipbook."""
     OUTPUT_FLIPBOOK.mkdir(parents=True, exist_ok=True)
     
@@ -1750,10 +2190,18 @@ def build_flipbook_index(recipes: list[dict]) -> None:
     
     # Write search index
     index_path = OUTPUT_FLIPBOOK / "search-index.json"
+    if manifest is not None:
+        key = hash_json(search_data)
+        if manifest.is_fresh("flipbook:search-index", key, index_path):
+            print("  ✓ search-index.json unchanged")
+            return
+    
     with open(index_path, "w", encoding="utf-8") as f:
         json.dump(search_data, f, ensure_ascii=False, indent=2)
     
     print(f"  ✓ search-index.json ({len(recipes)} recipes indexed)")
+    if manifest is not None:
+        manifest.record("flipbook:search-index", key)
 
 
 def main():
@@ -1805,10 +2253,30 @@ def main():
 
 
 if __name__ == "__main__":
+    import os
     import sys
-    web_only = "--web-only" in sys.argv
-    bleed_only = "--bleed-only" in sys.argv
-    print_only = "--print-only" in sys.argv
+    import argparse
+    from contextlib import nullcontext
+    
+    parser = argparse.ArgumentParser(description="Four-Language Cookbook Builder")
+    parser.add_argument("--web-only", action="store_true", help="Build only web pages")
+    parser.add_argument("--print-only", action="store_true", help="Build only 8x8 print PDF")
+    parser.add_argument("--bleed-only", action="store_true", help="Build only 8.5x8.5 bleed PDF")
+    parser.add_argument("--incremental", action="store_true", help="Rebuild only outputs whose inputs changed")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Worker processes for rendering (0 = all cores, default: 1)")
+    parser.add_argument("--no-pdf-cache", action="store_true", help="Lay out every PDF page instead of reusing cached recipe fragments")
+    parser.add_argument("--inline-css", action="store_true", help="Inline cookbook.css into every web page instead of linking a shared stylesheet")
+    parser.add_argument("--original-images", action="store_true", help="Use the original dish and icon PNGs on web pages instead of responsive derivatives and the icon sprite atlas")
+    parser.add_argument("--print-dpi", type=int, default=300, help="Resample PDF images to their printed size at this DPI (0 = embed originals, default: 300)")
+    parser.add_argument("--profile", nargs="?", const=str(BUILD_PROFILE), metavar="JSON", help=f"Time each stage and write a JSON report (default: {BUILD_PROFILE.relative_to(ROOT)})")
+    args = parser.parse_args()
+    
+    web_only = args.web_only
+    bleed_only = args.bleed_only
+    print_only = args.print_only
+    incremental = args.incremental
+    jobs = args.jobs or os.cpu_count() or 1
+    pdf_cache = not args.no_pdf_cache
     
     print("Four-Language Cookbook Builder")
     print("=" * 40)
@@ -1816,40 +2284,99 @@ if __name__ == "__main__":
     print("  --web-only    : Build only web pages")
     print("  --print-only  : Build only 8x8 print PDF")
     print("  --bleed-only  : Build only 8.5x8.5 bleed PDF")
+    print("  --incremental : Rebuild only outputs whose inputs changed")
+    print("  --jobs N      : Render with N worker processes (0 = all cores)")
+    print("  --no-pdf-cache: Re-lay out all PDF pages (ignore cached fragments)")
+    print("  --inline-css  : Inline CSS into each web page (no shared cookbook.<hash>.css)")
+    print("  --original-images: Use original PNGs on web pages (no WebP/AVIF derivatives or icon atlas)")
+    print("  --print-dpi N : Resample PDF images to printed size at N dpi (0 = originals)")
+    print("  --profile     : Time each stage, report bytes written (JSON)")
     print("  (no options)  : Build everything")
     print()
     
+    # --profile: time each stage; without it stages are plain blocks
+    profiler = BuildProfiler(output_dirs()) if args.profile else None
+    
+    def stage(name: str):
+        return profiler.stage(name) if profiler else nullcontext()
+    
     css_content = CSS_FILE.read_text(encoding="utf-8")
-    recipes = load_all_recipes()
+    with stage("load_all_recipes"):
+        recipes = load_all_recipes()
     print(f"Found {len(recipes)} recipe(s)")
     
     if not recipes:
         print("No recipes found.")
         sys.exit(1)
     
+    # Incremental mode: outputs are skipped when their input hashes match the manifest
+    manifest = BuildManifest(BUILD_MANIFEST) if incremental else None
+    print_key = None
+    if manifest and not web_only:
+        print_key = hash_text(print_inputs_key(recipes, css_content, manifest), str(args.print_dpi))
+    
     # Build web (unless only print or bleed requested)
     if not print_only and not bleed_only:
         print("\nBuilding web pages...")
-        build_web(recipes, css_content)
+        with stage("build_web"):
+            build_web(
+                recipes, css_content, manifest, jobs=jobs,
+                external_css=not args.inline_css, responsive_images=not args.original_images,
+            )
+        if manifest:
+            manifest.save()
     
     # Build 8x8 print (unless web-only or bleed-only)
     if not web_only and not bleed_only:
-        print("\nBuilding print version (8x8)...")
-        build_print(recipes, css_content)
-        print("\nBuilding PDF (8x8)...")
-        build_pdf(len(recipes))
+        if manifest and manifest.is_fresh("print", print_key, OUTPUT_PRINT / "full-cookbook.pdf"):
+            print("\n✓ Print version (8x8) unchanged, skipping HTML and PDF")
+        else:
+            print("\nBuilding print version (8x8)...")
+            with stage("prepare_print_assets"):
+                assets = prepare_print_assets(recipes, "print", 8.0, args.print_dpi, jobs) if args.print_dpi else None
+            with stage("build_print"):
+                build_print(recipes, css_content, assets)
+            print("\nBuilding PDF (8x8)...")
+            with stage("render_pdf_chunks"):
+                chunks = render_pdf_chunks(recipes, css_content, per_recipe=pdf_cache, assets=assets) if jobs > 1 or pdf_cache else None
+            with stage("build_pdf"):
+                build_pdf(len(recipes), chunks, jobs, use_cache=pdf_cache)
+            if manifest:
+                manifest.record("print", print_key)
+                manifest.save()
     
     # Build 8.5x8.5 bleed print (unless web-only or print-only)
     if not web_only and not print_only:
-        print("\nBuilding print version (8.5x8.5 bleed)...")
-        build_print_bleed(recipes, css_content)
-        print("\nBuilding PDF (8.5x8.5 bleed)...")
-        build_pdf_bleed(len(recipes))
+        if manifest and manifest.is_fresh("print-bleed", print_key, OUTPUT_PRINT_BLEED / "full-cookbook-bleed.pdf"):
+            print("\n✓ Print version (8.5x8.5 bleed) unchanged, skipping HTML and PDF")
+        else:
+            print("\nBuilding print version (8.5x8.5 bleed)...")
+            with stage("prepare_print_assets_bleed"):
+                assets = prepare_print_assets(recipes, "print-bleed", 8.5, args.print_dpi, jobs) if args.print_dpi else None
+            with stage("build_print_bleed"):
+                build_print_bleed(recipes, css_content, assets)
+            print("\nBuilding PDF (8.5x8.5 bleed)...")
+            with stage("render_pdf_chunks_bleed"):
+                chunks = render_pdf_chunks(recipes, css_content, bleed=True, per_recipe=pdf_cache, assets=assets) if jobs > 1 or pdf_cache else None
+            with stage("build_pdf_bleed"):
+                build_pdf_bleed(len(recipes), chunks, jobs, use_cache=pdf_cache)
+            if manifest:
+                manifest.record("print-bleed", print_key)
+                manifest.save()
     
     # Build flipbook search index (unless only print requested)
     if not print_only and not bleed_only:
         print("\nBuilding flipbook search index...")
-        build_flipbook_index(recipes)
+        with stage("build_flipbook_index"):
+            build_flipbook_index(recipes, manifest)
+    
+    if manifest:
+        manifest.save()
+    
+    if profiler:
+        profiler.print_summary()
+        profiler.write_json(Path(args.profile), recipes=len(recipes), jobs=jobs, incremental=incremental)
+        print(f"\n  Profile written to {args.profile}")
     
     print("\n" + "=" * 40)
     print("Build complete!")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Build Manifest - content hashes for incremental builds.
+
+Stores a SHA-256 hash for every build input (recipe JSON, cookbook.css,
+image index, ingredients matrix, referenced images) together with the
+key each output was last built from. build.py --incremental compares
+keys and only re-renders outputs whose inputs changed.
+
+File hashes are cached by (size, mtime), so unchanged images are not
+re-read on every run.
+"""
+
+import json
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+
+MANIFEST_VERSION = 1
+
+
+def hash_text(*parts: str) -> str:
+    """Hash a sequence of strings into one hex digest."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def hash_json(data: Any) -> str:
+    """Hash JSON-serializable data independent of key order and whitespace."""
+    return hash_text(json.dumps(data, ensure_ascii=False, sort_keys=True))
+
+
+class BuildManifest:
+    """
+    Persistent map of input file hashes and output build keys.
+
+    Usage:
+        manifest = BuildManifest(path)
+        key = hash_text(manifest.file_hash(css_path), ...)
+        if not manifest.is_fresh("page:adafina", key, output_path):
+            ...render...
+            manifest.record("page:adafina", key)
+        manifest.save()
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.outputs: Dict[str, str] = {}
+        self._load()
+
+    def _load(self) -> None:
+        """Load manifest from disk (missing or stale manifest = full rebuild)."""
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if data.get("version") != MANIFEST_VERSION:
+            return
+        self.files = data.get("files", {})
+        self.outputs = data.get("outputs", {})
+
+    def save(self) -> None:
+        """Write manifest to disk."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": MANIFEST_VERSION,
+            "files": dict(sorted(self.files.items())),
+            "outputs": dict(sorted(self.outputs.items())),
+        }
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        tmp_path.replace(self.path)
+
+    def file_hash(self, path: Path) -> str:
+        """
+        Return the SHA-256 of a file, reusing the cached hash if size and
+        mtime are unchanged. Missing files hash to "missing".
+        """
+        path = Path(path)
+        try:
+            stat = path.stat()
+        except OSError:
+            return "missing"
+
+        key = str(path)
+        cached = self.files.get(key)
+        if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+            return cached["sha256"]
+
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(block)
+        digest = h.hexdigest()
+
+        self.files[key] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": digest,
+        }
+        return digest
+
+    def files_hash(self, paths: Iterable[Path]) -> str:
+        """Combined hash of several files (order-sensitive)."""
+        return hash_text(*(f"{p}={self.file_hash(p)}" for p in paths))
+
+    def is_fresh(self, name: str, key: str, output_path: Optional[Path] = None) -> bool:
+        """True if output `name` was last built from `key` and still exists."""
+        if self.outputs.get(name) != key:
+            return False
+        if output_path is not None and not Path(output_path).exists():
+            return False
+        return True
+
+    def record(self, name: str, key: str) -> None:
+        """Record that output `name` is now built from `key`."""
+        self.outputs[name] = key
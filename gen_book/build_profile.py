@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Build Profiler - per-stage timing for build.py --profile and benchmark_build.py.
+
+Each stage records wall time, CPU time (including pool worker processes),
+the process's peak RSS so far, and the files/bytes it wrote under the
+watched output directories (files that are new or whose size/mtime changed).
+The report is plain JSON so results can be compared across commits and
+machines.
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+PROFILE_VERSION = 1
+
+
+def snapshot_files(dirs: Iterable[Path]) -> Dict[str, Tuple[int, int]]:
+    """Map every file under dirs to (size, mtime_ns)."""
+    files = {}
+    for root in dirs:
+        if not Path(root).exists():
+            continue
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files[path] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def cpu_seconds() -> float:
+    """CPU time of this process plus its finished child processes."""
+    if resource is None:
+        return time.process_time()
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MB."""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def machine_info() -> Dict[str, Any]:
+    """Host description stored with every report."""
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+class BuildProfiler:
+    """
+    Collects per-stage measurements.
+
+    Usage:
+        profiler = BuildProfiler([OUTPUT_WEB, OUTPUT_PRINT])
+        with profiler.stage("build_web"):
+            build_web(...)
+        profiler.print_summary()
+        profiler.write_json(path)
+    """
+
+    def __init__(self, watch_dirs: Iterable[Path]):
+        self.watch_dirs = [Path(d) for d in watch_dirs]
+        self.stages: List[Dict[str, Any]] = []
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str, **info: Any) -> Iterator[None]:
+        """Measure the enclosed block as stage `name` (extra info is stored as-is)."""
+        before = snapshot_files(self.watch_dirs)
+        wall_start = time.perf_counter()
+        cpu_start = cpu_seconds()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = cpu_seconds() - cpu_start
+            after = snapshot_files(self.watch_dirs)
+            written = [path for path, meta in after.items() if before.get(path) != meta]
+            self.stages.append({
+                "stage": name,
+                "wall_s": round(wall, 4),
+                "cpu_s": round(cpu, 4),
+                "files_written": len(written),
+                "bytes_written": sum(after[path][0] for path in written),
+                "peak_rss_mb": round(peak_rss_mb(), 1),
+                **info,
+            })
+
+    def report(self, **meta: Any) -> Dict[str, Any]:
+        """Report as a JSON-serializable dict."""
+        return {
+            "version": PROFILE_VERSION,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "machine": machine_info(),
+            **meta,
+            "total_wall_s": round(time.perf_counter() - self.started, 4),
+            "stages": self.stages,
+        }
+
+    def print_summary(self) -> None:
+        """Print a table of stages, slowest first."""
+        total = sum(s["wall_s"] for s in self.stages) or 1.0
+        print(f"\n  {'Stage':<28} {'Wall':>9} {'CPU':>9} {'Share':>6} {'Files':>7} {'Written':>10}")
+        for s in sorted(self.stages, key=lambda s: s["wall_s"], reverse=True):
+            print(
+                f"  {s['stage']:<28} {s['wall_s']:>8.2f}s {s['cpu_s']:>8.2f}s "
+                f"{s['wall_s'] / total:>6.0%} {s['files_written']:>7} {s['bytes_written'] / (1024 * 1024):>8.1f}MB"
+            )
+
+    def write_json(self, path: Path, **meta: Any) -> None:
+        """Write report() to path."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(**meta), f, indent=2)
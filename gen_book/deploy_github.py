@@ -5,9 +5,9 @@ Deploy Silver Cooks Flipbook to GitHub Pages
 This script:
 1. Creates a deployment folder with all necessary files
 2. Copies flipbook files (index.html, JS, CSS)
-3. Copies recipe HTML pages to recipes/
-4. Copies recipe images to images/
-5. Copies ingredient images to images/ingredients/
+3. Copies recipe HTML pages (and their shared cookbook.<hash>.css) to recipes/
+4. Copies recipe images to images/ (responsive WebP/AVIF variants when built)
+5. Copies the ingredient sprite atlas to images/sprites/ (or the icon PNGs to images/ingredients/)
 6. Fixes image paths in HTML files
 7. Generates/updates search-index.json
 8. Optionally commits and pushes to silverdavi/silvercooks repo
@@ -27,6 +27,7 @@ ROOT = Path(__file__).parent.parent
 GEN_BOOK = ROOT / "gen_book"
 FLIPBOOK_SRC = GEN_BOOK / "flipbook"
 WEB_SRC = GEN_BOOK / "output" / "web"
+DERIVATIVES_SRC = GEN_BOOK / "output" / "images"  # responsive variants from build.py
 IMAGES_SRC = ROOT / "data" / "images" / "current"
 INGREDIENTS_SRC = ROOT / "data" / "images" / "ingredients" / "final"
 DEPLOY_DIR = ROOT / "deploy"
@@ -108,6 +109,11 @@ def copy_recipe_pages():
             count += 1
     
     print(f"    ✓ {count} recipe HTML files (paths fixed)")
+    
+    # Shared content-hashed stylesheet linked by the recipe pages
+    for css_file in sorted(WEB_SRC.glob("cookbook.*.css")):
+        shutil.copy(css_file, recipes_dir / css_file.name)
+        print(f"    ✓ {css_file.name}")
 
 
 def fix_image_paths(html_content: str) -> str:
@@ -152,17 +158,38 @@ def fix_image_paths(html_content: str) -> str:
 
 
 def copy_images():
-    """Copy recipe dish images."""
+    """
+    Copy recipe dish images.
+    
+    Responsive variants written by build.py (output/images/derivatives.json)
+    are copied as-is; the original PNG is only shipped for recipes without them.
+    """
     print("\n  Copying dish images...")
     images_dir = DEPLOY_DIR / "images"
     images_dir.mkdir()
     
+    derivatives = {}
+    derivatives_index = DERIVATIVES_SRC / "derivatives.json"
+    if derivatives_index.exists():
+        derivatives = json.loads(derivatives_index.read_text(encoding="utf-8"))
+    
+    variant_count = 0
+    variant_size = 0
+    for entry in derivatives.values():
+        for name in entry["files"]:
+            src = DERIVATIVES_SRC / name
+            shutil.copy(src, images_dir / name)
+            variant_count += 1
+            variant_size += src.stat().st_size
+    if derivatives:
+        print(f"    ✓ {variant_count} responsive variants for {len(derivatives)} dishes ({variant_size / (1024 * 1024):.1f} MB)")
+    
     count = 0
     total_size = 0
     
     if IMAGES_SRC.exists():
         for recipe_folder in sorted(IMAGES_SRC.iterdir()):
-            if recipe_folder.is_dir():
+            if recipe_folder.is_dir() and recipe_folder.name not in derivatives:
                 dish_img = recipe_folder / "dish.png"
                 if dish_img.exists():
                     # Copy with recipe_id as filename
@@ -172,12 +199,28 @@ def copy_images():
                     total_size += dish_img.stat().st_size
     
     size_mb = total_size / (1024 * 1024)
-    print(f"    ✓ {count} dish images ({size_mb:.1f} MB)")
+    print(f"    ✓ {count} original dish images ({size_mb:.1f} MB)")
 
 
 def copy_ingredient_images():
-    """Copy ingredient decoration images."""
+    """
+    Copy ingredient decoration images.
+    
+    If build.py packed the icons into a sprite atlas, pages only reference
+    the atlas, so it is copied instead of the individual PNGs.
+    """
     print("\n  Copying ingredient images...")
+    atlas_manifest = DERIVATIVES_SRC / "sprites" / "ingredients-atlas.json"
+    if atlas_manifest.exists():
+        atlas = json.loads(atlas_manifest.read_text(encoding="utf-8"))
+        sprites_dir = DEPLOY_DIR / "images" / "sprites"
+        sprites_dir.mkdir(parents=True, exist_ok=True)
+        src = atlas_manifest.parent / atlas["image"]
+        shutil.copy(src, sprites_dir / src.name)
+        shutil.copy(atlas_manifest, sprites_dir / atlas_manifest.name)
+        print(f"    ✓ {src.name}: {len(atlas['sprites'])} icons ({src.stat().st_size / (1024 * 1024):.1f} MB)")
+        return
+    
     ingredients_dir = DEPLOY_DIR / "images" / "ingredients"
     ingredients_dir.mkdir(parents=True, exist_ok=True)
     
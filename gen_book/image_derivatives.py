@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Responsive Image Derivatives
+
+Encodes every dish photo for the web at several widths, as AVIF and WebP
+(plus one JPEG fallback) and a tiny placeholder that is inlined as a data
+URI and shown blurred while the real image loads. Recipe pages reference
+them with <picture> / srcset / sizes, so a phone downloads a ~50 KB image
+instead of a 3 MB PNG.
+
+Derivatives are cached by the SHA-256 of the source image and the encoder
+settings: only new or changed photos are re-encoded, in a process pool.
+derivatives.json in the output directory describes what was written.
+
+Requires: Pillow (AVIF needs Pillow >= 11.2 built with libavif;
+without it only WebP + JPEG are written)
+"""
+
+import sys
+import json
+import time
+import base64
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from build_manifest import BuildManifest, hash_json, hash_text
+
+
+# Bump to re-encode everything (e.g. after changing resampling)
+DERIVATIVES_VERSION = "1"
+
+DERIVATIVE_WIDTHS = (400, 800, 1200, 1600)
+FALLBACK_WIDTH = 1200  # JPEG for browsers without <picture> support
+PLACEHOLDER_WIDTH = 16
+QUALITY = {"avif": 50, "webp": 75, "jpeg": 80}
+EXTENSIONS = {"avif": "avif", "webp": "webp", "jpeg": "jpg"}
+MIME_TYPES = {"avif": "image/avif", "webp": "image/webp"}
+
+# Recipe pages are 8in (768 CSS px) wide, or the full viewport on phones
+HERO_SIZES = "(max-width: 768px) 100vw, 768px"
+
+INDEX_FILE = "derivatives.json"
+
+
+def pillow_available() -> bool:
+    """True if Pillow can be imported."""
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def available_formats() -> List[str]:
+    """srcset formats this Pillow build can encode, best compression first."""
+    from PIL import features
+
+    return [fmt for fmt in ("avif", "webp") if features.check(fmt)]
+
+
+def derivative_name(recipe_id: str, width: int, fmt: str) -> str:
+    """Output filename for one variant, e.g. adafina-800.webp."""
+    return f"{recipe_id}-{width}.{EXTENSIONS[fmt]}"
+
+
+def encode_derivatives(recipe_id: str, source_path: str, out_dir: str, formats: List[str], key: str) -> Tuple[str, Dict, float]:
+    """
+    Encode all variants of one source image (runs in a pool worker).
+
+    Returns:
+        (recipe_id, index entry, seconds)
+    """
+    from PIL import Image
+
+    start = time.perf_counter()
+    out_dir = Path(out_dir)
+    with Image.open(source_path) as source:
+        image = source.convert("RGB")
+    width, height = image.size
+
+    widths = [w for w in DERIVATIVE_WIDTHS if w < width] or [width]
+    files = []
+    total_bytes = 0
+
+    def save(img, name: str, fmt: str) -> None:
+        nonlocal total_bytes
+        path = out_dir / name
+        tmp_path = path.with_name(f".{name}.tmp")
+        img.save(tmp_path, format=fmt.upper(), quality=QUALITY[fmt])
+        tmp_path.replace(path)
+        files.append(name)
+        total_bytes += path.stat().st_size
+
+    for w in widths:
+        resized = image.resize((w, round(height * w / width)), Image.LANCZOS)
+        for fmt in formats:
+            save(resized, derivative_name(recipe_id, w, fmt), fmt)
+        if w == min(FALLBACK_WIDTH, widths[-1]):
+            save(resized, derivative_name(recipe_id, w, "jpeg"), "jpeg")
+
+    tiny = image.resize((PLACEHOLDER_WIDTH, max(1, round(height * PLACEHOLDER_WIDTH / width))), Image.BILINEAR)
+    buffer = BytesIO()
+    tiny.save(buffer, format="WEBP", quality=30)
+    placeholder = "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+    entry = {
+        "key": key,
+        "width": width,
+        "height": height,
+        "widths": widths,
+        "formats": formats,
+        "fallback": derivative_name(recipe_id, min(FALLBACK_WIDTH, widths[-1]), "jpeg"),
+        "placeholder": placeholder,
+        "files": files,
+        "bytes": total_bytes,
+    }
+    return recipe_id, entry, time.perf_counter() - start
+
+
+def load_derivatives(out_dir: Path) -> Dict[str, Dict]:
+    """Load derivatives.json ({recipe_id: entry}); empty if never built."""
+    index_path = Path(out_dir) / INDEX_FILE
+    if not index_path.exists():
+        return {}
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def build_derivatives(sources: Dict[str, Path], out_dir: Path, jobs: int = 1) -> Dict[str, Dict]:
+    """
+    Bring out_dir up to date with the given source images.
+
+    Args:
+        sources: {recipe_id: source image path}
+        out_dir: Directory for derivative files and derivatives.json
+        jobs: Number of worker processes for encoding
+
+    Returns:
+        {recipe_id: index entry} for every source
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    formats = available_formats()
+    if "avif" not in formats:
+        print("    ⚠ Pillow has no AVIF support; writing WebP + JPEG only")
+
+    settings = hash_json({
+        "version": DERIVATIVES_VERSION,
+        "widths": DERIVATIVE_WIDTHS,
+        "fallback": FALLBACK_WIDTH,
+        "placeholder": PLACEHOLDER_WIDTH,
+        "quality": QUALITY,
+        "formats": formats,
+    })
+    file_hashes = BuildManifest(out_dir / "source-hashes.json")
+    previous = load_derivatives(out_dir)
+
+    index = {}
+    pending = []
+    for recipe_id, source_path in sorted(sources.items()):
+        key = hash_text(settings, file_hashes.file_hash(source_path))
+        entry = previous.get(recipe_id)
+        if entry and entry.get("key") == key and all((out_dir / name).exists() for name in entry["files"]):
+            index[recipe_id] = entry
+        else:
+            pending.append((recipe_id, source_path, key))
+    file_hashes.save()
+    print(f"    {len(index)} cached, {len(pending)} to encode")
+
+    if pending:
+        start = time.perf_counter()
+        workers = max(1, min(jobs, len(pending)))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(encode_derivatives, recipe_id, str(source_path), str(out_dir), formats, key)
+                for recipe_id, source_path, key in pending
+            ]
+            for future in as_completed(futures):
+                recipe_id, entry, seconds = future.result()
+                index[recipe_id] = entry
+                print(f"    ✓ {recipe_id:<40} {entry['bytes'] // 1024:>5} KB  {seconds:5.1f}s")
+                sys.stdout.flush()
+        print(f"    Encoded {len(pending)} image(s) in {time.perf_counter() - start:.1f}s")
+
+    # Remove variants of deleted recipes and of older encodes
+    used = {name for entry in index.values() for name in entry["files"]}
+    for path in out_dir.iterdir():
+        if path.suffix.lstrip(".") in EXTENSIONS.values() and path.name not in used:
+            path.unlink()
+
+    index = dict(sorted(index.items()))
+    tmp_path = out_dir / f"{INDEX_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=1)
+    tmp_path.replace(out_dir / INDEX_FILE)
+    return index
+
+
+def render_srcset(recipe_id: str, entry: Dict, fmt: str, base_path: str = "") -> str:
+    """srcset attribute value for one format of an index entry."""
+    return ", ".join(
+        f"{base_path}{derivative_name(recipe_id, w, fmt)} {w}w" for w in entry["widths"]
+    )
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Chunked PDF Engine
+
+Lays out parts of the book (front matter, TOC, then one chunk per category
+or per recipe) as separate WeasyPrint documents in a process pool, then merges the chunk
+PDFs in order into one file.
+
+Page numbers are printed from the HTML (each <section class="page"> carries
+its own number) and recto/verso classes are assigned from global page
+positions before chunking, so merged output matches a single-pass render.
+Each worker only holds one chunk in memory.
+
+With a cache directory, each chunk's PDF is kept as a fragment keyed by its
+full HTML document (which contains the CSS, printed page numbers and
+recto/verso classes) plus the content hashes of the images it references.
+Unchanged chunks are spliced from the cache without being laid out again.
+
+Requires: weasyprint, pypdf
+"""
+
+import re
+import sys
+import time
+import shutil
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from build_manifest import BuildManifest, hash_text
+
+
+# Bump to invalidate every cached fragment (e.g. after changing how chunks are rendered)
+FRAGMENT_CACHE_VERSION = "1"
+
+
+def pdf_engine_available() -> bool:
+    """True if both WeasyPrint and pypdf can be imported."""
+    try:
+        import weasyprint  # noqa: F401
+        import pypdf  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def render_chunk_pdf(name: str, html_string: str, pdf_path: str, expected_pages: int) -> Tuple[str, int, float]:
+    """
+    Lay out one chunk and write it to pdf_path (runs in a pool worker).
+
+    Returns:
+        (name, page_count, seconds)
+    """
+    from weasyprint import HTML
+
+    start = time.perf_counter()
+    document = HTML(string=html_string, base_url=str(Path(pdf_path).parent)).render()
+    # Write to a temp file first so an interrupted run never leaves a
+    # truncated fragment in the cache
+    tmp_path = Path(f"{pdf_path}.tmp")
+    document.write_pdf(str(tmp_path))
+    tmp_path.replace(pdf_path)
+    elapsed = time.perf_counter() - start
+
+    page_count = len(document.pages)
+    if expected_pages and page_count != expected_pages:
+        # An overflowing section would shift every later page number and parity
+        print(f"    ⚠ {name}: {page_count} pages laid out, expected {expected_pages}")
+    return name, page_count, elapsed
+
+
+def merge_pdfs(chunk_paths: List[Path], pdf_path: Path) -> int:
+    """
+    Concatenate chunk PDFs in order. Returns total page count.
+
+    Every chunk embeds its own copy of shared resources (ingredient icons,
+    fonts); identical objects are collapsed so each is stored once.
+    """
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for chunk_path in chunk_paths:
+        writer.append(str(chunk_path))
+    writer.compress_identical_objects(remove_identicals=True, remove_orphans=True)
+    page_count = len(writer.pages)
+    with open(pdf_path, "wb") as f:
+        writer.write(f)
+    return page_count
+
+
+def fragment_key(html_string: str, file_hashes: BuildManifest) -> str:
+    """
+    Cache key for a chunk: the full HTML document plus the content hash of
+    every local image it references and the WeasyPrint version.
+    """
+    import weasyprint
+
+    image_paths = sorted(set(re.findall(r'src="(?:file://)?(/[^"]+)"', html_string)))
+    return hash_text(
+        FRAGMENT_CACHE_VERSION,
+        weasyprint.__version__,
+        html_string,
+        *(f"{p}={file_hashes.file_hash(Path(p))}" for p in image_paths),
+    )
+
+
+def write_chunked_pdf(
+    chunks: List[Tuple[str, str, int]],
+    pdf_path: Path,
+    jobs: int = 1,
+    cache_dir: Optional[Path] = None,
+) -> None:
+    """
+    Render chunk documents in parallel and merge them into pdf_path.
+
+    Args:
+        chunks: (name, full HTML document, expected page count) in book order
+        pdf_path: Final PDF path
+        jobs: Number of worker processes
+        cache_dir: If given, keep chunk PDFs here as fragments keyed by
+                   fragment_key() and only lay out chunks that are missing.
+                   Fragments not used by this build are removed.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    if cache_dir is not None:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        file_hashes = BuildManifest(cache_dir / "image-hashes.json")
+        chunk_paths = [cache_dir / f"{fragment_key(html_string, file_hashes)}.pdf" for _, html_string, _ in chunks]
+        file_hashes.save()
+    else:
+        chunk_dir = pdf_path.parent / f".{pdf_path.stem}-chunks"
+        chunk_dir.mkdir(parents=True, exist_ok=True)
+        chunk_paths = [chunk_dir / f"{i:03d}.pdf" for i in range(len(chunks))]
+
+    pending = [
+        (chunk, path) for chunk, path in zip(chunks, chunk_paths)
+        if cache_dir is None or not path.exists()
+    ]
+    if cache_dir is not None:
+        print(f"    {len(chunks) - len(pending)} cached fragment(s), {len(pending)} to lay out")
+
+    start = time.perf_counter()
+    timings = {}
+    if pending:
+        workers = max(1, min(jobs, len(pending)))
+        print(f"    Laying out {len(pending)} chunks with {workers} processes...")
+        sys.stdout.flush()
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(render_chunk_pdf, name, html_string, str(path), expected): name
+                for (name, html_string, expected), path in pending
+            }
+            for future in as_completed(futures):
+                name, pages, seconds = future.result()
+                timings[name] = (pages, seconds)
+                print(f"    ✓ {name:<36} {pages:>4} pages  {seconds:6.1f}s")
+                sys.stdout.flush()
+
+    total_pages = merge_pdfs(chunk_paths, pdf_path)
+
+    if cache_dir is not None:
+        used = {path.name for path in chunk_paths}
+        for stale in cache_dir.glob("*.pdf"):
+            if stale.name not in used:
+                stale.unlink()
+    else:
+        shutil.rmtree(chunk_dir, ignore_errors=True)
+
+    wall = time.perf_counter() - start
+    cpu = sum(seconds for _, seconds in timings.values())
+    print(f"    Merged {total_pages} pages: {wall:.1f}s wall, {cpu:.1f}s total layout")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Print Assets
+
+Prepares the images referenced by the print and bleed books at the
+resolution they are actually printed at, instead of handing WeasyPrint the
+full-size sources:
+
+- Dish photos fill the page (8in, or 8.5in with bleed): resampled to
+  page size × DPI and re-encoded as JPEG.
+- Ingredient icons (1024px RGBA PNGs, ~750 KB each) are printed at most
+  2.3in (2.0in corner icons at up to 1.15 scale): resampled once to that
+  size and palette-quantized PNG (alpha preserved). Title page icons use
+  the same file, so each distinct icon is a single image in the PDF.
+
+Assets are keyed by source hash, size and settings and only re-encoded
+when one of those changes (in a process pool). rewrite_asset_paths()
+points rendered print HTML at the prepared files.
+
+Requires: Pillow
+"""
+
+import re
+import sys
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from build_manifest import BuildManifest, hash_json, hash_text
+
+
+# Bump to re-encode everything (e.g. after changing resampling)
+PRINT_ASSETS_VERSION = "1"
+
+DEFAULT_DPI = 300
+PHOTO_QUALITY = 85
+ICON_COLORS = 256
+ICON_MAX_INCHES = 2.3
+
+INDEX_FILE = "print-assets.json"
+
+
+def pillow_available() -> bool:
+    """True if Pillow can be imported."""
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def asset_name(source: Path, kind: str, pixels: int) -> str:
+    """
+    Output filename, e.g. adafina-2400.jpg (curated photo current/adafina/dish.png),
+    adafina_dish-2400.jpg (generated/adafina_dish.png) or chickpeas-690.png (icon).
+    """
+    if kind == "photo":
+        # Curated photos are all named dish.png, one directory per recipe
+        recipe = source.parent.name if source.stem == "dish" else source.stem
+        return f"{recipe}-{pixels}.jpg"
+    return f"{source.stem}-{pixels}.png"
+
+
+def encode_asset(source_path: str, out_path: str, kind: str, pixels: int) -> Tuple[str, int, int, float]:
+    """
+    Resample one image to at most `pixels` on its longest side and encode
+    it for print (runs in a pool worker). Images are never upscaled.
+
+    Returns:
+        (out_path, source bytes, output bytes, seconds)
+    """
+    from PIL import Image
+
+    start = time.perf_counter()
+    with Image.open(source_path) as source:
+        image = source.convert("RGB" if kind == "photo" else "RGBA")
+    if max(image.size) > pixels:
+        ratio = pixels / max(image.size)
+        image = image.resize((round(image.width * ratio), round(image.height * ratio)), Image.LANCZOS)
+
+    out_path = Path(out_path)
+    tmp_path = out_path.with_name(f".{out_path.name}.tmp")
+    if kind == "photo":
+        image.save(tmp_path, format="JPEG", quality=PHOTO_QUALITY, optimize=True)
+    else:
+        image = image.quantize(colors=ICON_COLORS, method=Image.Quantize.FASTOCTREE)
+        image.save(tmp_path, format="PNG", optimize=True)
+    tmp_path.replace(out_path)
+
+    return str(out_path), Path(source_path).stat().st_size, out_path.stat().st_size, time.perf_counter() - start
+
+
+def build_print_assets(
+    photos: Dict[str, float],
+    icons: List[Path],
+    out_dir: Path,
+    dpi: int = DEFAULT_DPI,
+    jobs: int = 1,
+) -> Dict[str, str]:
+    """
+    Bring out_dir up to date with print-resolution copies of the given images.
+
+    Args:
+        photos: {source path: printed size in inches}
+        icons: Ingredient icon source paths
+        out_dir: Directory for prepared assets and the asset index
+        dpi: Print resolution
+        jobs: Number of worker processes for encoding
+
+    Returns:
+        {source path: prepared asset path} for every image
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    settings = hash_json({
+        "version": PRINT_ASSETS_VERSION,
+        "photo_quality": PHOTO_QUALITY,
+        "icon_colors": ICON_COLORS,
+    })
+    file_hashes = BuildManifest(out_dir / "source-hashes.json")
+    index_path = out_dir / INDEX_FILE
+    previous = json.loads(index_path.read_text(encoding="utf-8")) if index_path.exists() else {}
+
+    wanted = [(Path(p), "photo", round(inches * dpi)) for p, inches in sorted(photos.items())]
+    wanted += [(Path(p), "icon", round(ICON_MAX_INCHES * dpi)) for p in sorted(icons)]
+
+    index = {}
+    asset_map = {}
+    pending = []
+    for source, kind, pixels in wanted:
+        if not source.exists():
+            continue
+        name = asset_name(source, kind, pixels)
+        key = hash_text(settings, kind, str(pixels), file_hashes.file_hash(source))
+        index[name] = key
+        asset_map[str(source)] = str(out_dir / name)
+        if previous.get(name) != key or not (out_dir / name).exists():
+            pending.append((source, out_dir / name, kind, pixels))
+    file_hashes.save()
+    print(f"    {len(index) - len(pending)} cached, {len(pending)} to encode ({dpi} dpi)")
+
+    if pending:
+        start = time.perf_counter()
+        source_bytes = output_bytes = 0
+        workers = max(1, min(jobs, len(pending)))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(encode_asset, str(source), str(out_path), kind, pixels)
+                for source, out_path, kind, pixels in pending
+            ]
+            for future in as_completed(futures):
+                _, src_size, out_size, _ = future.result()
+                source_bytes += src_size
+                output_bytes += out_size
+        print(f"    Encoded {len(pending)} image(s) in {time.perf_counter() - start:.1f}s: "
+              f"{source_bytes / (1024 * 1024):.1f} MB → {output_bytes / (1024 * 1024):.1f} MB")
+        sys.stdout.flush()
+
+    # Remove assets no longer referenced (deleted images, other DPI)
+    for path in out_dir.iterdir():
+        if path.suffix in (".jpg", ".png") and path.name not in index:
+            path.unlink()
+
+    tmp_path = out_dir / f"{INDEX_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(index.items())), f, indent=1)
+    tmp_path.replace(index_path)
+    return asset_map
+
+
+def rewrite_asset_paths(html_string: str, asset_map: Dict[str, str]) -> str:
+    """Point src="..." / src="file://..." image references at prepared assets."""
+    def replace(match: re.Match) -> str:
+        prefix, path = match.group(1) or "", match.group(2)
+        return f'src="{prefix}{asset_map.get(path, path)}"'
+
+    return re.sub(r'src="(file://)?(/[^"]+)"', replace, html_string)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Print Fonts
+
+Local copies of the Google Fonts the book uses, for the chunked PDF engine.
+
+Every chunk document is laid out by WeasyPrint on its own, so with the
+remote fonts.googleapis.com stylesheet in each chunk's head, a cold build
+fetched and parsed the font CSS and font files once per chunk (~90 times per
+book). local_font_css() downloads the stylesheet and its font files once
+into a directory and returns @font-face rules that point at the local files;
+later chunks and builds read them from disk.
+
+Offline, or if a download fails, it returns None and the chunks keep the
+remote stylesheet.
+"""
+
+import re
+import urllib.request
+from pathlib import Path
+from typing import Optional
+
+from build_manifest import hash_text
+
+
+# WeasyPrint can't use woff2; Google Fonts serves TrueType to unknown user agents
+USER_AGENT = "WeasyPrint"
+FONT_URL = re.compile(r"url\((https://[^)]+)\)")
+TIMEOUT = 30  # seconds per download
+
+
+def _download(url: str) -> bytes:
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    with urllib.request.urlopen(request, timeout=TIMEOUT) as response:
+        return response.read()
+
+
+def local_font_css(css_url: str, font_dir: Path) -> Optional[str]:
+    """
+    @font-face rules for a Google Fonts stylesheet, pointing at local copies
+    of its font files (downloaded on first use).
+
+    Args:
+        css_url: fonts.googleapis.com stylesheet URL
+        font_dir: Where the stylesheet and font files are kept
+
+    Returns:
+        CSS text with file:// font URLs, or None if it couldn't be downloaded
+    """
+    css_path = font_dir / f"{hash_text(css_url)[:16]}.css"
+    if css_path.exists():
+        return css_path.read_text(encoding="utf-8")
+
+    try:
+        css = _download(css_url).decode("utf-8")
+        font_dir.mkdir(parents=True, exist_ok=True)
+        for url in sorted(set(FONT_URL.findall(css))):
+            font_path = font_dir / f"{hash_text(url)[:16]}{Path(url).suffix or '.ttf'}"
+            if not font_path.exists():
+                tmp_path = font_path.with_name(font_path.name + ".tmp")
+                tmp_path.write_bytes(_download(url))
+                tmp_path.replace(font_path)
+            css = css.replace(f"url({url})", f"url({font_path.resolve().as_uri()})")
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"    ⚠ Could not download print fonts ({str(e)[:80]}); chunks load them from Google Fonts")
+        return None
+
+    tmp_path = css_path.with_name(css_path.name + ".tmp")
+    tmp_path.write_text(css, encoding="utf-8")
+    tmp_path.replace(css_path)
+    return css
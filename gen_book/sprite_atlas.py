@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Ingredient Sprite Atlas
+
+Packs the ingredient icons (data/images/ingredients/final/*.png, ~750 KB
+each) into one WebP sprite sheet for the web pages. Corner decorations and
+the title page background become elements with a CSS background offset
+into the atlas, so a page fetches one small, cacheable image instead of up
+to 96 separate PNGs.
+
+Icons are placed on a square grid, each centered in its cell with a
+transparent gutter so scaling never bleeds a neighbor into view. Because
+every cell has the same size, an icon is addressed with percentages
+(background-size: cols×100% rows×100%) and renders at any element size.
+
+The atlas filename carries a hash of its inputs (cacheable forever); the
+JSON manifest next to it lists each icon's rectangle.
+
+Requires: Pillow
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from build_manifest import BuildManifest, hash_json, hash_text
+
+
+# Bump to rebuild the atlas (e.g. after changing packing)
+ATLAS_VERSION = "1"
+
+CELL_PX = 256      # 2in corner icons at 1x DPR are ~192 CSS px
+GUTTER_PX = 4      # transparent border inside each cell
+COLUMNS = 10
+QUALITY = 80
+ALPHA_QUALITY = 70  # icons are drawn at 15-35% opacity, edge loss is invisible
+
+MANIFEST_FILE = "ingredients-atlas.json"
+
+
+def pillow_available() -> bool:
+    """True if Pillow can be imported."""
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def load_atlas(out_dir: Path) -> Optional[Dict]:
+    """Load the atlas manifest, or None if no atlas has been built."""
+    manifest_path = Path(out_dir) / MANIFEST_FILE
+    if not manifest_path.exists():
+        return None
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            atlas = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return atlas if (Path(out_dir) / atlas["image"]).exists() else None
+
+
+def build_atlas(icons: List[Path], out_dir: Path) -> Dict:
+    """
+    Pack icons into out_dir/ingredients.<hash>.webp (skipped if unchanged).
+
+    Args:
+        icons: Icon source paths; sprites are keyed by filename
+        out_dir: Directory for the atlas image and manifest
+
+    Returns:
+        Atlas manifest: image name, grid size and per-icon rectangles
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    icons = sorted(icons, key=lambda p: p.name)
+    file_hashes = BuildManifest(out_dir / "source-hashes.json")
+    key = hash_text(
+        hash_json({"version": ATLAS_VERSION, "cell": CELL_PX, "gutter": GUTTER_PX, "columns": COLUMNS, "quality": QUALITY, "alpha_quality": ALPHA_QUALITY}),
+        *(f"{icon.name}={file_hashes.file_hash(icon)}" for icon in icons),
+    )
+    file_hashes.save()
+
+    image_name = f"ingredients.{key[:10]}.webp"
+    existing = load_atlas(out_dir)
+    if existing and existing["image"] == image_name:
+        print(f"    ✓ {image_name} unchanged ({len(existing['sprites'])} icons)")
+        return existing
+
+    from PIL import Image
+
+    start = time.perf_counter()
+    columns = min(COLUMNS, len(icons)) or 1
+    rows = (len(icons) + columns - 1) // columns or 1
+    sheet = Image.new("RGBA", (columns * CELL_PX, rows * CELL_PX), (0, 0, 0, 0))
+    inner = CELL_PX - 2 * GUTTER_PX
+
+    sprites = {}
+    for i, icon in enumerate(icons):
+        col, row = i % columns, i // columns
+        with Image.open(icon) as source:
+            image = source.convert("RGBA")
+        image.thumbnail((inner, inner), Image.LANCZOS)
+        x = col * CELL_PX + (CELL_PX - image.width) // 2
+        y = row * CELL_PX + (CELL_PX - image.height) // 2
+        sheet.paste(image, (x, y))
+        sprites[icon.name] = {"col": col, "row": row, "x": col * CELL_PX, "y": row * CELL_PX, "w": CELL_PX, "h": CELL_PX}
+
+    tmp_path = out_dir / f".{image_name}.tmp"
+    sheet.save(tmp_path, format="WEBP", quality=QUALITY, alpha_quality=ALPHA_QUALITY)
+    tmp_path.replace(out_dir / image_name)
+
+    for old in out_dir.glob("ingredients.*.webp"):
+        if old.name != image_name:
+            old.unlink()
+
+    atlas = {
+        "image": image_name,
+        "cell": CELL_PX,
+        "columns": columns,
+        "rows": rows,
+        "width": sheet.width,
+        "height": sheet.height,
+        "sprites": sprites,
+    }
+    tmp_path = out_dir / f"{MANIFEST_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(atlas, f, indent=1)
+    tmp_path.replace(out_dir / MANIFEST_FILE)
+
+    size_kb = (out_dir / image_name).stat().st_size // 1024
+    print(f"    ✓ {image_name}: {len(icons)} icons, {sheet.width}x{sheet.height}, {size_kb} KB ({time.perf_counter() - start:.1f}s)")
+    return atlas
+
+
+def sprite_style(atlas: Dict, icon_name: str, base_path: str = "") -> Optional[str]:
+    """
+    Inline CSS that shows one icon from the atlas at the element's size,
+    or None if the icon is not in the atlas.
+    """
+    sprite = atlas["sprites"].get(icon_name)
+    if sprite is None:
+        return None
+    columns, rows = atlas["columns"], atlas["rows"]
+    pos_x = sprite["col"] * 100 / (columns - 1) if columns > 1 else 0
+    pos_y = sprite["row"] * 100 / (rows - 1) if rows > 1 else 0
+    return (
+        f"background-image: url({base_path}{atlas['image']}); "
+        f"background-size: {columns * 100}% {rows * 100}%; "
+        f"background-position: {pos_x:.4g}% {pos_y:.4g}%;"
+    )
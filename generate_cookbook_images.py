@@ -31,11 +31,14 @@ Usage:
 
 import os
 import re
-import sys
 from pathlib import Path
 from typing import Optional, List, Dict, Tuple
 from dotenv import load_dotenv
 
+from llm_clients import genai_client, genai_types, perplexity_client
+from llm_telemetry import telemetry
+from artifact_writer import atomic_save, write_json
+
 # Load environment variables
 load_dotenv()
 
@@ -445,23 +448,9 @@ class DishResearcher:
         self.cache_dir.mkdir(parents=True, exist_ok=True)
     
     def _get_client(self):
-        """Lazy load the Perplexity client."""
+        """The process-wide Perplexity client (llm_clients.py)."""
         if self._client is None:
-            try:
-                from perplexipy import PerplexityClient
-            except ImportError:
-                print("❌ PerplexiPy package not installed.")
-                print("Install with: pip install perplexipy")
-                sys.exit(1)
-            
-            api_key = os.getenv('PERPLEXITY_API_KEY')
-            if not api_key or api_key == 'your_perplexity_api_key_here':
-                raise ValueError(
-                    "PERPLEXITY_API_KEY not found in environment. "
-                    "Please set it in your .env file."
-                )
-            
-            self._client = PerplexityClient(key=api_key)
+            self._client = perplexity_client()
         
         return self._client
     
@@ -486,9 +475,7 @@ class DishResearcher:
         """Save research to cache."""
         cache_path = self._get_cache_path(dish_name)
         try:
-            import json
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(research, f, indent=2, ensure_ascii=False)
+            write_json(cache_path, research)
         except Exception as e:
             print(f"⚠️  Warning: Could not save cache for {dish_name}: {e}")
     
@@ -521,7 +508,8 @@ Focus on how it appears when served, not just ingredients.
         
         try:
             client = self._get_client()
-            response = client.query(query)
+            with telemetry.track("perplexity", stage="research"):
+                response = client.query(query)
             
             # Parse response to extract key information
             research = self._parse_research_response(dish_name, response, description)
@@ -725,7 +713,6 @@ class CookbookImageGenerator:
                        Defaults to data/images/generated
         """
         self._client = None
-        self._genai = None
         self._types = None
         self._researcher = None
         
@@ -793,26 +780,10 @@ Humble, sturdy furniture. A modest Jewish home, well-loved and lived-in."""
         return scene
         
     def _get_client(self):
-        """Lazy load the genai client."""
+        """The process-wide genai client (llm_clients.py), shared with the other scripts."""
         if self._client is None:
-            try:
-                from google import genai
-                from google.genai import types
-                self._genai = genai
-                self._types = types
-            except ImportError:
-                print("❌ google-genai package not installed.")
-                print("Install with: pip install google-genai")
-                sys.exit(1)
-            
-            api_key = os.getenv('GOOGLE_API_KEY') or os.getenv('GEMINI_API_KEY')
-            if not api_key or api_key in ('your_google_api_key_here', 'your_gemini_api_key_here'):
-                raise ValueError(
-                    "GOOGLE_API_KEY or GEMINI_API_KEY not found in environment. "
-                    "Please set it in your .env file."
-                )
-            
-            self._client = genai.Client(api_key=api_key)
+            self._client = genai_client()
+            self._types = genai_types()
         
         return self._client
     
@@ -1462,17 +1433,18 @@ high-end cookbook quality, 8K detail, photorealistic."""
         print(f"   Prompt preview: {prompt[:100]}...")
         
         try:
-            response = client.models.generate_content(
-                model=self.MODEL,
-                contents=[prompt],
-                config=types.GenerateContentConfig(
-                    response_modalities=['TEXT', 'IMAGE'],
-                    image_config=types.ImageConfig(
-                        aspect_ratio=self.ASPECT_RATIO,
-                        image_size=self.RESOLUTION
-                    ),
+            with telemetry.track(self.MODEL, stage="images") as call:
+                response = call.response = client.models.generate_content(
+                    model=self.MODEL,
+                    contents=[prompt],
+                    config=types.GenerateContentConfig(
+                        response_modalities=['TEXT', 'IMAGE'],
+                        image_config=types.ImageConfig(
+                            aspect_ratio=self.ASPECT_RATIO,
+                            image_size=self.RESOLUTION
+                        ),
+                    )
                 )
-            )
             
             # Process response
             image_saved = False
@@ -1480,8 +1452,7 @@ high-end cookbook quality, 8K detail, photorealistic."""
                 if part.text is not None:
                     print(f"   Model note: {part.text[:100]}...")
                 elif image := part.as_image():
-                    save_path.parent.mkdir(parents=True, exist_ok=True)
-                    image.save(str(save_path))
+                    atomic_save(image.save, save_path)
                     image_saved = True
                     print(f"✅ Image saved: {save_path}")
             
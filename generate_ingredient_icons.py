@@ -5,7 +5,7 @@ Ingredient Icon Generator
 Generates abstract flowing geometric representations of cooking ingredients
 using Gemini 3 Pro Image generation, then removes backgrounds with rembg.
 
-Uses 40 parallel workers for fast generation.
+Up to 40 concurrent requests, adapting to the quota (see gemini_async.py).
 
 Usage:
     python generate_ingredient_icons.py
@@ -20,16 +20,23 @@ import asyncio
 import hashlib
 from pathlib import Path
 from typing import List, Optional, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 import threading
 
+from gemini_async import GeminiRequestLayer, iter_completed
+from llm_clients import genai_client, genai_types
+from llm_telemetry import telemetry
+from artifact_writer import atomic_save
+
 # Load environment variables
 load_dotenv()
 
-# Number of parallel workers
+# Maximum concurrent Gemini requests
 MAX_WORKERS = 40
 
+# Adaptive concurrency + backoff for all Gemini calls
+gemini = GeminiRequestLayer(max_concurrency=MAX_WORKERS, stage="icons")
+
 # Thread-safe counter for progress
 progress_lock = threading.Lock()
 completed_count = 0
@@ -143,7 +150,6 @@ class IngredientIconGenerator:
                        Defaults to data/images/ingredients
         """
         self._client = None
-        self._genai = None
         self._types = None
         self._rembg_session = None
         
@@ -160,26 +166,10 @@ class IngredientIconGenerator:
         (self.output_dir / "final").mkdir(parents=True, exist_ok=True)
     
     def _get_client(self):
-        """Lazy load the genai client."""
+        """The process-wide genai client (llm_clients.py), shared with the other scripts."""
         if self._client is None:
-            try:
-                from google import genai
-                from google.genai import types
-                self._genai = genai
-                self._types = types
-            except ImportError:
-                print("❌ google-genai package not installed.")
-                print("Install with: pip install google-genai")
-                sys.exit(1)
-            
-            api_key = os.getenv('GOOGLE_API_KEY')
-            if not api_key or api_key == 'your_google_api_key_here':
-                raise ValueError(
-                    "GOOGLE_API_KEY not found in environment. "
-                    "Please set it in your .env file."
-                )
-            
-            self._client = genai.Client(api_key=api_key)
+            self._client = genai_client()
+            self._types = genai_types()
         
         return self._client
     
@@ -212,7 +202,7 @@ class IngredientIconGenerator:
             safe = safe.replace("__", "_")
         return safe
     
-    def generate_icon(self, ingredient: str, force: bool = False) -> Tuple[bool, str]:
+    async def generate_icon(self, ingredient: str, force: bool = False) -> Tuple[bool, str]:
         """
         Generate an abstract icon for a single ingredient.
         
@@ -244,7 +234,7 @@ class IngredientIconGenerator:
             prompt = generate_ingredient_prompt(ingredient)
             
             # Generate image
-            response = client.models.generate_content(
+            response = await gemini.call(lambda: client.aio.models.generate_content(
                 model=self.MODEL,
                 contents=[prompt],
                 config=types.GenerateContentConfig(
@@ -253,7 +243,7 @@ class IngredientIconGenerator:
                         aspect_ratio=self.ASPECT_RATIO,
                     ),
                 )
-            )
+            ), model=self.MODEL)
             
             # Save raw image
             image_saved = False
@@ -261,7 +251,7 @@ class IngredientIconGenerator:
                 if hasattr(part, 'as_image'):
                     image = part.as_image()
                     if image:
-                        image.save(str(raw_path))
+                        await asyncio.to_thread(atomic_save, image.save, raw_path)
                         image_saved = True
                         break
             
@@ -272,7 +262,7 @@ class IngredientIconGenerator:
                 return False, f"{progress} ❌ No image generated: {ingredient}"
             
             # Remove background using rembg
-            self._remove_background(raw_path, final_path)
+            await asyncio.to_thread(self._remove_background, raw_path, final_path)
             
             with progress_lock:
                 completed_count += 1
@@ -317,7 +307,7 @@ class IngredientIconGenerator:
             output_image = Image.fromarray(data, 'RGBA')
             
             # Save with transparent background
-            output_image.save(output_path, format='PNG')
+            atomic_save(lambda path: output_image.save(path, format='PNG'), output_path)
             
         except Exception as e:
             # Fallback to rembg if simple white removal fails
@@ -327,61 +317,58 @@ class IngredientIconGenerator:
                 
                 input_image = Image.open(input_path)
                 output_image = remove(input_image, session=self._get_rembg_session())
-                output_image.save(output_path, format='PNG')
+                atomic_save(lambda path: output_image.save(path, format='PNG'), output_path)
             except Exception as e2:
                 # If all fails, just copy the original
                 import shutil
-                shutil.copy(input_path, output_path)
+                atomic_save(lambda path: shutil.copy(input_path, path), output_path)
                 print(f"⚠️  Background removal failed for {input_path.name}: {e2}")
     
     def generate_all(self, ingredients: List[str], force: bool = False, max_workers: int = MAX_WORKERS):
         """
-        Generate icons for all ingredients in parallel.
+        Generate icons for all ingredients concurrently.
         
         Args:
             ingredients: List of ingredient names
             force: Force regeneration even if files exist
-            max_workers: Number of parallel workers
+            max_workers: Maximum concurrent Gemini requests
         """
         global completed_count, total_count
         completed_count = 0
         total_count = len(ingredients)
         
-        print(f"\n🎨 Generating {total_count} ingredient icons with {max_workers} parallel workers...")
+        print(f"\n🎨 Generating {total_count} ingredient icons with up to {max_workers} concurrent requests...")
         print(f"📁 Output directory: {self.output_dir}")
         print("=" * 60)
         
         results = {"success": 0, "skipped": 0, "failed": 0}
         failed_ingredients = []
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all tasks
-            future_to_ingredient = {
-                executor.submit(self.generate_icon, ingredient, force): ingredient
-                for ingredient in ingredients
-            }
-            
+        gemini.set_max_concurrency(max_workers)
+        
+        async def run():
             # Process results as they complete
-            for future in as_completed(future_to_ingredient):
-                ingredient = future_to_ingredient[future]
-                try:
-                    success, message = future.result()
-                    print(message)
-                    
-                    if success:
-                        if "Skipped" in message:
-                            results["skipped"] += 1
-                        else:
-                            results["success"] += 1
+            async for ingredient, result, error in iter_completed(lambda i: self.generate_icon(i, force), ingredients):
+                if error is not None:
+                    print(f"❌ Exception ({ingredient}): {error}")
+                    results["failed"] += 1
+                    failed_ingredients.append(ingredient)
+                    continue
+                
+                success, message = result
+                print(message)
+                
+                if success:
+                    if "Skipped" in message:
+                        results["skipped"] += 1
                     else:
-                        results["failed"] += 1
-                        failed_ingredients.append(ingredient)
-                        
-                except Exception as e:
-                    print(f"❌ Exception ({ingredient}): {e}")
+                        results["success"] += 1
+                else:
                     results["failed"] += 1
                     failed_ingredients.append(ingredient)
         
+        asyncio.run(run())
+        
         # Print summary
         print("\n" + "=" * 60)
         print("📊 SUMMARY")
@@ -389,6 +376,9 @@ class IngredientIconGenerator:
         print(f"✅ Generated: {results['success']}")
         print(f"⏭️  Skipped (already exist): {results['skipped']}")
         print(f"❌ Failed: {results['failed']}")
+        print(f"📡 Gemini: {gemini.summary()}")
+        if telemetry.records:
+            print(telemetry.report())
         
         if failed_ingredients:
             print(f"\n❌ Failed ingredients:")
@@ -451,7 +441,7 @@ def main():
         "--workers",
         type=int,
         default=MAX_WORKERS,
-        help=f"Number of parallel workers (default: {MAX_WORKERS})"
+        help=f"Maximum concurrent Gemini requests, adapts below this (default: {MAX_WORKERS})"
     )
     parser.add_argument(
         "--output-dir",
@@ -463,7 +453,7 @@ def main():
     # Handle single ingredient
     if args.ingredient:
         gen = IngredientIconGenerator(output_dir=args.output_dir)
-        success, message = gen.generate_icon(args.ingredient, force=args.force)
+        success, message = asyncio.run(gen.generate_icon(args.ingredient, force=args.force))
         print(message)
         return 0 if success else 1
     
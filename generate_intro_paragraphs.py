@@ -13,22 +13,30 @@ Uses Gemini 3 Pro Preview exclusively (no fallbacks).
 import os
 import sys
 import json
-import time
-import re
+import asyncio
 from pathlib import Path
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from threading import Lock
 
 load_dotenv()
 
 import google.generativeai as genai
 
+from gemini_async import GeminiRequestLayer, iter_completed
+from llm_clients import generative_model
+from llm_cache import ResponseCache, request_key
+from pipeline_journal import PipelineJournal
+from pipeline_state import PipelineState
+from artifact_writer import write_json
+from llm_telemetry import telemetry
+from prompt_prefix import compact_json
+from request_packing import estimate_tokens, index_by_id, pack_items
+from structured_output import repair_json, response_text
+
 # ============================================================================
 # CONFIGURATION - NEVER CHANGE MODEL
 # ============================================================================
 GEMINI_MODEL = "gemini-3-pro-preview"
-genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
 
 # Paths
 CANONICAL_DIR = Path("data/recipes_canonical")
@@ -37,6 +45,22 @@ CANONICAL_DIR = Path("data/recipes_canonical")
 _progress_lock = Lock()
 _progress_count = 0
 
+# Accepted Gemini responses, reused on identical reruns (see llm_cache.py)
+response_cache = ResponseCache()
+
+# Adaptive concurrency + backoff for all Gemini calls (see gemini_async.py)
+gemini = GeminiRequestLayer(max_concurrency=30, stage="intro")
+
+# Per-recipe progress for --resume (see pipeline_journal.py)
+journal = PipelineJournal("intro")
+
+# Which recipes have an intro (see pipeline_state.py)
+pipeline_state = PipelineState()
+
+# --pack: recipes per request and estimated prompt tokens per request
+PACK_MAX_RECIPES = 20
+PACK_TOKEN_BUDGET = 8000
+
 def vprint(*args, **kwargs):
     """Print with immediate flush for real-time output."""
     print(*args, **kwargs, flush=True)
@@ -76,40 +100,78 @@ INTRO_USER_PROMPT = """Write a 40-60 word intro paragraph for this dish:
 Write the intro paragraph (40-60 words):"""
 
 
-def generate_intro(recipe: dict, max_retries: int = 5) -> str:
-    """Generate intro paragraph for a single recipe."""
-    
-    recipe_id = recipe.get("id", "unknown")
-    
+INTRO_PACK_PROMPT = """Write a 40-60 word intro paragraph for EACH of these dishes:
+
+```json
+{dishes}
+```
+
+Return ONLY a JSON object mapping each dish id to its paragraph text:
+{{"<id>": "paragraph", ...}}"""
+
+
+def intro_fields(recipe: dict) -> dict:
+    """The recipe fields an intro is written from."""
     # Truncate long fields to avoid issues
-    name_origin = recipe.get("name_origin", "")
+    name_origin = recipe.get("name_origin", "") or ""
     if len(name_origin) > 500:
         name_origin = name_origin[:500] + "..."
+    return {
+        "name": recipe.get("name", ""),
+        "name_hebrew": recipe.get("name_hebrew", ""),
+        "name_origin": name_origin,
+        "description": recipe.get("description", ""),
+        "cultural_context": recipe.get("cultural_context", ""),
+    }
+
+
+def intro_pack_entry(recipe: dict) -> dict:
+    """A recipe as it appears in a packed intro request."""
+    return {"id": recipe.get("id"), **intro_fields(recipe)}
+
+
+def pack_cost(recipe_file: Path) -> int:
+    """Estimated tokens a recipe adds to a packed intro request."""
+    with open(recipe_file, 'r', encoding='utf-8') as f:
+        return estimate_tokens(compact_json(intro_pack_entry(json.load(f))))
+
+
+def intro_cache_key(recipe: dict) -> str:
+    """Cache key of the single-recipe request (packed results are stored under it too)."""
+    prompt = INTRO_USER_PROMPT.format(**intro_fields(recipe))
+    return request_key(GEMINI_MODEL, INTRO_SYSTEM_PROMPT, prompt, {"temperature": 0.5, "max_output_tokens": 2048})
+
+
+def valid_intro(intro_text) -> bool:
+    return isinstance(intro_text, str) and 25 <= len(intro_text.split()) <= 90
+
+
+async def generate_intro(recipe: dict, max_retries: int = 5) -> str:
+    """Generate intro paragraph for a single recipe."""
     
-    prompt = INTRO_USER_PROMPT.format(
-        name=recipe.get("name", ""),
-        name_hebrew=recipe.get("name_hebrew", ""),
-        name_origin=name_origin,
-        description=recipe.get("description", ""),
-        cultural_context=recipe.get("cultural_context", "")
-    )
+    recipe_id = recipe.get("id", "unknown")
+    prompt = INTRO_USER_PROMPT.format(**intro_fields(recipe))
     
-    model = genai.GenerativeModel(GEMINI_MODEL)
+    model = generative_model(GEMINI_MODEL)
+    cache_key = intro_cache_key(recipe)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
     for attempt in range(max_retries):
         try:
-            response = model.generate_content(
+            response = await gemini.call(lambda: model.generate_content_async(
                 INTRO_SYSTEM_PROMPT + "\n\n" + prompt,
                 generation_config=genai.GenerationConfig(
                     temperature=0.5 + (attempt * 0.1),
                     max_output_tokens=2048,
                 )
-            )
+            ), model=GEMINI_MODEL)
             
             if not response.candidates or not response.candidates[0].content.parts:
                 if attempt < max_retries - 1:
                     vprint(f"    ⚠️  Empty response, retrying ({attempt + 2}/{max_retries})...")
-                    time.sleep(2)
+                    await asyncio.sleep(gemini.backoff(attempt))
                     continue
                 else:
                     raise RuntimeError(f"Empty response after {max_retries} attempts")
@@ -121,30 +183,80 @@ def generate_intro(recipe: dict, max_retries: int = 5) -> str:
             
             # Verify word count
             word_count = len(intro_text.split())
-            if word_count < 25 or word_count > 90:
+            if not valid_intro(intro_text):
+                telemetry.event("invalid_output", GEMINI_MODEL, stage=gemini.stage, error=f"{word_count} words")
                 if attempt < max_retries - 1:
                     vprint(f"    ⚠️  Word count {word_count}, retrying...")
                     continue  # Try again for better length
             
+            response_cache.put(cache_key, intro_text, model=GEMINI_MODEL)
             return intro_text
             
         except ValueError as e:
             if "finish_reason" in str(e) and attempt < max_retries - 1:
                 vprint(f"    ⚠️  Safety filter, retrying ({attempt + 2}/{max_retries})...")
-                time.sleep(2)
+                await asyncio.sleep(gemini.backoff(attempt))
                 continue
             raise
         except Exception as e:
             if attempt < max_retries - 1:
                 vprint(f"    ⚠️  Error: {e}, retrying...")
-                time.sleep(2)
+                await asyncio.sleep(gemini.backoff(attempt))
                 continue
             raise
     
     raise RuntimeError(f"Failed to generate intro for {recipe_id}")
 
 
-def process_single_recipe(recipe_file: Path, total: int) -> dict:
+async def generate_intros_packed(recipes: list) -> dict:
+    """
+    Generate intros for several recipes in one request.
+    
+    Returns:
+        {recipe id: intro} for the recipes that came back valid; the caller
+        retries the rest one by one
+    """
+    prompt = INTRO_PACK_PROMPT.format(dishes=compact_json([intro_pack_entry(r) for r in recipes]))
+    model = generative_model(GEMINI_MODEL)
+    try:
+        response = await gemini.call(lambda: model.generate_content_async(
+            INTRO_SYSTEM_PROMPT + "\n\n" + prompt,
+            generation_config=genai.GenerationConfig(
+                temperature=0.5,
+                max_output_tokens=2048 + 256 * len(recipes),
+                response_mime_type="application/json",
+            )
+        ), model=GEMINI_MODEL)
+    except (ValueError, RuntimeError) as e:  # blocked or failed request
+        vprint(f"    ⚠️  Packed request failed ({e}); retrying its recipes one by one")
+        return {}
+    
+    text = response_text(response)
+    parsed, repaired, truncated = repair_json(text)
+    if parsed is None:
+        if text is not None:
+            telemetry.event("parse_error", GEMINI_MODEL, stage=gemini.stage, error=text[:200])
+        vprint(f"    ⚠️  Packed response empty or unparseable; retrying its recipes one by one")
+        return {}
+    if repaired:
+        telemetry.event("repaired", GEMINI_MODEL, stage=gemini.stage)
+    if isinstance(parsed, dict) and truncated is not None:
+        parsed.pop(truncated, None)  # cut off mid-paragraph
+    entries = index_by_id(parsed, [r.get("id") for r in recipes])
+    
+    intros = {}
+    for recipe in recipes:
+        intro_text = entries.get(recipe.get("id"))
+        if valid_intro(intro_text):
+            intro_text = intro_text.strip().strip('"\'')
+            intros[recipe["id"]] = intro_text
+            response_cache.count_miss()
+            # Store under the single-recipe key, so reruns hit either way
+            response_cache.put(intro_cache_key(recipe), intro_text, model=GEMINI_MODEL)
+    return intros
+
+
+async def process_single_recipe(recipe_file: Path, total: int) -> dict:
     """Process a single recipe."""
     global _progress_count
     
@@ -153,6 +265,7 @@ def process_single_recipe(recipe_file: Path, total: int) -> dict:
         "success": False,
         "error": None
     }
+    journal.in_flight(recipe_file.stem)
     
     try:
         with open(recipe_file, 'r', encoding='utf-8') as f:
@@ -161,23 +274,25 @@ def process_single_recipe(recipe_file: Path, total: int) -> dict:
         recipe_name = recipe.get("name", recipe_file.stem)
         
         # Generate intro
-        intro_paragraph = generate_intro(recipe)
+        intro_paragraph = await generate_intro(recipe)
         
         # Add to recipe
         recipe["intro_paragraph"] = intro_paragraph
         
         # Save
-        with open(recipe_file, 'w', encoding='utf-8') as f:
-            json.dump(recipe, f, ensure_ascii=False, indent=2)
+        write_json(recipe_file, recipe)
         
         result["success"] = True
         result["word_count"] = len(intro_paragraph.split())
+        journal.done(recipe_file.stem, recipe_file)
+        pipeline_state.record(recipe_file.stem, "intro", output=recipe_file)
         
         with _progress_lock:
             _progress_count += 1
             vprint(f"✅ [{_progress_count}/{total}] {recipe_name} ({result['word_count']} words)")
             
     except Exception as e:
+        journal.failed(recipe_file.stem, e)
         with _progress_lock:
             _progress_count += 1
             vprint(f"❌ [{_progress_count}/{total}] Failed {recipe_file.stem}: {e}")
@@ -186,8 +301,68 @@ def process_single_recipe(recipe_file: Path, total: int) -> dict:
     return result
 
 
-def generate_all(workers: int = 30, limit: int = None, force: bool = False):
-    """Generate intro paragraphs for all recipes."""
+async def process_pack(recipe_files: list, total: int) -> list:
+    """
+    Process several recipes with one packed request; recipes missing from
+    the response (or with an invalid intro) fall back to process_single_recipe.
+    """
+    global _progress_count
+    
+    recipes = {}
+    for recipe_file in recipe_files:
+        with open(recipe_file, 'r', encoding='utf-8') as f:
+            recipes[recipe_file] = json.load(f)
+    
+    # Recipes answered from the cache don't need a place in the pack. Only hits
+    # are counted here; misses are counted by the pack or by process_single_recipe
+    intros = {}
+    for recipe in recipes.values():
+        if response_cache.peek(intro_cache_key(recipe)) is not None:
+            intros[recipe.get("id")] = response_cache.get(intro_cache_key(recipe))
+    packed = [f for f in recipe_files if recipes[f].get("id") not in intros]
+    
+    if len(packed) > 1:
+        for f in packed:
+            journal.in_flight(f.stem)
+        intros.update(await generate_intros_packed([recipes[f] for f in packed]))
+    
+    results = []
+    for recipe_file in recipe_files:
+        recipe = recipes[recipe_file]
+        intro_paragraph = intros.get(recipe.get("id"))
+        if intro_paragraph is None:
+            results.append(await process_single_recipe(recipe_file, total))
+            continue
+        
+        recipe["intro_paragraph"] = intro_paragraph
+        write_json(recipe_file, recipe)
+        journal.done(recipe_file.stem, recipe_file)
+        pipeline_state.record(recipe_file.stem, "intro", output=recipe_file)
+        
+        word_count = len(intro_paragraph.split())
+        with _progress_lock:
+            _progress_count += 1
+            vprint(f"✅ [{_progress_count}/{total}] {recipe.get('name', recipe_file.stem)} ({word_count} words, packed)")
+        results.append({"recipe_id": recipe_file.stem, "success": True, "error": None, "word_count": word_count})
+    return results
+
+
+def recipes_with_intro(recipe_files: list) -> set:
+    """Ids of recipes that have an intro paragraph, from the state store."""
+    # Intros written before the state store existed (read once)
+    imported = pipeline_state.backfill("intro", recipe_files, lambda recipe: "intro_paragraph" in recipe)
+    if imported:
+        vprint(f"📦 Recorded {imported} existing intro paragraphs in {pipeline_state.path}")
+    return pipeline_state.recipes("intro")
+
+
+def generate_all(workers: int = 30, limit: int = None, force: bool = False, resume: bool = False, pack: int = 0):
+    """
+    Generate intro paragraphs for all recipes.
+    
+    Args:
+        pack: Recipes per request (packed up to PACK_TOKEN_BUDGET); 0 or 1 = one per request
+    """
     global _progress_count
     _progress_count = 0
     
@@ -195,17 +370,16 @@ def generate_all(workers: int = 30, limit: int = None, force: bool = False):
     
     # Filter out already processed if not forcing
     if not force:
-        to_process = []
-        for f in recipe_files:
-            with open(f, 'r', encoding='utf-8') as file:
-                recipe = json.load(file)
-                if "intro_paragraph" not in recipe:
-                    to_process.append(f)
-        recipe_files = to_process
+        done = recipes_with_intro(recipe_files)
+        recipe_files = [f for f in recipe_files if f.stem not in done]
     
     if limit:
         recipe_files = recipe_files[:limit]
     
+    # Skip recipes finished by the interrupted run
+    todo = set(journal.start_run([f.stem for f in recipe_files], resume=resume))
+    recipe_files = [f for f in recipe_files if f.stem in todo]
+    
     total = len(recipe_files)
     
     if total == 0:
@@ -214,22 +388,34 @@ def generate_all(workers: int = 30, limit: int = None, force: bool = False):
     
     vprint(f"📝 Generating intro paragraphs for {total} recipes...")
     vprint(f"   Model: {GEMINI_MODEL}")
-    vprint(f"   Workers: {workers}")
+    vprint(f"   Max concurrent requests: {workers}")
+    
+    # One pack per request, or one recipe per request
+    if pack > 1:
+        batches = pack_items(recipe_files, pack_cost, PACK_TOKEN_BUDGET, pack)
+        vprint(f"   Packing: {len(batches)} requests of up to {pack} recipes")
+    else:
+        batches = [[f] for f in recipe_files]
     vprint()
     vprint("=" * 60)
     
     results = {"success": [], "failed": []}
+    gemini.set_max_concurrency(workers)
     
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        future_to_file = {
-            executor.submit(process_single_recipe, f, total): f
-            for f in recipe_files
-        }
-        
-        for future in as_completed(future_to_file):
-            recipe_file = future_to_file[future]
-            try:
-                result = future.result()
+    async def process_batch(batch):
+        if len(batch) == 1:
+            return [await process_single_recipe(batch[0], total)]
+        return await process_pack(batch, total)
+    
+    async def run():
+        async for batch, batch_results, error in iter_completed(process_batch, batches):
+            if error is not None:
+                results["failed"].extend({
+                    "recipe_id": recipe_file.stem,
+                    "error": str(error)
+                } for recipe_file in batch)
+                continue
+            for result in batch_results:
                 if result["success"]:
                     results["success"].append(result["recipe_id"])
                 else:
@@ -237,11 +423,8 @@ def generate_all(workers: int = 30, limit: int = None, force: bool = False):
                         "recipe_id": result["recipe_id"],
                         "error": result["error"]
                     })
-            except Exception as e:
-                results["failed"].append({
-                    "recipe_id": recipe_file.stem,
-                    "error": str(e)
-                })
+    
+    asyncio.run(run())
     
     vprint()
     vprint("=" * 60)
@@ -249,6 +432,10 @@ def generate_all(workers: int = 30, limit: int = None, force: bool = False):
     vprint("=" * 60)
     vprint(f"✅ Successful: {len(results['success'])}")
     vprint(f"❌ Failed: {len(results['failed'])}")
+    vprint(f"💾 LLM cache: {response_cache.summary()}")
+    vprint(f"📡 Gemini: {gemini.summary()}")
+    if telemetry.records:
+        vprint(telemetry.report())
     
     if results["failed"]:
         vprint("\nFailed:")
@@ -269,11 +456,11 @@ def generate_single(recipe_id: str):
     with open(recipe_file, 'r', encoding='utf-8') as f:
         recipe = json.load(f)
     
-    intro = generate_intro(recipe)
+    intro = asyncio.run(generate_intro(recipe))
     recipe["intro_paragraph"] = intro
     
-    with open(recipe_file, 'w', encoding='utf-8') as f:
-        json.dump(recipe, f, ensure_ascii=False, indent=2)
+    write_json(recipe_file, recipe)
+    pipeline_state.record(recipe_id, "intro", output=recipe_file)
     
     vprint(f"\n✅ Generated ({len(intro.split())} words):")
     vprint(f"\n{intro}")
@@ -285,23 +472,27 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate intro paragraphs for recipes")
     parser.add_argument("--single", "-s", help="Generate for single recipe by ID")
     parser.add_argument("--limit", "-n", type=int, help="Process only N recipes")
-    parser.add_argument("--workers", "-w", type=int, default=30, help="Number of parallel workers (default: 30)")
+    parser.add_argument("--workers", "-w", type=int, default=30, help="Maximum concurrent Gemini requests, adapts below this (default: 30)")
     parser.add_argument("--force", "-f", action="store_true", help="Regenerate even if exists")
     parser.add_argument("--list", "-l", action="store_true", help="List recipes without intro")
+    parser.add_argument("--resume", action="store_true", help="Continue the last run, skipping recipes it finished")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached LLM responses (new responses are still cached)")
+    parser.add_argument("--pack", type=int, nargs="?", const=PACK_MAX_RECIPES, default=0, metavar="N", help=f"Pack up to N recipes (default {PACK_MAX_RECIPES}, ~{PACK_TOKEN_BUDGET} prompt tokens) into each request")
     
     args = parser.parse_args()
+    response_cache.read = not args.no_cache
     
     if args.list:
         print("Recipes without intro_paragraph:")
-        for f in sorted(CANONICAL_DIR.glob("*.json")):
-            with open(f, 'r', encoding='utf-8') as file:
-                recipe = json.load(file)
-                if "intro_paragraph" not in recipe:
-                    print(f"  - {f.stem}")
+        recipe_files = sorted(CANONICAL_DIR.glob("*.json"))
+        done = recipes_with_intro(recipe_files)
+        for f in recipe_files:
+            if f.stem not in done:
+                print(f"  - {f.stem}")
         sys.exit(0)
     
     if args.single:
         generate_single(args.single)
     else:
-        generate_all(workers=args.workers, limit=args.limit, force=args.force)
+        generate_all(workers=args.workers, limit=args.limit, force=args.force, resume=args.resume, pack=args.pack)
 
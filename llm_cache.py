@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+LLM Response Cache
+
+Content-addressed on-disk cache of Gemini responses, shared by
+canonize_recipes.py, veganize_recipes.py, generate_intro_paragraphs.py,
+multilingualize_recipes.py and review_translations.py.
+
+A response is stored under the SHA-256 of (model, system prompt, user
+prompt, generation config), so rerunning a stage after a crash or with
+--force returns the same responses from disk instead of calling the API
+again. Only responses the caller accepted (parsed, validated) are stored.
+
+Entries live in data/llm_cache/<2 hex>/<sha256>.json. The store is size
+bounded: each hit refreshes the entry's mtime, and when the total size
+exceeds the limit the least recently used entries are deleted.
+
+Environment:
+    LLM_CACHE_DIR      Cache directory (default: data/llm_cache)
+    LLM_CACHE_MAX_MB   Size limit in MB (default: 512)
+"""
+
+import os
+import json
+import time
+import hashlib
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Optional
+
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / "data" / "llm_cache"
+DEFAULT_MAX_MB = 512
+
+# Bump to ignore all existing entries (e.g. after changing the key format)
+CACHE_VERSION = "1"
+
+# Eviction trims to this fraction of the limit so it doesn't run on every write
+EVICT_TO = 0.9
+
+
+def request_key(model: str, system_prompt: str, prompt: str, config: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Cache key for one request.
+
+    Args:
+        model: Model name
+        system_prompt: System instruction ("" if none)
+        prompt: User prompt
+        config: Generation config as a plain dict (temperature, max tokens, ...)
+    """
+    payload = json.dumps(
+        {"v": CACHE_VERSION, "model": model, "system": system_prompt, "prompt": prompt, "config": config or {}},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Thread-safe, size-bounded LRU store of response texts.
+
+    Usage:
+        cache = ResponseCache()
+        key = request_key(MODEL, SYSTEM_PROMPT, prompt, {"temperature": 0.3})
+        text = cache.get(key)
+        if text is None:
+            text = call_api(...)
+            ...validate...
+            cache.put(key, text, model=MODEL)
+        print(cache.summary())
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_mb: Optional[float] = None, read: bool = True):
+        """
+        Args:
+            cache_dir: Cache directory (default: $LLM_CACHE_DIR or data/llm_cache)
+            max_mb: Size limit in MB (default: $LLM_CACHE_MAX_MB or 512)
+            read: If False, every lookup misses (responses are still stored)
+        """
+        self.cache_dir = Path(cache_dir or os.getenv("LLM_CACHE_DIR") or DEFAULT_CACHE_DIR)
+        self.max_bytes = int(float(max_mb or os.getenv("LLM_CACHE_MAX_MB") or DEFAULT_MAX_MB) * 1024 * 1024)
+        self.read = read
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = Lock()
+        self._total_bytes: Optional[int] = None
+        self._served = set()  # keys answered from disk in this run
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def peek(self, key: str) -> Optional[str]:
+        """Cached response text for key, or None, without counting a lookup."""
+        path = self._path(key)
+        if not (self.read and path.exists()):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = json.load(f)["text"]
+            os.utime(path)  # mark as recently used
+        except (OSError, json.JSONDecodeError, KeyError):
+            return None
+        return text
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached response text for key, or None."""
+        text = self.peek(key)
+        with self._lock:
+            if text is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._served.add(key)
+        return text
+
+    def count_miss(self) -> None:
+        """Count a lookup that peek() missed and that was answered without get() (e.g. by a packed request)."""
+        with self._lock:
+            self.misses += 1
+
+    def put(self, key: str, text: str, model: str = "") -> None:
+        """Store an accepted response, evicting old entries if over the limit."""
+        if key in self._served:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            old_size = path.stat().st_size if path.exists() else 0
+            tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{id(text)}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"model": model, "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "text": text}, f, ensure_ascii=False)
+            tmp_path.replace(path)
+            size = path.stat().st_size
+        except OSError as e:
+            print(f"⚠️  Warning: Could not write LLM cache entry: {e}", flush=True)
+            return
+
+        with self._lock:
+            self.writes += 1
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += size - old_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        """(mtime, size, path) of every entry."""
+        entries = []
+        if not self.cache_dir.exists():
+            return entries
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> None:
+        """Delete least recently used entries down to EVICT_TO of the limit (lock held)."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICT_TO
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._total_bytes = total
+
+    def summary(self) -> str:
+        """One-line hit/miss report."""
+        lookups = self.hits + self.misses
+        rate = f"{self.hits / lookups:.0%}" if lookups else "n/a"
+        line = f"{self.hits} hits, {self.misses} misses ({rate} hit rate), {self.writes} stored"
+        if self.evictions:
+            line += f", {self.evictions} evicted"
+        return line
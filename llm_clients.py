@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+LLM Client Pool
+
+Process-wide, lazily created API clients shared by every LLM script, so a run
+opens its connections once and keeps them alive instead of paying connection
+setup and TLS handshakes inside per-request latency:
+
+- google.genai (review, ingredient icons, dish images): genai_client() returns
+  one Client per API key. Its HTTP pools keep up to POOL_SIZE connections
+  alive, enough for the request layer's 30-50 concurrent calls (httpx's
+  default keeps only 20 and reconnects for the rest).
+- google.generativeai (canonize, veganize, intro, multilingualize):
+  generative_model() returns one GenerativeModel per model and system prompt.
+  All of them share the SDK's default async gRPC client, a single HTTP/2
+  channel that multiplexes concurrent requests.
+- Perplexity (dish research): perplexity_client().
+
+The SDKs are imported on first use, once per process. Async clients belong to
+the event loop that first uses them; every script runs a single asyncio.run().
+
+With a Gemini stand-in installed (install_standin(), or LLM_STANDIN; see
+gemini_standin.py), the Gemini clients handed out replay recorded responses
+offline, or record the real ones.
+
+Usage:
+    client = genai_client()
+    types = genai_types()
+    response = await client.aio.models.generate_content(model=MODEL, contents=[prompt])
+
+    model = generative_model(GEMINI_MODEL, system_instruction=SYSTEM_PROMPT)
+    response = await model.generate_content_async(prompt)
+
+Environment:
+    GOOGLE_API_KEY / GEMINI_API_KEY    Gemini key (either name)
+    PERPLEXITY_API_KEY                 Perplexity key
+    LLM_STANDIN                        "record:<dir>" or "replay:<dir>" (gemini_standin.py)
+"""
+
+import os
+import sys
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+
+POOL_SIZE = 64          # connections kept alive per client (above the --workers ceilings)
+KEEPALIVE_SECONDS = 60  # idle time before a pooled connection is closed
+
+PLACEHOLDER_KEYS = ("your_google_api_key_here", "your_gemini_api_key_here", "your_perplexity_api_key_here")
+
+_lock = Lock()
+_genai: Optional[Tuple[Any, Any]] = None
+_genai_clients: Dict[str, Any] = {}
+_generativeai: Any = None
+_models: Dict[Tuple[str, Optional[str]], Any] = {}
+_perplexity: Any = None
+_standin: Any = None
+_standin_checked = False
+
+
+def _env_key(*names: str) -> Optional[str]:
+    """First set, non-placeholder value among the given environment variables."""
+    for name in names:
+        value = os.getenv(name)
+        if value and value not in PLACEHOLDER_KEYS:
+            return value
+    return None
+
+
+def _import_genai() -> Tuple[Any, Any]:
+    global _genai
+    if _genai is None:
+        try:
+            from google import genai
+            from google.genai import types
+        except ImportError:
+            print("❌ google-genai package not installed.")
+            print("Install with: pip install google-genai")
+            sys.exit(1)
+        _genai = (genai, types)
+    return _genai
+
+
+def install_standin(standin: Any) -> None:
+    """
+    Route the Gemini clients handed out from now on to a stand-in.
+
+    Args:
+        standin: A gemini_standin.GeminiStandin, or None for the real API
+    """
+    global _standin, _standin_checked
+    with _lock:
+        _standin, _standin_checked = standin, True
+        _genai_clients.clear()
+        _models.clear()
+
+
+def _active_standin() -> Any:
+    """The installed stand-in, set up from LLM_STANDIN on first use. Call with _lock held."""
+    global _standin, _standin_checked
+    if not _standin_checked:
+        _standin_checked = True
+        if os.getenv("LLM_STANDIN"):
+            from gemini_standin import standin_from_env
+            _standin = standin_from_env(os.environ["LLM_STANDIN"])
+    return _standin
+
+
+def using_standin() -> bool:
+    """Whether Gemini requests go to a stand-in instead of the API."""
+    with _lock:
+        return _active_standin() is not None
+
+
+def genai_types() -> Any:
+    """The google.genai.types module (imported on first use)."""
+    return _import_genai()[1]
+
+
+def _http_options(types: Any) -> Any:
+    """HttpOptions with a keep-alive pool of POOL_SIZE connections, or None if unsupported."""
+    try:
+        import httpx
+        limits = httpx.Limits(
+            max_connections=POOL_SIZE,
+            max_keepalive_connections=POOL_SIZE,
+            keepalive_expiry=KEEPALIVE_SECONDS,
+        )
+        args: Dict[str, Any] = {"client_args": {"limits": limits}}
+        try:
+            import aiohttp  # noqa: F401 -- google-genai uses aiohttp for async when present; its pool is already large
+        except ImportError:
+            args["async_client_args"] = {"limits": limits}
+        return types.HttpOptions(**args)
+    except (ImportError, AttributeError, TypeError, ValueError):
+        # Older google-genai without client_args: fall back to the SDK's own pool
+        return None
+
+
+def genai_client(api_key: Optional[str] = None) -> Any:
+    """
+    Shared google.genai Client.
+
+    Args:
+        api_key: API key (default: GOOGLE_API_KEY or GEMINI_API_KEY)
+
+    Returns:
+        The process-wide client for that key
+    """
+    with _lock:
+        standin = _active_standin()
+    if standin is not None and standin.replaying:
+        return standin.genai_client()
+    api_key = api_key or _env_key("GOOGLE_API_KEY", "GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError(
+            "GOOGLE_API_KEY or GEMINI_API_KEY not found in environment. "
+            "Please set it in your .env file."
+        )
+    with _lock:
+        client = _genai_clients.get(api_key)
+        if client is None:
+            genai, types = _import_genai()
+            http_options = _http_options(types)
+            if http_options is not None:
+                client = genai.Client(api_key=api_key, http_options=http_options)
+            else:
+                client = genai.Client(api_key=api_key)
+            if standin is not None:
+                client = standin.genai_client(client)  # recording
+            _genai_clients[api_key] = client
+        return client
+
+
+def generative_model(model_name: str, system_instruction: Optional[str] = None) -> Any:
+    """
+    Shared google.generativeai GenerativeModel for a model and system prompt.
+
+    Args:
+        model_name: Gemini model name
+        system_instruction: System prompt, if any
+
+    Returns:
+        The process-wide model object
+    """
+    global _generativeai
+    with _lock:
+        standin = _active_standin()
+        if standin is not None and standin.replaying:
+            return standin.generative_model(model_name, system_instruction)
+        if _generativeai is None:
+            import google.generativeai as generativeai
+            generativeai.configure(api_key=_env_key("GOOGLE_API_KEY", "GEMINI_API_KEY"))
+            _generativeai = generativeai
+        key = (model_name, system_instruction)
+        model = _models.get(key)
+        if model is None:
+            if system_instruction is not None:
+                model = _generativeai.GenerativeModel(model_name, system_instruction=system_instruction)
+            else:
+                model = _generativeai.GenerativeModel(model_name)
+            if standin is not None:
+                model = standin.generative_model(model_name, system_instruction, real=model)  # recording
+            _models[key] = model
+        return model
+
+
+def perplexity_client() -> Any:
+    """Shared Perplexity client (PERPLEXITY_API_KEY)."""
+    global _perplexity
+    with _lock:
+        if _perplexity is None:
+            try:
+                from perplexipy import PerplexityClient
+            except ImportError:
+                print("❌ PerplexiPy package not installed.")
+                print("Install with: pip install perplexipy")
+                sys.exit(1)
+            api_key = _env_key("PERPLEXITY_API_KEY")
+            if not api_key:
+                raise ValueError(
+                    "PERPLEXITY_API_KEY not found in environment. "
+                    "Please set it in your .env file."
+                )
+            _perplexity = PerplexityClient(key=api_key)
+        return _perplexity
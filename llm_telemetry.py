@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+LLM Call Telemetry
+
+Structured per-call metrics for every Gemini and Perplexity request in the
+repo. Each API attempt is one record: stage, model, latency, outcome
+(ok / throttled / error / timeout), HTTP status, tokens in/out (input tokens
+served from the context cache counted separately), finish reason and whether
+a safety filter blocked it. Callers add events for failures only
+they can see: "parse_error" for a response that doesn't parse as JSON,
+"invalid_output" for one that parses but fails validation, "repaired" for
+one that only parsed after local repair (structured_output.py).
+
+Gemini calls are recorded by GeminiRequestLayer.call (gemini_async.py);
+synchronous calls (image generation, Perplexity research) use track():
+
+    with telemetry.track(MODEL, stage="images") as call:
+        call.response = client.models.generate_content(...)
+
+run_pipeline.py tags calls with the running stage via telemetry.stage(name).
+
+At the end of a run, telemetry.report() summarizes latency percentiles,
+throughput, token counts and retry amplification per stage and model.
+
+Records are appended to data/telemetry/llm_calls.jsonl. Environment:
+    LLM_TELEMETRY    Sink path (.jsonl, or .sqlite/.db for SQLite); "off" to keep
+                     metrics in memory only (default: data/telemetry/llm_calls.jsonl)
+"""
+
+import os
+import json
+import math
+import time
+import sqlite3
+import contextvars
+from pathlib import Path
+from threading import Lock
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+DEFAULT_SINK = Path("data/telemetry/llm_calls.jsonl")  # relative, like the pipelines' data paths
+
+# Finish reasons that mean the response was withheld by a filter
+BLOCKED_FINISH_REASONS = ("SAFETY", "PROHIBITED_CONTENT", "BLOCKLIST", "SPII", "IMAGE_SAFETY")
+
+RECORD_FIELDS = (
+    "ts", "run", "stage", "model", "kind", "attempt", "latency_s", "outcome",
+    "status", "tokens_in", "tokens_out", "finish_reason", "blocked", "error", "tokens_cached",
+)
+
+_current_stage: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("llm_stage", default=None)
+
+
+def response_usage(response: Any) -> Tuple[Optional[int], Optional[int], Optional[int], Optional[str], bool]:
+    """
+    (tokens in, of those served from the context cache, tokens out, finish
+    reason, blocked) of a Gemini response; google.generativeai and
+    google.genai expose the same attribute names.
+    """
+    usage = getattr(response, "usage_metadata", None)
+    tokens_in = getattr(usage, "prompt_token_count", None)
+    tokens_cached = getattr(usage, "cached_content_token_count", None)
+    tokens_out = getattr(usage, "candidates_token_count", None)
+    thoughts = getattr(usage, "thoughts_token_count", None)
+    if isinstance(tokens_out, int) and isinstance(thoughts, int):
+        tokens_out += thoughts
+
+    finish_reason = None
+    try:
+        candidates = response.candidates or []
+        if candidates:
+            reason = candidates[0].finish_reason
+            finish_reason = getattr(reason, "name", None) or str(reason)
+    except (AttributeError, TypeError):
+        pass
+
+    feedback = getattr(response, "prompt_feedback", None)
+    blocked = bool(getattr(feedback, "block_reason", None)) or (
+        finish_reason is not None and finish_reason.upper().split(".")[-1] in BLOCKED_FINISH_REASONS
+    )
+    return (
+        tokens_in if isinstance(tokens_in, int) else None,
+        tokens_cached if isinstance(tokens_cached, int) else None,
+        tokens_out if isinstance(tokens_out, int) else None,
+        finish_reason,
+        blocked,
+    )
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0-100) of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class TrackedCall:
+    """Holder for the response of a call timed with Telemetry.track()."""
+
+    def __init__(self):
+        self.response: Any = None
+
+
+class Telemetry:
+    """Thread-safe collector of per-call records with a JSONL or SQLite sink."""
+
+    def __init__(self, sink: Optional[str] = None):
+        """
+        Args:
+            sink: Output path (default: $LLM_TELEMETRY or data/telemetry/llm_calls.jsonl);
+                "off" keeps records in memory only
+        """
+        sink = sink or os.getenv("LLM_TELEMETRY") or str(DEFAULT_SINK)
+        self.sink = None if sink.lower() == "off" else Path(sink)
+        self.run_id = time.strftime("%Y%m%d-%H%M%S")
+        self.records: List[Dict[str, Any]] = []
+        self._lock = Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._sink_failed = False
+
+    # ── recording ──────────────────────────────────────────────────────────
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Attribute calls made inside this block (and tasks it starts) to a stage."""
+        token = _current_stage.set(name)
+        try:
+            yield
+        finally:
+            _current_stage.reset(token)
+
+    def current_stage(self, default: Optional[str] = None) -> Optional[str]:
+        return _current_stage.get() or default
+
+    def record(
+        self,
+        model: str,
+        stage: Optional[str],
+        latency: float,
+        outcome: str,
+        attempt: int = 0,
+        response: Any = None,
+        error: Optional[BaseException] = None,
+        status: Optional[int] = None,
+    ) -> None:
+        """
+        Record one API attempt.
+
+        Args:
+            model: Model name
+            stage: Pipeline stage (the running telemetry.stage() wins)
+            latency: Seconds from request to response or error
+            outcome: "ok", "throttled", "error" or "timeout"
+            attempt: 0-based retry number within one logical request
+            response: The API response, for token counts and finish reason
+            error: The exception, if the attempt failed
+            status: HTTP status of the error, if known
+        """
+        tokens_in, tokens_cached, tokens_out, finish_reason, blocked = (
+            response_usage(response) if response is not None else (None, None, None, None, False)
+        )
+        self._write({
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "run": self.run_id,
+            "stage": self.current_stage(stage),
+            "model": model,
+            "kind": "call",
+            "attempt": attempt,
+            "latency_s": round(latency, 4),
+            "outcome": outcome,
+            "status": status,
+            "tokens_in": tokens_in,
+            "tokens_cached": tokens_cached,
+            "tokens_out": tokens_out,
+            "finish_reason": finish_reason,
+            "blocked": blocked,
+            "error": str(error)[:300] if error is not None else None,
+        })
+
+    def event(self, kind: str, model: str, stage: Optional[str] = None, error: Any = None) -> None:
+        """Record a caller-side failure, e.g. kind="parse_error" for unparseable JSON."""
+        self._write({
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "run": self.run_id,
+            "stage": self.current_stage(stage),
+            "model": model,
+            "kind": kind,
+            "error": str(error)[:300] if error is not None else None,
+        })
+
+    @contextmanager
+    def track(self, model: str, stage: Optional[str] = None) -> Iterator[TrackedCall]:
+        """Time a call made outside GeminiRequestLayer; set .response on the yielded holder."""
+        call = TrackedCall()
+        start = time.monotonic()
+        try:
+            yield call
+        except Exception as e:
+            self.record(model, stage, time.monotonic() - start, "error", response=call.response, error=e)
+            raise
+        self.record(model, stage, time.monotonic() - start, "ok", response=call.response)
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        record["_t"] = time.monotonic()
+        with self._lock:
+            self.records.append(record)
+            if self.sink is None or self._sink_failed:
+                return
+            row = {field: record.get(field) for field in RECORD_FIELDS}
+            try:
+                self.sink.parent.mkdir(parents=True, exist_ok=True)
+                if self.sink.suffix in (".sqlite", ".db"):
+                    self._write_sqlite(row)
+                else:
+                    with open(self.sink, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            except (OSError, sqlite3.Error) as e:
+                self._sink_failed = True
+                print(f"⚠️  Warning: Could not write LLM telemetry to {self.sink}: {e}", flush=True)
+
+    def _write_sqlite(self, row: Dict[str, Any]) -> None:
+        if self._db is None:
+            self._db = sqlite3.connect(str(self.sink), check_same_thread=False)
+            self._db.execute(f"CREATE TABLE IF NOT EXISTS llm_calls ({', '.join(RECORD_FIELDS)})")
+            # Tables from older runs lack the newer columns
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(llm_calls)")}
+            for field in RECORD_FIELDS:
+                if field not in columns:
+                    self._db.execute(f"ALTER TABLE llm_calls ADD COLUMN {field}")
+        self._db.execute(
+            f"INSERT INTO llm_calls ({', '.join(RECORD_FIELDS)}) VALUES ({', '.join('?' for _ in RECORD_FIELDS)})",
+            [row[field] for field in RECORD_FIELDS],
+        )
+        self._db.commit()
+
+    # ── reporting ──────────────────────────────────────────────────────────
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per (stage, model) aggregates of this run's records."""
+        groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        with self._lock:
+            records = list(self.records)
+        for record in records:
+            groups.setdefault((record.get("stage") or "-", record.get("model") or "-"), []).append(record)
+
+        stats = []
+        for (stage, model), group in sorted(groups.items()):
+            calls = [r for r in group if r["kind"] == "call"]
+            if not calls:
+                continue
+            ok = [r for r in calls if r["outcome"] == "ok"]
+            latencies = [r["latency_s"] for r in ok]
+            blocked = sum(1 for r in calls if r.get("blocked"))
+            parse_errors = sum(1 for r in group if r["kind"] == "parse_error")
+            invalid = sum(1 for r in group if r["kind"] == "invalid_output")
+            repaired = sum(1 for r in group if r["kind"] == "repaired")
+            # API attempts per usable response: retries, blocks and unusable output all cost calls
+            delivered = len(ok) - blocked - parse_errors - invalid
+            wall = max(r["_t"] for r in calls) - min(r["_t"] - r["latency_s"] for r in calls)
+            stats.append({
+                "stage": stage,
+                "model": model,
+                "attempts": len(calls),
+                "ok": len(ok),
+                "throttled": sum(1 for r in calls if r["outcome"] == "throttled"),
+                "errors": sum(1 for r in calls if r["outcome"] in ("error", "timeout")),
+                "retries": sum(1 for r in calls if r.get("attempt")),
+                "blocked": blocked,
+                "parse_errors": parse_errors,
+                "invalid": invalid,
+                "repaired": repaired,
+                "p50_s": percentile(latencies, 50),
+                "p90_s": percentile(latencies, 90),
+                "p99_s": percentile(latencies, 99),
+                "tokens_in": sum(r.get("tokens_in") or 0 for r in calls),
+                "tokens_cached": sum(r.get("tokens_cached") or 0 for r in calls),
+                "tokens_out": sum(r.get("tokens_out") or 0 for r in calls),
+                "throughput_per_s": len(ok) / wall if wall > 0 else None,
+                "amplification": len(calls) / delivered if delivered > 0 else None,
+            })
+        return stats
+
+    def report(self) -> str:
+        """Multi-line end-of-run summary ("" if no calls were made)."""
+        stats = self.stats()
+        if not stats:
+            return ""
+
+        def secs(value):
+            return "-" if value is None else f"{value:.1f}s"
+
+        lines = ["📈 LLM telemetry" + (f" (→ {self.sink})" if self.sink and not self._sink_failed else "")]
+        for s in stats:
+            amplification = "-" if s["amplification"] is None else f"{s['amplification']:.2f}×"
+            cached = f" ({s['tokens_cached']:,} cached)" if s["tokens_cached"] else ""
+            throughput = "-" if s["throughput_per_s"] is None else f"{s['throughput_per_s'] * 60:.1f}/min"
+            lines.append(
+                f"   {s['stage']:<16} {s['model']:<28} {s['ok']}/{s['attempts']} ok, "
+                f"p50 {secs(s['p50_s'])} p90 {secs(s['p90_s'])} p99 {secs(s['p99_s'])}, {throughput}, "
+                f"tokens {s['tokens_in']:,} in{cached} / {s['tokens_out']:,} out, amplification {amplification}"
+            )
+            problems = [
+                f"{s[key]} {label}" for key, label in (
+                    ("throttled", "throttled"), ("errors", "errors"),
+                    ("blocked", "safety blocks"), ("parse_errors", "parse errors"),
+                    ("invalid", "invalid outputs"), ("repaired", "repaired locally"),
+                ) if s[key]
+            ]
+            if problems:
+                lines.append(f"   {'':<16} {'':<28} {', '.join(problems)}")
+        return "\n".join(lines)
+
+
+# One collector per process, shared by every script and the request layer
+telemetry = Telemetry()
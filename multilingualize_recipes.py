@@ -14,27 +14,47 @@ Output: Multilingual JSON (Hebrew, English, Spanish, Arabic)
 import os
 import sys
 import json
-import time
 import re
+import copy
+import asyncio
+import difflib
 from pathlib import Path
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from threading import Lock
 
 load_dotenv()
 
 import google.generativeai as genai
 
+from gemini_async import GeminiRequestLayer, iter_completed
+from llm_cache import ResponseCache, request_key
+from pipeline_journal import PipelineJournal
+from pipeline_state import PipelineState
+from artifact_writer import write_json
+from llm_telemetry import telemetry
+from prompt_prefix import PromptPrefix, compact_json
+from structured_output import (
+    LANG_STRINGS, MULTILINGUAL_SCHEMA, StructuredOutputError, json_config, lang_lists_check, object_schema,
+    parse_valid, request_json, response_text,
+)
+
 # ============================================================================
 # CONFIGURATION - NEVER CHANGE MODEL
 # ============================================================================
 GEMINI_MODEL = "gemini-3-pro-preview"
-genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
 
 # Paths
 CANONICAL_DIR = Path("data/recipes_canonical")
 OUTPUT_DIR = Path("data/recipes_multilingual_v2")
 DICTIONARY_FILE = Path("data/ingredients_dictionary.json")
+# The canonical recipe each multilingual file was translated from (for --diff)
+TRANSLATION_SOURCES_DIR = Path("data/multilingual_sources")
+
+LANGUAGES = ("he", "es", "ar", "en")
+
+# --diff falls back to a full translation when more than this share of the
+# recipe's fields (name, description, each ingredient and step) changed
+DIFF_MAX_FRACTION = 0.5
 
 # Create output directory
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -43,23 +63,30 @@ OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 _progress_lock = Lock()
 _progress_count = 0
 
+# Accepted Gemini responses, reused on identical reruns (see llm_cache.py)
+response_cache = ResponseCache()
+
+# Adaptive concurrency + backoff for all Gemini calls (see gemini_async.py)
+gemini = GeminiRequestLayer(max_concurrency=30, stage="multilingualize")
+
+# Per-recipe progress for --resume (see pipeline_journal.py)
+journal = PipelineJournal("multilingualize")
+
+# Recipe → multilingual file mapping and stage status (see pipeline_state.py)
+pipeline_state = PipelineState()
+
 def find_existing_multilingual_file(recipe_id: str) -> Path | None:
     """Find existing multilingual file for a canonical recipe ID.
     
-    Handles naming differences (underscores vs no underscores).
+    Handles naming differences (underscores vs no underscores) through the
+    state store's file index, so OUTPUT_DIR is listed at most once per run.
     """
     # First try exact match
     exact = OUTPUT_DIR / f"{recipe_id}.json"
     if exact.exists():
         return exact
     
-    # Try without underscores
-    no_underscores = recipe_id.replace("_", "")
-    for f in OUTPUT_DIR.glob("*.json"):
-        if f.stem.replace("_", "") == no_underscores:
-            return f
-    
-    return None
+    return pipeline_state.file("multilingual", recipe_id, directory=OUTPUT_DIR)
 
 def vprint(*args, **kwargs):
     """Print with immediate flush for real-time output."""
@@ -182,14 +209,7 @@ def strip_markdown_from_result(data: dict) -> dict:
     return data
 
 
-MULTILINGUAL_USER_PROMPT = """Translate this canonical recipe to 4 languages for an HTML cookbook.
-
-## CANONICAL RECIPE:
-```json
-{canonical_recipe}
-```
-
-## CRITICAL: USE THE measurements FIELD FOR EACH INGREDIENT
+MULTILINGUAL_INSTRUCTIONS = """## CRITICAL: USE THE measurements FIELD FOR EACH INGREDIENT
 
 Each ingredient has a "measurements" object. Use the RIGHT unit system for each language:
 - Hebrew: measurements.metric (e.g., 250 גרם, 45 מ"ל)
@@ -201,40 +221,40 @@ For count items (where metric/imperial/volume are null), use measurements.origin
 
 ## OUTPUT STRUCTURE (follow exactly):
 ```json
-{{
-  "id": "{recipe_id}",
-  "image": "{image_path}",
-  "meta": {{
-    "servings": "{servings}",
-    "prep_time": "{prep_time}",
-    "cook_time": "{cook_time}",
-    "difficulty": "{difficulty}"
-  }},
-  "name": {{
+{
+  "id": "<id given with the recipe>",
+  "image": "<image given with the recipe>",
+  "meta": {
+    "servings": "<servings given with the recipe>",
+    "prep_time": "<prep_time given with the recipe>",
+    "cook_time": "<cook_time given with the recipe>",
+    "difficulty": "<difficulty given with the recipe>"
+  },
+  "name": {
     "he": "Hebrew name (use name_hebrew from source)",
     "es": "Spanish name",
     "ar": "Arabic name (Tunisian transliteration for cultural dishes)",
     "en": "English name"
-  }},
-  "description": {{
+  },
+  "description": {
     "he": "Hebrew description (translate intro_paragraph, NO markdown)",
     "es": "Spanish description (NO markdown)",
     "ar": "Tunisian Derja description (NO markdown)",
     "en": "English description (intro_paragraph, NO markdown)"
-  }},
-  "ingredients": {{
+  },
+  "ingredients": {
     "he": ["250 גרם קמח, מנופה", "45 מ\"ל שמן", "2 בצלים, קצוצים"],
     "es": ["250 g de harina, tamizada", "45 ml de aceite", "2 cebollas, picadas"],
     "ar": ["2 كيسان فرينة، منخولة", "3 مغارف زيت", "2 بصلات، مقصوصين"],
     "en": ["2 cups flour, sifted", "3 tbsp oil", "2 onions, diced"]
-  }},
-  "steps": {{
+  },
+  "steps": {
     "he": ["step 1 in Hebrew", "step 2..."],
     "es": ["step 1 in Spanish", "step 2..."],
     "ar": ["step 1 in Tunisian Arabic", "step 2..."],
     "en": ["step 1 in English", "step 2..."]
-  }}
-}}
+  }
+}
 ```
 
 CRITICAL RULES:
@@ -245,24 +265,69 @@ CRITICAL RULES:
 5. Spanish: pancakes = panqueques (not tortitas)
 6. Use intro_paragraph for description
 7. INGREDIENTS: Use measurements.metric for Hebrew/Spanish, measurements.volume for Arabic/English
-8. Return ONLY valid JSON
+8. Return ONLY valid JSON"""
+
+# Shared by every full translation; the requests themselves carry only the recipe
+MULTILINGUAL_PREFIX = PromptPrefix(
+    GEMINI_MODEL, MULTILINGUAL_SYSTEM_PROMPT + "\n\n" + MULTILINGUAL_INSTRUCTIONS, stage="multilingualize"
+)
+
+# Canonical fields a translation doesn't use (id, image and meta are passed separately)
+MULTILINGUAL_DROP_KEYS = (
+    "slug", "source_file", "image", "meta", "tags", "related_recipes",
+    "vegan_substitutions", "veganization_complete",
+)
+
+
+MULTILINGUAL_USER_PROMPT = """Translate this canonical recipe to 4 languages for an HTML cookbook.
+
+## CANONICAL RECIPE:
+```json
+{canonical_recipe}
+```
+
+Use exactly these values for "id", "image" and "meta": {fixed_fields}
 
 Translate now:"""
 
 
-def multilingualize_recipe(canonical: dict, max_retries: int = 5) -> dict:
+MULTILINGUAL_DIFF_PROMPT = """Part of the canonical recipe "{recipe_name}" changed.
+Translate ONLY the changed fields below to 4 languages, following the same rules as a full recipe.
+
+## CHANGED FIELDS (canonical English):
+```json
+{changes}
+```
+
+Keys mean:
+- "name": the dish name (use name_hebrew for Hebrew)
+- "description": the intro_paragraph, to translate as the description
+- "ingredients": {{"<position>": canonical ingredient}} - use measurements.metric for Hebrew/Spanish,
+  measurements.volume for Arabic/English, measurements.original for count items
+- "steps": {{"<position>": canonical step}}
+
+## OUTPUT STRUCTURE (same keys and positions, each value in 4 languages):
+```json
+{{
+  "name": {{"he": "...", "es": "...", "ar": "...", "en": "..."}},
+  "description": {{"he": "...", "es": "...", "ar": "...", "en": "..."}},
+  "ingredients": {{"3": {{"he": "...", "es": "...", "ar": "...", "en": "..."}}}},
+  "steps": {{"0": {{"he": "...", "es": "...", "ar": "...", "en": "..."}}}}
+}}
+```
+
+Include only the keys present in CHANGED FIELDS. NO MARKDOWN. Return ONLY valid JSON."""
+
+# --diff requests share only the system prompt
+MULTILINGUAL_DIFF_PREFIX = PromptPrefix(GEMINI_MODEL, MULTILINGUAL_SYSTEM_PROMPT, stage="multilingualize --diff")
+
+
+async def multilingualize_recipe(canonical: dict, max_retries: int = 5) -> dict:
     """Transform a canonical recipe to multilingual format using Gemini."""
     
     recipe_id = canonical.get("id", "unknown")
     recipe_name = canonical.get("name", recipe_id)
     
-    # Extract meta info
-    meta = canonical.get("meta", {})
-    servings = meta.get("servings", "4-6")
-    prep_time = f"{meta.get('prep_time_minutes', 15)} min"
-    cook_time = f"{meta.get('cook_time_minutes', 30)} min"
-    difficulty = meta.get("difficulty", "medium").capitalize()
-    
     # Get image path
     image_info = canonical.get("image", {})
     image_path = image_info.get("filename", f"{recipe_id}.png")
@@ -270,81 +335,247 @@ def multilingualize_recipe(canonical: dict, max_retries: int = 5) -> dict:
     vprint(f"  🌍 Translating: {recipe_name}")
     
     prompt = MULTILINGUAL_USER_PROMPT.format(
-        canonical_recipe=json.dumps(canonical, ensure_ascii=False, indent=2),
-        recipe_id=recipe_id,
-        image_path=image_path,
-        servings=servings,
-        prep_time=prep_time,
-        cook_time=cook_time,
-        difficulty=difficulty
+        canonical_recipe=compact_json(canonical, drop=MULTILINGUAL_DROP_KEYS),
+        fixed_fields=compact_json({"id": recipe_id, "image": image_path, "meta": local_meta(canonical)}),
     )
     
-    model = genai.GenerativeModel(
-        GEMINI_MODEL,
-        system_instruction=MULTILINGUAL_SYSTEM_PROMPT
-    )
+    model = MULTILINGUAL_PREFIX.generative_model()
+    cache_key = request_key(GEMINI_MODEL, MULTILINGUAL_PREFIX.text, prompt, {"temperature": 0.4, "max_output_tokens": 16384})
+    
+    async def ask(text: str, schema: dict, attempt: int):
+        response = await gemini.call(lambda: model.generate_content_async(
+            text,
+            generation_config=genai.GenerationConfig(
+                temperature=0.4 + (attempt * 0.1),
+                max_output_tokens=16384,
+                **json_config(schema),
+            )
+        ), model=GEMINI_MODEL)
+        return response_text(response)
     
-    for attempt in range(max_retries):
+    check = lang_lists_check("ingredients", "steps")
+    result = parse_valid(response_cache.get(cache_key), MULTILINGUAL_SCHEMA, check)
+    if result is not None:
+        vprint(f"    💾 Cached response")
+    else:
         try:
-            response = model.generate_content(
-                prompt,
-                generation_config=genai.GenerationConfig(
-                    temperature=0.4 + (attempt * 0.1),
-                    max_output_tokens=16384,
-                )
+            result = await request_json(ask, prompt, MULTILINGUAL_SCHEMA, model=GEMINI_MODEL, stage=gemini.stage,
+                                        check=check, max_attempts=max_retries, log=vprint)
+        except StructuredOutputError as e:
+            raise RuntimeError(f"{e} for {recipe_id}")
+        response_cache.put(cache_key, json.dumps(result, ensure_ascii=False), model=GEMINI_MODEL)
+    
+    # Post-process: strip any markdown that slipped through
+    result = strip_markdown_from_result(result)
+    
+    # Preserve image_prompt from canonical if exists
+    if canonical.get("image", {}).get("prompt"):
+        result["image_prompt"] = canonical["image"]["prompt"]
+    
+    vprint(f"    ✅ Translated successfully")
+    return result
+
+
+def local_meta(canonical: dict) -> dict:
+    """The multilingual "meta" block, as the full prompt asks the model to fill it."""
+    meta = canonical.get("meta", {})
+    return {
+        "servings": meta.get("servings", "4-6"),
+        "prep_time": f"{meta.get('prep_time_minutes', 15)} min",
+        "cook_time": f"{meta.get('cook_time_minutes', 30)} min",
+        "difficulty": meta.get("difficulty", "medium").capitalize(),
+    }
+
+
+def load_translation_source(recipe_id: str) -> dict | None:
+    """Canonical recipe the current multilingual file was translated from, if recorded."""
+    path = TRANSLATION_SOURCES_DIR / f"{recipe_id}.json"
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def save_translation_source(recipe_id: str, canonical: dict):
+    """Record the canonical recipe a multilingual file was just generated from."""
+    TRANSLATION_SOURCES_DIR.mkdir(parents=True, exist_ok=True)
+    write_json(TRANSLATION_SOURCES_DIR / f"{recipe_id}.json", canonical)
+
+
+def _item_text(item) -> str:
+    """Comparable form of an ingredient or step (step numbers don't count)."""
+    if isinstance(item, dict):
+        item = {k: v for k, v in item.items() if k != "step"}
+    return json.dumps(item, ensure_ascii=False, sort_keys=True)
+
+
+def align_items(old: list, new: list) -> list:
+    """
+    Match a new canonical list against the old one.
+
+    Returns:
+        For each new position, the old position holding the same item,
+        or None if the item is new or changed
+    """
+    matcher = difflib.SequenceMatcher(a=[_item_text(i) for i in old], b=[_item_text(i) for i in new], autojunk=False)
+    mapping = [None] * len(new)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            for offset in range(j2 - j1):
+                mapping[j1 + offset] = i1 + offset
+    return mapping
+
+
+def diff_canonical(old: dict, new: dict, existing: dict) -> dict | None:
+    """
+    Plan an incremental translation of `new`, given the canonical recipe `old`
+    that the multilingual recipe `existing` was translated from.
+
+    Returns:
+        {"name": bool, "description": bool, "meta": bool,
+         "ingredients": [old position or None, ...], "steps": [...]},
+        or None if a full translation is needed
+    """
+    plan = {
+        "name": any(old.get(k) != new.get(k) for k in ("name", "name_hebrew")),
+        "description": old.get("intro_paragraph", old.get("description")) != new.get("intro_paragraph", new.get("description")),
+        "meta": old.get("meta") != new.get("meta"),
+    }
+    changed = int(plan["name"]) + int(plan["description"])
+    units = 2
+    for field in ("ingredients", "steps"):
+        old_items, new_items = old.get(field) or [], new.get(field) or []
+        # Translations must line up with the old canonical list to be reused
+        for lang in LANGUAGES:
+            if len(existing.get(field, {}).get(lang, [])) != len(old_items):
+                return None
+        plan[field] = align_items(old_items, new_items)
+        changed += plan[field].count(None)
+        units += len(new_items)
+    if changed > DIFF_MAX_FRACTION * units:
+        return None
+    return plan
+
+
+async def translate_changes(canonical: dict, plan: dict, max_retries: int = 3) -> dict:
+    """
+    Translate only the fields the plan marks as changed.
+
+    Returns:
+        {"name": {lang: text}, "description": {...}, "ingredients": {"<pos>": {...}}, "steps": {...}}
+    """
+    recipe_id = canonical.get("id", "unknown")
+    changes = {}
+    if plan["name"]:
+        changes["name"] = {"name": canonical.get("name"), "name_hebrew": canonical.get("name_hebrew")}
+    if plan["description"]:
+        changes["description"] = canonical.get("intro_paragraph", canonical.get("description"))
+    for field in ("ingredients", "steps"):
+        items = {str(i): canonical[field][i] for i, old in enumerate(plan[field]) if old is None}
+        if items:
+            changes[field] = items
+    
+    prompt = MULTILINGUAL_DIFF_PROMPT.format(
+        recipe_name=canonical.get("name", recipe_id),
+        changes=compact_json(changes),
+    )
+    model = MULTILINGUAL_DIFF_PREFIX.generative_model()
+    cache_key = request_key(GEMINI_MODEL, MULTILINGUAL_DIFF_PREFIX.text, prompt, {"temperature": 0.4, "max_output_tokens": 4096})
+    
+    # Every requested field must come back in all 4 languages
+    schema = object_schema({
+        key: LANG_STRINGS if key in ("name", "description") else object_schema({pos: LANG_STRINGS for pos in value})
+        for key, value in changes.items()
+    })
+    
+    async def ask(text: str, schema: dict, attempt: int):
+        response = await gemini.call(lambda: model.generate_content_async(
+            text,
+            generation_config=genai.GenerationConfig(
+                temperature=0.4 + (attempt * 0.1),
+                max_output_tokens=4096,
+                **json_config(schema),
             )
-            
-            # Check for valid response
-            if not response.candidates or not response.candidates[0].content.parts:
-                if attempt < max_retries - 1:
-                    vprint(f"    ⚠️  Empty response, retrying ({attempt + 2}/{max_retries})...")
-                    time.sleep(2)
-                    continue
-                else:
-                    raise RuntimeError(f"Gemini returned empty response after {max_retries} attempts for {recipe_id}")
-            
-            response_text = response.text.strip()
-            
-            # Remove markdown code blocks if present
-            if response_text.startswith("```"):
-                response_text = re.sub(r'^```(?:json)?\n?', '', response_text)
-                response_text = re.sub(r'\n?```$', '', response_text)
-            
-            result = json.loads(response_text)
-            
-            # Post-process: strip any markdown that slipped through
-            result = strip_markdown_from_result(result)
-            
-            # Preserve image_prompt from canonical if exists
-            if canonical.get("image", {}).get("prompt"):
-                result["image_prompt"] = canonical["image"]["prompt"]
-            
-            vprint(f"    ✅ Translated successfully")
-            return result
-            
-        except ValueError as e:
-            if "finish_reason" in str(e) and attempt < max_retries - 1:
-                vprint(f"    ⚠️  Safety filter triggered, retrying ({attempt + 2}/{max_retries})...")
-                time.sleep(2)
-                continue
-            elif attempt == max_retries - 1:
-                raise RuntimeError(f"Safety filter blocked after {max_retries} attempts for {recipe_id}")
-            raise
-        except json.JSONDecodeError as e:
-            if attempt < max_retries - 1:
-                vprint(f"    ⚠️  JSON parse error, retrying ({attempt + 2}/{max_retries})...")
-                time.sleep(2)
-                continue
-            else:
-                vprint(f"    ❌ Failed to parse JSON: {e}")
-                vprint(f"    Response preview: {response_text[:500]}...")
-                raise RuntimeError(f"JSON parse failed after {max_retries} attempts for {recipe_id}: {e}")
+        ), model=GEMINI_MODEL)
+        return response_text(response)
+    
+    result = parse_valid(response_cache.get(cache_key), schema)
+    if result is None:
+        try:
+            result = await request_json(ask, prompt, schema, model=GEMINI_MODEL, stage=gemini.stage,
+                                        max_attempts=max_retries, log=vprint)
+        except StructuredOutputError as e:
+            raise RuntimeError(f"Partial translation failed for {recipe_id}: {e}")
+        response_cache.put(cache_key, json.dumps(result, ensure_ascii=False), model=GEMINI_MODEL)
+    return strip_markdown_from_result(result)
+
+
+def merge_translation(existing: dict, canonical: dict, plan: dict, changes: dict) -> dict:
+    """Apply a partial translation to the existing multilingual recipe."""
+    result = copy.deepcopy(existing)
+    for key in ("name", "description"):
+        if plan[key]:
+            result[key] = {lang: changes[key][lang] for lang in LANGUAGES}
+    if plan["meta"]:
+        result["meta"] = local_meta(canonical)
+    for field in ("ingredients", "steps"):
+        result[field] = {
+            lang: [
+                existing[field][lang][old] if old is not None else changes[field][str(i)][lang]
+                for i, old in enumerate(plan[field])
+            ]
+            for lang in LANGUAGES
+        }
+    if canonical.get("image", {}).get("prompt"):
+        result["image_prompt"] = canonical["image"]["prompt"]
+    return result
+
+
+def count_changes(plan: dict) -> int:
+    """Fields a plan re-translates."""
+    return int(plan["name"]) + int(plan["description"]) + plan["ingredients"].count(None) + plan["steps"].count(None)
+
+
+async def multilingualize_incremental(canonical: dict, existing_file: Path | None) -> tuple:
+    """
+    Re-translate only what changed since the existing multilingual file was made.
+    
+    Returns:
+        (multilingual recipe, fields re-translated), with None as the count
+        when a full translation was needed
+    """
+    source = load_translation_source(canonical.get("id", ""))
+    if existing_file is None or source is None:
+        return await multilingualize_recipe(canonical), None
+    with open(existing_file, 'r', encoding='utf-8') as f:
+        existing = json.load(f)
+    
+    plan = diff_canonical(source, canonical, existing)
+    if plan is None:
+        vprint(f"  🌍 Too much changed in {canonical.get('name')}, translating in full")
+        return await multilingualize_recipe(canonical), None
     
-    raise RuntimeError(f"Unexpected state in multilingualize_recipe for {recipe_id}")
+    count = count_changes(plan)
+    changes = {}
+    if count:
+        vprint(f"  🌍 Re-translating {count} changed field(s): {canonical.get('name')}")
+        changes = await translate_changes(canonical, plan)
+    return merge_translation(existing, canonical, plan, changes), count
 
 
-def process_single_recipe(canonical_file: Path, total: int) -> dict:
-    """Process a single recipe (for parallel execution)."""
+async def process_single_recipe(canonical_file: Path, total: int, diff: bool = False) -> dict:
+    """
+    Process a single recipe (for concurrent execution).
+    
+    Args:
+        canonical_file: Canonical recipe JSON
+        total: Recipe count for progress output
+        diff: Re-translate only the fields that changed since the existing
+            multilingual file was generated (full translation if unknown)
+    """
     global _progress_count
     
     result = {
@@ -354,13 +585,20 @@ def process_single_recipe(canonical_file: Path, total: int) -> dict:
         "error": None
     }
     
+    journal.in_flight(canonical_file.stem)
+    
     try:
         # Load canonical recipe
         with open(canonical_file, 'r', encoding='utf-8') as f:
             canonical = json.load(f)
         
-        # Multilingualize
-        multilingual = multilingualize_recipe(canonical)
+        # Multilingualize (in full, or only the changed fields)
+        retranslated = None
+        if diff:
+            existing_file = find_existing_multilingual_file(canonical.get("id", canonical_file.stem))
+            multilingual, retranslated = await multilingualize_incremental(canonical, existing_file)
+        else:
+            multilingual = await multilingualize_recipe(canonical)
         
         # Find existing file or create new filename
         recipe_id = multilingual.get("id", canonical_file.stem)
@@ -368,17 +606,23 @@ def process_single_recipe(canonical_file: Path, total: int) -> dict:
         output_file = existing_file if existing_file else OUTPUT_DIR / f"{recipe_id}.json"
         
         # Save
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(multilingual, f, ensure_ascii=False, indent=2)
+        write_json(output_file, multilingual)
+        save_translation_source(canonical.get("id", canonical_file.stem), canonical)
+        pipeline_state.map_file("multilingual", recipe_id, output_file)
+        pipeline_state.record(canonical_file.stem, "multilingualize", output=output_file)
         
         result["success"] = True
         result["output_file"] = str(output_file)
+        result["retranslated"] = retranslated
+        journal.done(canonical_file.stem, output_file)
         
+        detail = "" if retranslated is None else f" ({retranslated} field(s) re-translated)"
         with _progress_lock:
             _progress_count += 1
-            vprint(f"✅ [{_progress_count}/{total}] Saved: {output_file.name}")
+            vprint(f"✅ [{_progress_count}/{total}] Saved: {output_file.name}{detail}")
             
     except Exception as e:
+        journal.failed(canonical_file.stem, e)
         with _progress_lock:
             _progress_count += 1
             vprint(f"❌ [{_progress_count}/{total}] Failed: {canonical_file.name}: {e}")
@@ -387,7 +631,7 @@ def process_single_recipe(canonical_file: Path, total: int) -> dict:
     return result
 
 
-def multilingualize_all(workers: int = 30, limit: int = None):
+def multilingualize_all(workers: int = 30, limit: int = None, resume: bool = False, diff: bool = False):
     """Multilingualize all canonical recipes."""
     global _progress_count
     _progress_count = 0
@@ -398,42 +642,43 @@ def multilingualize_all(workers: int = 30, limit: int = None):
     if limit:
         canonical_files = canonical_files[:limit]
     
+    # Skip recipes finished by the interrupted run
+    todo = set(journal.start_run([f.stem for f in canonical_files], resume=resume))
+    canonical_files = [f for f in canonical_files if f.stem in todo]
+    
     total = len(canonical_files)
     
     vprint(f"🌍 Multilingualizing {total} recipes to 4 languages...")
     vprint(f"   Model: {GEMINI_MODEL}")
-    vprint(f"   Workers: {workers}")
+    vprint(f"   Max concurrent requests: {workers}")
+    if diff:
+        vprint(f"   Mode: diff (changed fields only)")
     vprint(f"   Output: {OUTPUT_DIR}/")
     vprint()
     vprint("=" * 60)
     
     results = {"success": [], "failed": []}
+    gemini.set_max_concurrency(workers)
     
-    # Process in parallel
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        future_to_file = {
-            executor.submit(process_single_recipe, f, total): f
-            for f in canonical_files
-        }
-        
-        for future in as_completed(future_to_file):
-            canonical_file = future_to_file[future]
-            try:
-                result = future.result()
-                if result["success"]:
-                    results["success"].append(result["output_file"])
-                else:
-                    results["failed"].append({
-                        "source": result["source_file"],
-                        "error": result["error"]
-                    })
-            except Exception as e:
-                vprint(f"❌ Exception: {e}")
+    async def run():
+        async for canonical_file, result, error in iter_completed(lambda f: process_single_recipe(f, total, diff), canonical_files):
+            if error is not None:
+                vprint(f"❌ Exception: {error}")
                 results["failed"].append({
                     "source": str(canonical_file),
-                    "error": str(e)
+                    "error": str(error)
+                })
+            elif result["success"]:
+                results["success"].append(result["output_file"])
+            else:
+                results["failed"].append({
+                    "source": result["source_file"],
+                    "error": result["error"]
                 })
     
+    # Process concurrently
+    asyncio.run(run())
+    
     # Summary
     vprint()
     vprint("=" * 60)
@@ -441,6 +686,10 @@ def multilingualize_all(workers: int = 30, limit: int = None):
     vprint("=" * 60)
     vprint(f"✅ Successful: {len(results['success'])}")
     vprint(f"❌ Failed: {len(results['failed'])}")
+    vprint(f"💾 LLM cache: {response_cache.summary()}")
+    vprint(f"📡 Gemini: {gemini.summary()}")
+    if telemetry.records:
+        vprint(telemetry.report())
     
     if results["failed"]:
         vprint("\nFailed recipes:")
@@ -450,7 +699,7 @@ def multilingualize_all(workers: int = 30, limit: int = None):
     return results
 
 
-def multilingualize_single(recipe_id: str):
+def multilingualize_single(recipe_id: str, diff: bool = False):
     """Multilingualize a single recipe by ID."""
     canonical_file = CANONICAL_DIR / f"{recipe_id}.json"
     
@@ -465,14 +714,21 @@ def multilingualize_single(recipe_id: str):
         with open(canonical_file, 'r', encoding='utf-8') as f:
             canonical = json.load(f)
         
-        multilingual = multilingualize_recipe(canonical)
-        
         # Find existing file or create new filename
         existing_file = find_existing_multilingual_file(recipe_id)
         output_file = existing_file if existing_file else OUTPUT_DIR / f"{recipe_id}.json"
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(multilingual, f, ensure_ascii=False, indent=2)
+        if diff:
+            multilingual, retranslated = asyncio.run(multilingualize_incremental(canonical, existing_file))
+            if retranslated is not None:
+                vprint(f"   {retranslated} field(s) re-translated")
+        else:
+            multilingual = asyncio.run(multilingualize_recipe(canonical))
+        
+        write_json(output_file, multilingual)
+        save_translation_source(recipe_id, canonical)
+        pipeline_state.map_file("multilingual", recipe_id, output_file)
+        pipeline_state.record(recipe_id, "multilingualize", output=output_file)
         
         vprint(f"\n✅ Saved: {output_file}")
         vprint(f"\nPreview:")
@@ -493,10 +749,14 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Multilingualize canonical recipes")
     parser.add_argument("--single", "-s", help="Process single recipe by ID (e.g., 'mhamsa')")
     parser.add_argument("--limit", "-n", type=int, help="Process only N recipes")
-    parser.add_argument("--workers", "-w", type=int, default=30, help="Number of parallel workers")
+    parser.add_argument("--workers", "-w", type=int, default=30, help="Maximum concurrent Gemini requests (adapts below this)")
     parser.add_argument("--list", "-l", action="store_true", help="List available canonical recipes")
+    parser.add_argument("--resume", action="store_true", help="Continue the last run, skipping recipes it finished")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached LLM responses (new responses are still cached)")
+    parser.add_argument("--diff", action="store_true", help="Re-translate only fields changed since the last translation (full translation if unknown)")
     
     args = parser.parse_args()
+    response_cache.read = not args.no_cache
     
     if args.list:
         print("Available canonical recipes:")
@@ -505,7 +765,7 @@ if __name__ == "__main__":
         sys.exit(0)
     
     if args.single:
-        multilingualize_single(args.single)
+        multilingualize_single(args.single, diff=args.diff)
     else:
-        multilingualize_all(workers=args.workers, limit=args.limit)
+        multilingualize_all(workers=args.workers, limit=args.limit, resume=args.resume, diff=args.diff)
 
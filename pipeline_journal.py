@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Pipeline Journal
+
+Append-only JSONL record of per-item progress for the batch pipelines
+(canonize, veganize, intro, multilingualize, review), so an interrupted run
+can be resumed with --resume instead of starting over.
+
+Each line is one event:
+    {"ts": ..., "run": "<run id>", "event": "run", "items": 87}
+    {"ts": ..., "run": "<run id>", "item": "<id>", "state": "pending"}
+    {"ts": ..., "run": "<run id>", "item": "<id>", "state": "in_flight"}
+    {"ts": ..., "run": "<run id>", "item": "<id>", "state": "done", "output": "<path>", "hash": "<sha256>"}
+    {"ts": ..., "run": "<run id>", "item": "<id>", "state": "failed", "error": "..."}
+
+An item's state is its last event in the run. Resuming continues the latest
+run: items already done are skipped as long as their output file still has
+the recorded hash; pending, in-flight (interrupted) and failed items are
+processed again.
+
+Journals live in data/journals/<stage>.jsonl.
+"""
+
+import json
+import time
+import hashlib
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, List, Optional
+
+
+JOURNAL_DIR = Path("data/journals")  # relative, like the pipelines' data paths
+
+
+def file_sha256(path: Path) -> Optional[str]:
+    """SHA-256 of a file's bytes, or None if it doesn't exist."""
+    try:
+        return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+class PipelineJournal:
+    """
+    Per-stage progress journal.
+
+    Usage:
+        journal = PipelineJournal("multilingualize")
+        todo = journal.start_run([f.stem for f in files], resume=args.resume)
+        ...
+        journal.in_flight(item)
+        journal.done(item, output_path)   # or journal.failed(item, error)
+    """
+
+    def __init__(self, stage: str, path: Optional[Path] = None):
+        self.stage = stage
+        self.path = Path(path) if path else JOURNAL_DIR / f"{stage}.jsonl"
+        self.run_id: Optional[str] = None
+        self._lock = Lock()
+
+    def _append(self, record: Dict) -> None:
+        if self.run_id is None:
+            return  # not started: single-recipe runs are not journaled
+        record = {"ts": time.strftime("%Y-%m-%dT%H:%M:%S"), "run": self.run_id, **record}
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+
+    def _read(self) -> List[Dict]:
+        """All records, skipping a torn last line from a crash."""
+        if not self.path.exists():
+            return []
+        records = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return records
+
+    def last_run(self) -> Optional[str]:
+        """Id of the most recent run, or None."""
+        runs = [r["run"] for r in self._read() if r.get("event") == "run"]
+        return runs[-1] if runs else None
+
+    def states(self, run_id: Optional[str] = None) -> Dict[str, Dict]:
+        """{item: last record} for a run (default: the most recent one)."""
+        run_id = run_id or self.last_run()
+        states = {}
+        for record in self._read():
+            if record.get("run") == run_id and "item" in record:
+                states[record["item"]] = record
+        return states
+
+    def start_run(self, items: Iterable[str], resume: bool = False) -> List[str]:
+        """
+        Begin (or resume) a run over items.
+
+        Args:
+            items: Ids of every item this run covers
+            resume: Continue the latest run instead of starting a new one
+
+        Returns:
+            The items that still need processing, in the given order
+        """
+        items = list(items)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        previous = self.last_run() if resume else None
+
+        if previous is None:
+            if resume:
+                print(f"⚠️  No {self.stage} journal to resume; starting a new run", flush=True)
+            self.run_id = time.strftime("%Y%m%d-%H%M%S")
+            self._append({"event": "run", "stage": self.stage, "items": len(items)})
+            for item in items:
+                self._append({"item": item, "state": "pending"})
+            return items
+
+        self.run_id = previous
+        states = self.states(previous)
+        todo = []
+        for item in items:
+            record = states.get(item)
+            if record and record["state"] == "done" and file_sha256(record["output"]) == record["hash"]:
+                continue
+            if record is None:
+                self._append({"item": item, "state": "pending"})
+            todo.append(item)
+        print(f"↩️  Resuming {self.stage} run {previous}: {len(items) - len(todo)} done, {len(todo)} to process", flush=True)
+        return todo
+
+    def in_flight(self, item: str) -> None:
+        self._append({"item": item, "state": "in_flight"})
+
+    def done(self, item: str, output: Path) -> None:
+        self._append({"item": item, "state": "done", "output": str(output), "hash": file_sha256(output)})
+
+    def failed(self, item: str, error: str) -> None:
+        self._append({"item": item, "state": "failed", "error": str(error)[:500]})
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Pipeline State
+
+One indexed SQLite store (data/pipeline_state.sqlite) of what the pipeline
+scripts know about each recipe. Scripts look a recipe up by key here instead
+of scanning or rewriting recipe files:
+
+- stages: status, input/output hashes and output file per (recipe, stage),
+  written by canonize, veganize, intro, multilingualize and review
+- files: recipe id → artifact file per kind ("multilingual"), matched ignoring
+  case, underscores and dashes, since multilingual file names vary
+- runner_nodes, runner_sources: run_pipeline.py's DAG records (node keys and
+  the output hashes they were computed from) and source → recipe links
+
+Before this store, veganize flagged canonical JSON with "veganization_complete"
+(--force rewrote every file to remove it), intro opened every canonical file
+to look for "intro_paragraph", and multilingualize globbed its output directory
+once per recipe. The old flags are imported the first time a stage runs
+against the store (backfill()), and run_pipeline.py's data/pipeline_state.json
+the first time the runner does.
+
+Every write is a single-row upsert, so recording one recipe costs the same at
+90 recipes as at 9,000. The database runs in WAL mode, so the runner and
+standalone scripts can share it.
+
+Usage:
+    state = PipelineState()
+    if not state.done(recipe_id, "veganize"):
+        ...
+        state.record(recipe_id, "veganize", output=path)
+    state.reset(recipe_id, "veganize", "intro")                  # canonical file replaced
+    state.file("multilingual", recipe_id, directory=OUTPUT_DIR)   # Path or None
+"""
+
+import json
+import time
+import sqlite3
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+from pipeline_journal import file_sha256
+
+
+STATE_DB = Path("data/pipeline_state.sqlite")    # relative, like the pipelines' data paths
+LEGACY_RUNNER_STATE = Path("data/pipeline_state.json")
+
+GLOBAL = ""  # recipe column of corpus-wide rows (runner icons/build/deploy, backfill markers)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stages (
+    recipe TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    status TEXT NOT NULL,
+    input_hash TEXT,
+    output_hash TEXT,
+    output TEXT,
+    extra TEXT,
+    ts TEXT,
+    PRIMARY KEY (recipe, stage)
+);
+CREATE INDEX IF NOT EXISTS stages_by_status ON stages (stage, status);
+CREATE TABLE IF NOT EXISTS files (
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    PRIMARY KEY (kind, name)
+);
+CREATE TABLE IF NOT EXISTS runner_nodes (
+    recipe TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    record TEXT NOT NULL,
+    PRIMARY KEY (recipe, stage)
+);
+CREATE TABLE IF NOT EXISTS runner_sources (
+    source TEXT PRIMARY KEY,
+    recipe TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def normalize_id(recipe_id: str) -> str:
+    """Recipe id as matched against file names (case, underscores and dashes ignored)."""
+    return recipe_id.lower().replace("_", "").replace("-", "")
+
+
+class PipelineState:
+    """Shared per-recipe pipeline state."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else STATE_DB
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = Lock()
+        self._indexed: Set[str] = set()  # file kinds indexed by this process
+
+    def _execute(self, sql: str, params: Iterable = ()) -> list:
+        with self._lock:
+            if self._db is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+                self._db.executescript(SCHEMA)
+            with self._db:
+                return self._db.execute(sql, tuple(params)).fetchall()
+
+    def _executemany(self, sql: str, rows: Iterable) -> None:
+        self._execute("SELECT 1")  # connects
+        with self._lock:
+            with self._db:
+                self._db.executemany(sql, rows)
+
+    # ── stage status ──────────────────────────────────────────────────────
+
+    def get(self, recipe_id: str, stage: str) -> Optional[Dict[str, Any]]:
+        """A recipe's record for a stage ({"status", "output", "output_hash", ...}), or None."""
+        rows = self._execute(
+            "SELECT status, input_hash, output_hash, output, extra, ts FROM stages WHERE recipe = ? AND stage = ?",
+            (recipe_id, stage),
+        )
+        if not rows:
+            return None
+        status, input_hash, output_hash, output, extra, ts = rows[0]
+        return {"status": status, "input_hash": input_hash, "output_hash": output_hash,
+                "output": output, "ts": ts, **json.loads(extra or "{}")}
+
+    def done(self, recipe_id: str, stage: str) -> bool:
+        """Whether the stage has completed for the recipe."""
+        return bool(self._execute(
+            "SELECT 1 FROM stages WHERE recipe = ? AND stage = ? AND status = 'done'", (recipe_id, stage)
+        ))
+
+    def recipes(self, stage: str, status: str = "done") -> Set[str]:
+        """Recipe ids whose stage has this status."""
+        rows = self._execute("SELECT recipe FROM stages WHERE stage = ? AND status = ? AND recipe != ?",
+                             (stage, status, GLOBAL))
+        return {recipe for (recipe,) in rows}
+
+    def record(
+        self,
+        recipe_id: str,
+        stage: str,
+        output: Optional[Path] = None,
+        status: str = "done",
+        input_hash: Optional[str] = None,
+        **extra: Any,
+    ) -> None:
+        """
+        Record a stage's outcome for a recipe (replaces its previous record).
+
+        Args:
+            recipe_id: Recipe id
+            stage: Stage name
+            output: File the stage wrote (its hash is recorded)
+            status: "done", or e.g. "failed"
+            input_hash: Hash of what the stage consumed
+            **extra: Stage-specific fields, returned by get()
+        """
+        self._execute(
+            "INSERT OR REPLACE INTO stages (recipe, stage, status, input_hash, output_hash, output, extra, ts) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (recipe_id, stage, status, input_hash, file_sha256(output) if output else None,
+             str(output) if output else None, json.dumps(extra, ensure_ascii=False) if extra else None,
+             time.strftime("%Y-%m-%dT%H:%M:%S")),
+        )
+
+    def reset(self, recipe_id: str, *stages: str) -> None:
+        """Forget a recipe's records for these stages (they run again)."""
+        for stage in stages:
+            self._execute("DELETE FROM stages WHERE recipe = ? AND stage = ?", (recipe_id, stage))
+
+    def backfill(self, stage: str, files: Iterable[Path], test: Callable[[dict], bool]) -> int:
+        """
+        Import a stage's completion from per-file markers written before this
+        store existed. Runs once per stage; later calls return immediately.
+
+        Args:
+            stage: Stage name
+            files: Recipe JSON files (the recipe id is the file stem)
+            test: Whether a loaded recipe counts as done for the stage
+
+        Returns:
+            Number of recipes recorded as done
+        """
+        if self.done(GLOBAL, f"backfill:{stage}"):
+            return 0
+        imported = 0
+        for f in files:
+            try:
+                with open(f, "r", encoding="utf-8") as fp:
+                    recipe = json.load(fp)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if test(recipe) and not self.get(f.stem, stage):
+                self.record(f.stem, stage, output=f, backfilled=True)
+                imported += 1
+        self.record(GLOBAL, f"backfill:{stage}")
+        return imported
+
+    # ── file mapping ──────────────────────────────────────────────────────
+
+    def map_file(self, kind: str, recipe_id: str, path: Path) -> None:
+        """Record the file holding a recipe's artifact of this kind."""
+        self._execute("INSERT OR REPLACE INTO files (kind, name, path) VALUES (?, ?, ?)",
+                      (kind, normalize_id(recipe_id), str(path)))
+
+    def index_files(self, kind: str, directory: Path) -> None:
+        """Map every *.json in a directory (one listing, existing mappings kept)."""
+        self._indexed.add(kind)
+        if not Path(directory).exists():
+            return
+        self._executemany(
+            "INSERT OR IGNORE INTO files (kind, name, path) VALUES (?, ?, ?)",
+            [(kind, normalize_id(f.stem), str(f)) for f in sorted(Path(directory).glob("*.json"))],
+        )
+
+    def file(self, kind: str, recipe_id: str, directory: Optional[Path] = None) -> Optional[Path]:
+        """
+        The file holding a recipe's artifact of this kind.
+
+        Args:
+            kind: Artifact kind, e.g. "multilingual"
+            recipe_id: Recipe id (matched ignoring case, underscores and dashes)
+            directory: Where such files live; indexed once per process on a miss
+
+        Returns:
+            Path of an existing file, or None
+        """
+        for attempt in range(2):
+            rows = self._execute("SELECT path FROM files WHERE kind = ? AND name = ?", (kind, normalize_id(recipe_id)))
+            if rows and Path(rows[0][0]).exists():
+                return Path(rows[0][0])
+            if rows:
+                self._execute("DELETE FROM files WHERE kind = ? AND name = ?", (kind, normalize_id(recipe_id)))
+            if attempt or directory is None or kind in self._indexed:
+                return None
+            self.index_files(kind, directory)
+        return None
+
+    # ── run_pipeline.py ───────────────────────────────────────────────────
+
+    def runner_state(self, version: int) -> Dict[str, Any]:
+        """
+        run_pipeline.py's recorded DAG, as {"sources": {source: recipe},
+        "recipes": {recipe: {stage: record}}, "global": {stage: record}}.
+        Empty if recorded by another runner version.
+        """
+        stored = self._execute("SELECT value FROM meta WHERE key = 'runner_version'")
+        if not stored:
+            self._import_legacy_runner_state(version)
+        elif stored[0][0] != str(version):
+            self._execute("DELETE FROM runner_nodes")
+            self._execute("DELETE FROM runner_sources")
+            self._execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('runner_version', ?)", (str(version),))
+
+        state: Dict[str, Any] = {"sources": {}, "recipes": {}, "global": {}}
+        for source, recipe in self._execute("SELECT source, recipe FROM runner_sources"):
+            state["sources"][source] = recipe
+        for recipe, stage, record in self._execute("SELECT recipe, stage, record FROM runner_nodes"):
+            records = state["global"] if recipe == GLOBAL else state["recipes"].setdefault(recipe, {})
+            records[stage] = json.loads(record)
+        return state
+
+    def _import_legacy_runner_state(self, version: int) -> None:
+        legacy = {}
+        if LEGACY_RUNNER_STATE.exists():
+            try:
+                with open(LEGACY_RUNNER_STATE, "r", encoding="utf-8") as f:
+                    legacy = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                pass
+        if legacy.get("version") == version:
+            self._executemany("INSERT OR REPLACE INTO runner_sources (source, recipe) VALUES (?, ?)",
+                              legacy.get("sources", {}).items())
+            nodes = [(recipe, stage, json.dumps(record, ensure_ascii=False))
+                     for recipe, records in legacy.get("recipes", {}).items() for stage, record in records.items()]
+            nodes += [(GLOBAL, stage, json.dumps(record, ensure_ascii=False))
+                      for stage, record in legacy.get("global", {}).items()]
+            self._executemany("INSERT OR REPLACE INTO runner_nodes (recipe, stage, record) VALUES (?, ?, ?)", nodes)
+            print(f"📦 Imported {LEGACY_RUNNER_STATE} into {self.path}", flush=True)
+        self._execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('runner_version', ?)", (str(version),))
+
+    def save_node(self, recipe_id: Optional[str], stage: str, record: Dict[str, Any]) -> None:
+        """Record a runner node (recipe_id None for a corpus-wide stage)."""
+        self._execute("INSERT OR REPLACE INTO runner_nodes (recipe, stage, record) VALUES (?, ?, ?)",
+                      (recipe_id or GLOBAL, stage, json.dumps(record, ensure_ascii=False)))
+
+    def save_source(self, source: str, recipe_id: str) -> None:
+        """Link a source file to the recipe it was canonized to."""
+        self._execute("INSERT OR REPLACE INTO runner_sources (source, recipe) VALUES (?, ?)", (source, recipe_id))
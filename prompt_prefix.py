@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Prompt Prefix
+
+Assembles Gemini requests as a long prefix shared by every request of a stage
+(system prompt plus the stage's static instructions and output format) and a
+short per-recipe tail (the recipe itself).
+
+The prefix is registered once per run with Gemini's context cache
+(cachedContents), so requests send only their tail and the prefix is neither
+re-sent nor re-processed. Gemini caches only prefixes above a minimum size
+(MIN_CACHED_TOKENS, higher on some models), and registration can fail or be
+unavailable (older SDKs, the offline stand-in). In those cases the prefix is
+sent inline as the system instruction instead. It stays byte-identical and
+first in every request, so the API's implicit prefix caching can still reuse
+it. Telemetry counts the cached input tokens either way.
+
+compact_json() serializes the recipe payloads that go into the tails: no
+indentation, no internal ("_"-prefixed) keys, no empty values and no keys the
+stage doesn't need.
+
+Usage:
+    PREFIX = PromptPrefix(GEMINI_MODEL, SYSTEM_PROMPT + "\n\n" + INSTRUCTIONS, stage="veganize")
+
+    model = PREFIX.generative_model()                 # google.generativeai
+    await model.generate_content_async(USER_PROMPT.format(recipe_json=compact_json(recipe)))
+
+    config = types.GenerateContentConfig(temperature=0.3, **PREFIX.config())  # google.genai
+"""
+
+import json
+import atexit
+import datetime
+from threading import Lock
+from typing import Any, Dict, Iterable, Optional
+
+from llm_clients import genai_client, genai_types, generative_model, using_standin
+from request_packing import estimate_tokens
+
+
+MIN_CACHED_TOKENS = 1024   # smallest prefix Gemini's context cache accepts (Flash; Pro models need more)
+CACHE_TTL_SECONDS = 3600   # a cached prefix outlives the run by at most this long
+
+
+# ============================================================================
+# PAYLOADS
+# ============================================================================
+
+def _compact(value: Any, drop: frozenset) -> Any:
+    if isinstance(value, dict):
+        items = ((k, _compact(v, drop)) for k, v in value.items() if k not in drop and not str(k).startswith("_"))
+        return {k: v for k, v in items if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [_compact(v, drop) for v in value]
+    return value
+
+
+def compact_json(value: Any, drop: Iterable[str] = ()) -> str:
+    """
+    JSON for a prompt: no indentation, no internal or empty keys.
+
+    Args:
+        value: Recipe (or list of recipes) to serialize
+        drop: Keys to leave out at any depth
+
+    Returns:
+        Compact JSON text
+    """
+    return json.dumps(_compact(value, frozenset(drop)), ensure_ascii=False, separators=(",", ":"))
+
+
+# ============================================================================
+# SHARED PREFIX
+# ============================================================================
+
+class PromptPrefix:
+    """A stage's shared prompt prefix, held in Gemini's context cache when possible."""
+
+    def __init__(self, model: str, text: str, stage: Optional[str] = None):
+        """
+        Args:
+            model: Gemini model the requests go to
+            text: The shared prefix, sent as the system instruction
+            stage: Pipeline stage, for progress output
+        """
+        self.model = model
+        self.text = text
+        self.stage = stage or "gemini"
+        self.tokens = estimate_tokens(text)
+        self._lock = Lock()
+        self._registered = False
+        self._cache: Any = None        # google.generativeai CachedContent
+        self._cached_model: Any = None # ... and the model bound to it
+        self._cache_name: Optional[str] = None
+        self._client: Any = None       # google.genai client that owns _cache_name
+
+    @property
+    def cached(self) -> bool:
+        """Whether the prefix is in Gemini's context cache (else it's sent inline)."""
+        return self._cached_model is not None or self._cache_name is not None
+
+    def _cacheable(self) -> bool:
+        if using_standin():
+            return False
+        if self.tokens < MIN_CACHED_TOKENS:
+            print(f"  🧊 {self.stage}: shared prompt prefix ~{self.tokens:,} tokens, "
+                  f"below the {MIN_CACHED_TOKENS:,}-token context cache minimum; sent inline")
+            return False
+        return True
+
+    def _registered_note(self, name: str) -> None:
+        print(f"  🧊 {self.stage}: shared prompt prefix (~{self.tokens:,} tokens) cached as {name}")
+        atexit.register(self.release)
+
+    def _fallback_note(self, error: Exception) -> None:
+        print(f"  ⚠ {self.stage}: context cache unavailable ({str(error)[:120]}); prompt prefix sent inline")
+
+    def generative_model(self) -> Any:
+        """
+        google.generativeai model for requests with this prefix.
+
+        Returns:
+            A model bound to the cached prefix, or the shared model with the
+            prefix as its system instruction
+        """
+        with self._lock:
+            if not self._registered:
+                self._registered = True
+                if self._cacheable():
+                    try:
+                        generative_model(self.model)  # configures the SDK
+                        from google.generativeai import caching
+                        self._cache = caching.CachedContent.create(
+                            model=self.model if self.model.startswith("models/") else f"models/{self.model}",
+                            system_instruction=self.text,
+                            display_name=f"djerba-{self.stage}",
+                            ttl=datetime.timedelta(seconds=CACHE_TTL_SECONDS),
+                        )
+                        import google.generativeai as generativeai
+                        self._cached_model = generativeai.GenerativeModel.from_cached_content(cached_content=self._cache)
+                        self._registered_note(self._cache.name)
+                    except Exception as e:  # old SDK, prefix under this model's minimum, API error
+                        self._fallback_note(e)
+            if self._cached_model is not None:
+                return self._cached_model
+        return generative_model(self.model, system_instruction=self.text)
+
+    def config(self, api_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        google.genai GenerateContentConfig entries for requests with this prefix.
+
+        Args:
+            api_key: API key of the client making the requests
+
+        Returns:
+            {"cached_content": name} or {"system_instruction": prefix}
+        """
+        with self._lock:
+            if not self._registered:
+                self._registered = True
+                if self._cacheable():
+                    try:
+                        client = genai_client(api_key)
+                        types = genai_types()
+                        cache = client.caches.create(
+                            model=self.model,
+                            config=types.CreateCachedContentConfig(
+                                system_instruction=self.text,
+                                display_name=f"djerba-{self.stage}",
+                                ttl=f"{CACHE_TTL_SECONDS}s",
+                            ),
+                        )
+                        self._client, self._cache_name = client, cache.name
+                        self._registered_note(cache.name)
+                    except Exception as e:
+                        self._fallback_note(e)
+            if self._cache_name is not None:
+                return {"cached_content": self._cache_name}
+        return {"system_instruction": self.text}
+
+    def release(self) -> None:
+        """Delete the cached prefix (it would otherwise expire after CACHE_TTL_SECONDS)."""
+        with self._lock:
+            cache, name, client = self._cache, self._cache_name, self._client
+            self._cache = self._cached_model = self._cache_name = self._client = None
+        try:
+            if cache is not None:
+                cache.delete()
+            elif name is not None:
+                client.caches.delete(name=name)
+        except Exception:
+            pass  # expires on its own
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Request Packing
+
+Groups several recipes into one Gemini request for stages with short
+per-recipe output (intro paragraphs, translation review). Packs are sized by
+an estimated token budget, the model answers with one entry per recipe id,
+and entries that are missing or invalid are split back out for individual
+retry by the caller.
+
+Usage:
+    packs = pack_items(recipes, cost=lambda r: estimate_tokens(json.dumps(r)), budget=8000, max_items=20)
+    for pack in packs:
+        results = index_by_id(parsed_response, [r["id"] for r in pack])
+        retry = [r for r in pack if r["id"] not in results]
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, TypeVar
+
+
+T = TypeVar("T")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count. Gemini averages ~4 characters per token for English;
+    Hebrew and Arabic take more, so count UTF-8 bytes / 3 to stay on the safe side.
+    """
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+def pack_items(items: Iterable[T], cost: Callable[[T], int], budget: int, max_items: int) -> List[List[T]]:
+    """
+    Greedily group items, in order, into packs of at most max_items whose
+    total cost stays within budget. An item over the budget gets a pack of its own.
+
+    Args:
+        items: Items to pack
+        cost: Estimated tokens per item
+        budget: Token budget per pack
+        max_items: Item limit per pack
+
+    Returns:
+        List of packs
+    """
+    packs: List[List[T]] = []
+    current: List[T] = []
+    used = 0
+    for item in items:
+        size = cost(item)
+        if current and (used + size > budget or len(current) >= max_items):
+            packs.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += size
+    if current:
+        packs.append(current)
+    return packs
+
+
+def index_by_id(result: Any, ids: Iterable[str], key: str = "id") -> Dict[str, Any]:
+    """
+    Per-id entries of a packed response, accepting either
+    {"<id>": entry, ...} or [{"id": "<id>", ...}, ...] (optionally wrapped
+    as {"recipes": [...]}). Ids that weren't requested are dropped.
+    """
+    wanted = set(ids)
+    if isinstance(result, dict) and isinstance(result.get("recipes"), list):
+        result = result["recipes"]
+    if isinstance(result, list):
+        return {
+            entry[key]: entry for entry in result
+            if isinstance(entry, dict) and entry.get(key) in wanted
+        }
+    if isinstance(result, dict):
+        return {item_id: entry for item_id, entry in result.items() if item_id in wanted}
+    return {}
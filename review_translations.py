@@ -1,23 +1,53 @@
 #!/usr/bin/env python3
 """
 Translation Quality Review - All 87 recipes × 4 languages
-Uses Gemini 3.1 Pro with 35 parallel workers.
+Uses Gemini 3.1 Pro with up to 10 concurrent requests (adaptive, see gemini_async.py).
+
+Recipes are checked locally first (translation_checks.py) and only flagged
+ones are sent to Gemini, unless their text is unchanged since their last clean
+review (recorded in the pipeline state store). --all reviews every recipe.
 """
 
 import json
 import os
+import re
 import time
 import sys
+import asyncio
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from google import genai
-from google.genai import types
+
+from gemini_async import GeminiRequestLayer, iter_completed
+from llm_clients import genai_client, genai_types
+from llm_cache import ResponseCache, request_key
+from pipeline_journal import PipelineJournal
+from pipeline_state import PipelineState
+from artifact_writer import atomic_save, write_json
+from llm_telemetry import telemetry
+from prompt_prefix import PromptPrefix, compact_json
+from request_packing import estimate_tokens, index_by_id, pack_items
+from translation_checks import check_recipe, content_hash
+from structured_output import (
+    REVIEW_PACK_SCHEMA, REVIEW_PATCH_PACK_SCHEMA, REVIEW_PATCH_SCHEMA, REVIEW_SCHEMA, StructuredOutputError, invalid_fields, json_config, parse_valid,
+    repair_json, request_json, response_text,
+)
 
 RECIPES_DIR = Path("data/recipes_multilingual_v2")
 MODEL = "gemini-3.1-pro-preview"
 MAX_WORKERS = 10
 CHANGES_LOG = []
 
+# Accepted Gemini responses, reused on identical reruns (see llm_cache.py)
+response_cache = ResponseCache()
+
+# Adaptive concurrency + backoff for all Gemini calls
+gemini = GeminiRequestLayer(max_concurrency=MAX_WORKERS, stage="review")
+
+# Per-recipe progress for --resume
+journal = PipelineJournal("review")
+
+# Content hash of each recipe's text after its last successful review (see pipeline_state.py)
+pipeline_state = PipelineState()
+
 # Load API key
 api_key = os.environ.get("GEMINI_API_KEY")
 if not api_key:
@@ -32,7 +62,7 @@ if not api_key:
         if line.startswith("GEMINI_API_KEY="):
             api_key = line.split("=", 1)[1].strip()
 
-REVIEW_PROMPT = """You are a professional multilingual cookbook editor fluent in Hebrew, Arabic (Tunisian/Maghrebi dialect), Spanish, and English.
+REVIEW_RULES = """You are a professional multilingual cookbook editor fluent in Hebrew, Arabic (Tunisian/Maghrebi dialect), Spanish, and English.
 
 Review this recipe's text in ALL FOUR LANGUAGES. Fix any issues:
 
@@ -53,132 +83,323 @@ RULES:
 - Description: ensure it reads like professional cookbook text
 - If a language version is already perfect, return it unchanged
 
-IMPORTANT: Return the COMPLETE corrected recipe as a valid JSON object. Do NOT use trailing commas. Do NOT add comments. Return ONLY valid JSON with this structure:
+"""
 
-{"changes": [{"field": "...", "reason": "..."}], "name": {"he": "...", "es": "...", "ar": "...", "en": "..."}, "description": {"he": "...", "es": "...", "ar": "...", "en": "..."}, "ingredients": {"he": ["..."], "es": ["..."], "ar": ["..."], "en": ["..."]}, "steps": {"he": ["..."], "es": ["..."], "ar": ["..."], "en": ["..."]}}
+REVIEW_STRUCTURE = '''{"changes": [{"field": "...", "reason": "..."}], "name": {"he": "...", "es": "...", "ar": "...", "en": "..."}, "description": {"he": "...", "es": "...", "ar": "...", "en": "..."}, "ingredients": {"he": ["..."], "es": ["..."], "ar": ["..."], "en": ["..."]}, "steps": {"he": ["..."], "es": ["..."], "ar": ["..."], "en": ["..."]}}'''
 
-Here is the recipe to review:
-"""
+REVIEW_PROMPT = REVIEW_RULES + """IMPORTANT: Return the COMPLETE corrected recipe as a valid JSON object. Do NOT use trailing commas. Do NOT add comments. Return ONLY valid JSON with this structure:
+
+""" + REVIEW_STRUCTURE
+
+REVIEW_PACK_PROMPT = REVIEW_RULES + """Review EACH recipe below independently.
+
+IMPORTANT: Return the COMPLETE corrected text of every recipe as one valid JSON object. Do NOT use trailing commas. Do NOT add comments. Return ONLY valid JSON with one entry per recipe, keeping its "id":
+
+{"recipes": [{"id": "...", """ + REVIEW_STRUCTURE[1:] + """]}"""
+
+# --patch: the reviewer returns only its fixes, applied locally by apply_patch()
+REVIEW_PATCH_FORMAT = """IMPORTANT: Do NOT return the recipe. Return ONLY your fixes, as JSON Patch "replace" operations on the recipe JSON:
+
+{"patch": [{"op": "replace", "path": "/steps/he/2", "value": "the complete corrected text", "reason": "..."}]}
+
+- "path" is /name/<lang>, /description/<lang>, /ingredients/<lang>/<index> or /steps/<lang>/<index> (lang: he, es, ar, en; index from 0)
+- "value" replaces the whole string at that path
+- Only "replace": never add, remove or reorder items
+- Text that is already correct stays out of the patch; a recipe with nothing to fix gets {"patch": []}"""
+
+REVIEW_PATCH_PROMPT = REVIEW_RULES + REVIEW_PATCH_FORMAT
+
+REVIEW_PATCH_PACK_PROMPT = REVIEW_RULES + """Review EACH recipe below independently.
+
+""" + REVIEW_PATCH_FORMAT + """
+
+Return one entry per recipe, keeping its "id": {"recipes": [{"id": "...", "patch": [...]}]}"""
+
+# The instructions go out once per run as a cached prefix (see prompt_prefix.py);
+# requests carry only the recipes
+REVIEW_PREFIX = PromptPrefix(MODEL, REVIEW_PROMPT, stage="review")
+REVIEW_PACK_PREFIX = PromptPrefix(MODEL, REVIEW_PACK_PROMPT, stage="review --pack")
+REVIEW_PATCH_PREFIX = PromptPrefix(MODEL, REVIEW_PATCH_PROMPT, stage="review --patch")
+REVIEW_PATCH_PACK_PREFIX = PromptPrefix(MODEL, REVIEW_PATCH_PACK_PROMPT, stage="review --patch --pack")
+
+# Output token limits: a full recipe in four languages, or a patch
+REVIEW_MAX_TOKENS = 16384
+PATCH_MAX_TOKENS = 4096
+
+PATCH_PATH = re.compile(r"^/(name|description|ingredients|steps)/(he|es|ar|en)(?:/(\d+))?$")
+
+# --pack: recipes per request and estimated prompt tokens per request
+PACK_MAX_RECIPES = 4
+PACK_TOKEN_BUDGET = 12000
+
+def review_payload(recipe: dict) -> dict:
+    """Build review payload (only text fields)."""
+    return {
+        "id": recipe["id"],
+        "name": recipe["name"],
+        "description": recipe["description"],
+        "ingredients": recipe["ingredients"],
+        "steps": recipe["steps"],
+    }
+
+
+def pack_cost(recipe_path: Path) -> int:
+    """Estimated tokens a recipe adds to a packed review request."""
+    with open(recipe_path, 'r', encoding='utf-8') as f:
+        return estimate_tokens(compact_json(review_payload(json.load(f))))
+
+
+def record_clean_review(recipe_path: Path) -> None:
+    """Remember the recipe's reviewed text, so it isn't sent again until it changes."""
+    with open(recipe_path, 'r', encoding='utf-8') as f:
+        recipe = json.load(f)
+    pipeline_state.record(recipe_path.stem, "review", output=recipe_path, content=content_hash(recipe))
+
+
+def review_issues(recipe_path: Path) -> list:
+    """
+    Why a recipe needs an LLM review.
+    
+    Args:
+        recipe_path: Multilingual recipe file
+    
+    Returns:
+        Local check issues; empty if none were found or the text is unchanged
+        since its last clean review
+    """
+    with open(recipe_path, 'r', encoding='utf-8') as f:
+        recipe = json.load(f)
+    reviewed = pipeline_state.get(recipe_path.stem, "review")
+    if reviewed and reviewed.get("content") == content_hash(recipe):
+        return []
+    return check_recipe(recipe)
+
+
+def review_prompt(payload: dict, patch: bool = False) -> tuple:
+    """Single-recipe prompt and its cache key (packed results are stored under it too)."""
+    prompt = "Here is the recipe to review:\n" + compact_json(payload)
+    prefix = REVIEW_PATCH_PREFIX if patch else REVIEW_PREFIX
+    max_tokens = PATCH_MAX_TOKENS if patch else REVIEW_MAX_TOKENS
+    return prompt, request_key(MODEL, prefix.text, prompt, {"temperature": 0.3, "max_output_tokens": max_tokens})
+
+
+def valid_review(reviewed, patch: bool = False) -> bool:
+    """A review is usable if every text field came back in all four languages (or, with patch, is a patch)."""
+    return isinstance(reviewed, dict) and not invalid_fields(reviewed, REVIEW_PATCH_SCHEMA if patch else REVIEW_SCHEMA)
+
+
+def apply_patch(recipe: dict, patch: list) -> tuple:
+    """
+    Apply "replace" operations to a recipe's text fields, skipping any that
+    don't address an existing string.
+
+    Args:
+        recipe: Multilingual recipe (modified in place)
+        patch: [{"op", "path", "value", "reason"}]
+
+    Returns:
+        (changes as [{"field", "reason"}], rejected operations)
+    """
+    changes, rejected, seen = [], [], set()
+    for op in patch:
+        match = PATCH_PATH.match(op.get("path", "")) if isinstance(op, dict) else None
+        value = op.get("value") if match else None
+        if not match or op.get("op") != "replace" or not isinstance(value, str) or not value.strip() or op["path"] in seen:
+            rejected.append(op)
+            continue
+        field, lang, index = match.groups()
+        texts = recipe.get(field)
+        if index is None:
+            target, key = texts, lang
+            ok = field in ("name", "description") and isinstance(texts, dict) and isinstance(texts.get(lang), str)
+        else:
+            target, key = (texts or {}).get(lang) if isinstance(texts, dict) else None, int(index)
+            ok = field in ("ingredients", "steps") and isinstance(target, list) and key < len(target) and isinstance(target[key], str)
+        if not ok:
+            rejected.append(op)
+            continue
+        seen.add(op["path"])
+        if target[key] == value:
+            continue
+        target[key] = value
+        changes.append({"field": f"{field}.{lang}" + (f"[{index}]" if index is not None else ""), "reason": op.get("reason", "")})
+    return changes, rejected
+
+
+def apply_review_patch(recipe_path: Path, recipe: dict, reviewed: dict) -> tuple:
+    """Apply a --patch review and write the recipe back if anything changed."""
+    recipe_id = recipe_path.stem
+    name_en = recipe.get("name", {}).get("en", recipe_id)
+    changes, rejected = apply_patch(recipe, reviewed.get("patch", []))
+    if rejected:
+        paths = ", ".join(str(op.get("path") if isinstance(op, dict) else op)[:60] for op in rejected[:3])
+        print(f"  ⚠ {recipe_id}: skipped {len(rejected)} invalid patch operation(s): {paths}")
+    skipped = f", {len(rejected)} invalid operations skipped" if rejected else ""
+    
+    if changes:
+        write_json(recipe_path, recipe)
+        return (recipe_id, name_en, True, f"{len(changes)} changes{skipped}", changes)
+    return (recipe_id, name_en, True, f"No changes needed{skipped}", [])
 
 
-def review_recipe(recipe_path: Path) -> tuple:
-    """Review a single recipe with Gemini 3.1 Pro."""
+def apply_review(recipe_path: Path, recipe: dict, reviewed: dict) -> tuple:
+    """Write the reviewed text back if the model changed anything."""
     recipe_id = recipe_path.stem
+    name_en = recipe.get("name", {}).get("en", recipe_id)
+    changes = reviewed.get("changes", [])
+    
+    if changes:
+        # Apply changes to the original recipe
+        if "name" in reviewed:
+            recipe["name"] = reviewed["name"]
+        if "description" in reviewed:
+            recipe["description"] = reviewed["description"]
+        if "ingredients" in reviewed:
+            recipe["ingredients"] = reviewed["ingredients"]
+        if "steps" in reviewed:
+            recipe["steps"] = reviewed["steps"]
+        
+        # Save updated recipe
+        write_json(recipe_path, recipe)
+        
+        return (recipe_id, name_en, True, f"{len(changes)} changes", changes)
+    else:
+        return (recipe_id, name_en, True, "No changes needed", [])
+
+
+async def review_recipe(recipe_path: Path, patch: bool = False) -> tuple:
+    """Review a single recipe with Gemini 3.1 Pro (patch: ask for fixes only)."""
+    recipe_id = recipe_path.stem
+    journal.in_flight(recipe_id)
     
     try:
         with open(recipe_path, 'r', encoding='utf-8') as f:
             recipe = json.load(f)
         
         name_en = recipe.get("name", {}).get("en", recipe_id)
+        prompt, cache_key = review_prompt(review_payload(recipe), patch)
+        prefix = REVIEW_PATCH_PREFIX if patch else REVIEW_PREFIX
+        schema = REVIEW_PATCH_SCHEMA if patch else REVIEW_SCHEMA
         
-        # Build review payload (only text fields)
-        review_data = {
-            "id": recipe["id"],
-            "name": recipe["name"],
-            "description": recipe["description"],
-            "ingredients": recipe["ingredients"],
-            "steps": recipe["steps"],
-        }
-        
-        prompt = REVIEW_PROMPT + json.dumps(review_data, ensure_ascii=False, indent=2)
-        
-        client = genai.Client(api_key=api_key)
-        response = client.models.generate_content(
-            model=MODEL,
-            contents=[prompt],
-            config=types.GenerateContentConfig(
-                temperature=0.3,
-                max_output_tokens=16384,
-            )
-        )
-        
-        response_text = response.text.strip()
+        async def ask(text: str, schema: dict, attempt: int):
+            client = genai_client(api_key)
+            types = genai_types()
+            response = await gemini.call(lambda: client.aio.models.generate_content(
+                model=MODEL,
+                contents=[text],
+                config=types.GenerateContentConfig(
+                    temperature=0.3,
+                    max_output_tokens=PATCH_MAX_TOKENS if patch else REVIEW_MAX_TOKENS,
+                    **prefix.config(api_key),
+                    **json_config(schema),
+                )
+            ), model=MODEL)
+            return response_text(response)
         
-        # Clean response - remove markdown fences if present
-        if response_text.startswith("```"):
-            lines = response_text.split("\n")
-            # Remove first and last lines (fences)
-            lines = [l for l in lines if not l.strip().startswith("```")]
-            response_text = "\n".join(lines)
-        
-        # Parse JSON response with robust handling
-        import re as _re
-        
-        def try_parse_json(text):
-            """Try multiple strategies to parse JSON from model output."""
-            # Strategy 1: direct parse
-            try:
-                return json.loads(text)
-            except json.JSONDecodeError:
-                pass
-            
-            # Strategy 2: extract JSON block
-            start = text.find("{")
-            end = text.rfind("}") + 1
-            if start >= 0 and end > start:
-                block = text[start:end]
-                try:
-                    return json.loads(block)
-                except json.JSONDecodeError:
-                    pass
-                
-                # Strategy 3: fix trailing commas
-                fixed = _re.sub(r',\s*}', '}', block)
-                fixed = _re.sub(r',\s*]', ']', fixed)
-                try:
-                    return json.loads(fixed)
-                except json.JSONDecodeError:
-                    pass
-                
-                # Strategy 4: fix unescaped quotes in strings
-                # Replace \" that might be double-escaped
-                fixed2 = fixed.replace('\\\\"', '\\"')
-                try:
-                    return json.loads(fixed2)
-                except json.JSONDecodeError:
-                    pass
-            
-            return None
-        
-        reviewed = try_parse_json(response_text)
+        reviewed = parse_valid(response_cache.get(cache_key), schema)
         if reviewed is None:
-            return (recipe_id, name_en, False, f"Failed to parse JSON response", [])
-        
-        changes = reviewed.get("changes", [])
+            try:
+                reviewed = await request_json(ask, prompt, schema, model=MODEL, stage=gemini.stage,
+                                              log=lambda *args: None)
+            except StructuredOutputError as e:
+                return (recipe_id, name_en, False, f"Invalid JSON response: {str(e)[:100]}", [])
+            response_cache.put(cache_key, json.dumps(reviewed, ensure_ascii=False), model=MODEL)
         
-        if changes:
-            # Apply changes to the original recipe
-            if "name" in reviewed:
-                recipe["name"] = reviewed["name"]
-            if "description" in reviewed:
-                recipe["description"] = reviewed["description"]
-            if "ingredients" in reviewed:
-                recipe["ingredients"] = reviewed["ingredients"]
-            if "steps" in reviewed:
-                recipe["steps"] = reviewed["steps"]
-            
-            # Save updated recipe
-            with open(recipe_path, 'w', encoding='utf-8') as f:
-                json.dump(recipe, f, ensure_ascii=False, indent=2)
-            
-            return (recipe_id, name_en, True, f"{len(changes)} changes", changes)
-        else:
-            return (recipe_id, name_en, True, "No changes needed", [])
+        if patch:
+            return apply_review_patch(recipe_path, recipe, reviewed)
+        return apply_review(recipe_path, recipe, reviewed)
     
     except Exception as e:
         return (recipe_id, recipe_id, False, f"Error: {str(e)[:100]}", [])
 
 
+async def review_pack(recipe_paths: list, patch: bool = False) -> list:
+    """
+    Review several recipes in one request. Recipes that are cached, missing
+    from the response or incomplete are reviewed one by one.
+    
+    Args:
+        recipe_paths: Recipes to review together
+        patch: Ask for fixes only (--patch)
+    
+    Returns:
+        [(recipe_path, result tuple)] in input order
+    """
+    recipes = {}
+    for recipe_path in recipe_paths:
+        with open(recipe_path, 'r', encoding='utf-8') as f:
+            recipes[recipe_path] = json.load(f)
+    
+    # Cached recipes go through review_recipe, which answers them from disk (and counts the lookup)
+    packed = [p for p in recipe_paths if response_cache.peek(review_prompt(review_payload(recipes[p]), patch)[1]) is None]
+    
+    entries = {}
+    if len(packed) > 1:
+        payloads = [review_payload(recipes[p]) for p in packed]
+        prompt = "Here are the recipes to review:\n" + compact_json(payloads)
+        for p in packed:
+            journal.in_flight(p.stem)
+        try:
+            client = genai_client(api_key)
+            types = genai_types()
+            response = await gemini.call(lambda: client.aio.models.generate_content(
+                model=MODEL,
+                contents=[prompt],
+                config=types.GenerateContentConfig(
+                    temperature=0.3,
+                    max_output_tokens=min(65536, (PATCH_MAX_TOKENS if patch else REVIEW_MAX_TOKENS) * len(packed)),
+                    **(REVIEW_PATCH_PACK_PREFIX if patch else REVIEW_PACK_PREFIX).config(api_key),
+                    **json_config(REVIEW_PATCH_PACK_SCHEMA if patch else REVIEW_PACK_SCHEMA),
+                )
+            ), model=MODEL)
+            # A cut-off pack still yields its complete recipes; the rest are reviewed one by one
+            parsed, repaired, truncated = repair_json(response_text(response))
+            if parsed is None:
+                telemetry.event("parse_error", MODEL, stage=gemini.stage)
+            elif repaired:
+                telemetry.event("repaired", MODEL, stage=gemini.stage)
+            if truncated is not None:
+                # The last entry may be missing its tail
+                entries_list = parsed.get("recipes") if isinstance(parsed, dict) else parsed
+                if isinstance(entries_list, list) and entries_list:
+                    entries_list.pop()
+            entries = index_by_id(parsed, [r["id"] for r in payloads])
+        except Exception as e:
+            print(f"  ⚠ Packed review failed ({str(e)[:100]}); reviewing its recipes one by one")
+    
+    results = []
+    for recipe_path in recipe_paths:
+        recipe = recipes[recipe_path]
+        reviewed = entries.get(recipe.get("id"))
+        if recipe_path in packed and valid_review(reviewed, patch):
+            reviewed.pop("id", None)
+            response_cache.count_miss()
+            # Store under the single-recipe key, so reruns hit either way
+            response_cache.put(review_prompt(review_payload(recipe), patch)[1], json.dumps(reviewed, ensure_ascii=False), model=MODEL)
+            apply = apply_review_patch if patch else apply_review
+            results.append((recipe_path, apply(recipe_path, recipe, reviewed)))
+        else:
+            results.append((recipe_path, await review_recipe(recipe_path, patch)))
+    return results
+
+
 def main():
     print("=" * 70)
     print("  Translation Quality Review - 87 Recipes × 4 Languages")
     print(f"  Model: {MODEL}")
-    print(f"  Workers: {MAX_WORKERS}")
+    print(f"  Max concurrent requests: {MAX_WORKERS}")
+    if "--patch" in sys.argv:
+        print("  Mode: --patch (reviewer returns fixes only)")
+    if "--all" not in sys.argv:
+        print("  Selection: recipes flagged by local checks (--all for every recipe)")
     print("=" * 70)
     print()
     
     # Check for retry mode
     retry_mode = "--retry" in sys.argv
+    # --patch: the reviewer returns only JSON Patch fixes instead of the whole recipe
+    patch = "--patch" in sys.argv
+    response_cache.read = "--no-cache" not in sys.argv
     
     # Collect recipe files
     if retry_mode and Path("translation_review_log.json").exists():
@@ -191,6 +412,23 @@ def main():
     else:
         recipe_files = sorted(RECIPES_DIR.glob("*.json"))
     
+    # Only recipes the local checks flag, unless --all
+    if "--all" not in sys.argv:
+        flagged = {}
+        for f in recipe_files:
+            issues = review_issues(f)
+            if issues:
+                flagged[f] = issues
+        print(f"Local checks: {len(flagged)}/{len(recipe_files)} recipes flagged for review")
+        for f, issues in flagged.items():
+            print(f"  ⚠ {f.stem}: {'; '.join(issues[:3])}" + (f" (+{len(issues) - 3} more)" if len(issues) > 3 else ""))
+        print()
+        recipe_files = list(flagged)
+    
+    # --resume: skip recipes the interrupted run already reviewed
+    todo = set(journal.start_run([f.stem for f in recipe_files], resume="--resume" in sys.argv))
+    recipe_files = [f for f in recipe_files if f.stem in todo]
+    
     total = len(recipe_files)
     print(f"Found {total} recipes to review")
     print()
@@ -201,39 +439,65 @@ def main():
     total_changes = 0
     all_changes = []
     
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = {
-            executor.submit(review_recipe, f): f 
-            for f in recipe_files
-        }
-        
+    # --pack [N]: several recipes per request, sized to PACK_TOKEN_BUDGET
+    pack = 0
+    if "--pack" in sys.argv:
+        i = sys.argv.index("--pack")
+        pack = int(sys.argv[i + 1]) if i + 1 < len(sys.argv) and sys.argv[i + 1].isdigit() else PACK_MAX_RECIPES
+    if pack > 1:
+        batches = pack_items(recipe_files, pack_cost, PACK_TOKEN_BUDGET, pack)
+        print(f"Packing: {len(batches)} requests of up to {pack} recipes")
+        print()
+    else:
+        batches = [[f] for f in recipe_files]
+    
+    async def review_batch(batch):
+        if len(batch) == 1:
+            return [(batch[0], await review_recipe(batch[0], patch))]
+        return await review_pack(batch, patch)
+    
+    async def run():
+        nonlocal success, errors, total_changes
         completed = 0
-        for future in as_completed(futures):
-            completed += 1
-            recipe_id, name_en, ok, message, changes = future.result()
-            
-            if ok:
-                success += 1
-                if changes:
-                    total_changes += len(changes)
-                    all_changes.extend([(recipe_id, c) for c in changes])
-                    status = f"✏️  {len(changes)} fixes"
-                else:
-                    status = "✓ perfect"
-            else:
-                errors += 1
-                status = f"❌ {message}"
-            
-            # Verbose output
-            print(f"[{completed:>3}/{total}] {status:<20} {name_en}")
+        async for batch, batch_results, error in iter_completed(review_batch, batches):
+            if error is not None:
+                batch_results = [(p, (p.stem, p.stem, False, f"Error: {str(error)[:100]}", [])) for p in batch]
+            for recipe_path, result in batch_results:
+                completed += 1
+                report(recipe_path, result, completed)
+    
+    def report(recipe_path, result, completed):
+        nonlocal success, errors, total_changes
+        recipe_id, name_en, ok, message, changes = result
+        if ok:
+            journal.done(recipe_path.stem, recipe_path)
+            record_clean_review(recipe_path)
+        else:
+            journal.failed(recipe_path.stem, message)
+        
+        if ok:
+            success += 1
             if changes:
-                for c in changes:
-                    field = c.get("field", "?")
-                    reason = c.get("reason", "")
-                    print(f"         └─ {field}: {reason}")
-            
-            sys.stdout.flush()
+                total_changes += len(changes)
+                all_changes.extend([(recipe_id, c) for c in changes])
+                status = f"✏️  {len(changes)} fixes"
+            else:
+                status = "✓ perfect"
+        else:
+            errors += 1
+            status = f"❌ {message}"
+        
+        # Verbose output
+        print(f"[{completed:>3}/{total}] {status:<20} {name_en}")
+        if changes:
+            for c in changes:
+                field = c.get("field", "?")
+                reason = c.get("reason", "")
+                print(f"         └─ {field}: {reason}")
+        
+        sys.stdout.flush()
     
+    asyncio.run(run())
     elapsed = time.time() - start_time
     
     print()
@@ -242,6 +506,10 @@ def main():
     print(f"  Success: {success}/{total}")
     print(f"  Errors: {errors}")
     print(f"  Total changes: {total_changes}")
+    print(f"  LLM cache: {response_cache.summary()}")
+    print(f"  Gemini: {gemini.summary()}")
+    if telemetry.records:
+        print(telemetry.report())
     print("=" * 70)
     
     # Write/merge change log
@@ -249,12 +517,10 @@ def main():
     if retry_mode and log_path.exists():
         existing = json.load(open(log_path))
         merged = existing + all_changes
-        with open(log_path, 'w', encoding='utf-8') as f:
-            json.dump(merged, f, ensure_ascii=False, indent=2)
+        write_json(log_path, merged)
         print(f"\n  Change log merged: {log_path} ({len(existing)} existing + {len(all_changes)} new)")
     elif all_changes:
-        with open(log_path, 'w', encoding='utf-8') as f:
-            json.dump(all_changes, f, ensure_ascii=False, indent=2)
+        write_json(log_path, all_changes)
         print(f"\n  Change log: {log_path}")
     
     # Update TRANSLATION_REVIEW.md
@@ -278,7 +544,7 @@ def main():
             for c in changes:
                 md += f"- `{c.get('field', '?')}`: {c.get('reason', '')}\n"
     
-    Path("TRANSLATION_REVIEW.md").write_text(md)
+    atomic_save(lambda path: Path(path).write_text(md), Path("TRANSLATION_REVIEW.md"))
     print(f"  Updated: TRANSLATION_REVIEW.md")
 
 
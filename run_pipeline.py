@@ -0,0 +1,714 @@
+#!/usr/bin/env python3
+"""
+Recipe Pipeline Runner
+
+Runs the recipe pipeline as a DAG over per-recipe artifacts and recomputes
+only what is downstream of a change:
+
+    source ─ canonize ─ veganize ─ intro ─ multilingualize ─ review ─ images ─┐
+                                                              icons ──────────┴─ build ─ deploy
+
+canonize, veganize and intro write data/recipes_canonical/<id>.json;
+multilingualize and review write data/recipes_multilingual_v2/<id>.json;
+images writes data/images/generated/<id>_dish.png; icons, build and deploy
+are corpus-wide.
+
+Every (stage, recipe) node has a key: the hash of the stage version and the
+hashes of what it consumes (the output recorded for its upstream stage; the
+source file for canonize; name, description and ingredients for images).
+A node runs only when its key differs from the one recorded in the state
+store (pipeline_state.py), so touching one source recipe reruns that recipe's
+chain, and build.py --incremental then re-renders just its page. Recipes run
+concurrently through one shared Gemini request layer; icons and images run
+alongside the recipe chains.
+
+Files changed outside the runner (a hand-edited canonical recipe, a new
+multilingual JSON) are adopted as the output of the last stage that writes
+them, so their downstream stages rerun but the edit itself is kept.
+
+Usage:
+    python run_pipeline.py                         # everything except images and deploy
+    python run_pipeline.py --dry-run               # show what would run
+    python run_pipeline.py --recipe shakshuka      # one recipe's chain, then build
+    python run_pipeline.py --from review           # force review and everything after it
+    python run_pipeline.py --stages review,build   # only these stages
+    python run_pipeline.py --deploy --push         # also deploy to GitHub Pages
+"""
+
+import os
+import re
+import csv
+import sys
+import json
+import shlex
+import asyncio
+import hashlib
+import argparse
+import importlib
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from llm_cache import ResponseCache
+from gemini_async import GeminiRequestLayer, iter_completed
+from pipeline_journal import file_sha256
+from pipeline_state import PipelineState
+from artifact_writer import write_json, write_json_unique
+from llm_telemetry import telemetry
+
+
+ROOT = Path(__file__).parent
+
+# Paths, relative to the repo root like the stage scripts' own
+SOURCE_DIRS = [Path("data/safed_recipes")]  # as in canonize_recipes.py
+CANONICAL_DIR = Path("data/recipes_canonical")
+MULTILINGUAL_DIR = Path("data/recipes_multilingual_v2")
+IMAGES_DIR = Path("data/images")
+INGREDIENTS_CSV = Path("recipes_ingredients_matrix.csv")
+
+STATE_VERSION = 1
+IMAGE_WORKERS = 4  # image generation is synchronous; run this many in threads
+
+# Shared by every stage module (their own module-level instances are replaced)
+gemini = GeminiRequestLayer(max_concurrency=30)
+response_cache = ResponseCache()
+pipeline_state = PipelineState()
+
+
+def vprint(*args, **kwargs):
+    """Print with flush for real-time output."""
+    print(*args, **kwargs, flush=True)
+
+
+def hash_json(data: Any) -> str:
+    """Hash JSON-serializable data independent of key order."""
+    text = json.dumps(data, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _normalize(recipe_id: str) -> str:
+    return recipe_id.lower().replace("_", "").replace("-", "")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Stages
+# ─────────────────────────────────────────────────────────────────────────────
+
+class Stage:
+    """One pipeline stage: a node per recipe, or a single corpus-wide node."""
+
+    def __init__(
+        self,
+        name: str,
+        deps: List[str],
+        version: str = "1",
+        artifact: Optional[str] = None,
+        per_recipe: bool = True,
+    ):
+        """
+        Args:
+            name: Stage name (also its --stages / --from name)
+            deps: Upstream stages whose outputs this stage consumes
+            version: Bump to rerun the stage for every recipe (e.g. after a prompt change)
+            artifact: File kind the stage writes ("canonical", "multilingual", "image")
+            per_recipe: False for corpus-wide stages
+        """
+        self.name = name
+        self.deps = deps
+        self.version = version
+        self.artifact = artifact
+        self.per_recipe = per_recipe
+
+
+STAGES: Dict[str, Stage] = {s.name: s for s in [
+    Stage("canonize", [], artifact="canonical"),
+    Stage("veganize", ["canonize"], artifact="canonical"),
+    Stage("intro", ["veganize"], artifact="canonical"),
+    Stage("multilingualize", ["intro"], artifact="multilingual"),
+    Stage("review", ["multilingualize"], artifact="multilingual"),
+    Stage("images", ["review"], artifact="image"),
+    Stage("icons", [], per_recipe=False),
+    Stage("build", ["review", "images", "icons"], per_recipe=False),
+    Stage("deploy", ["build"], per_recipe=False),
+]}
+STAGE_ORDER = list(STAGES)
+RECIPE_CHAIN = ["veganize", "intro", "multilingualize", "review", "images"]  # after canonize
+
+# Artifact kind → stages that write it, in pipeline order
+WRITERS = {
+    kind: [s.name for s in STAGES.values() if s.artifact == kind]
+    for kind in ("canonical", "multilingual", "image")
+}
+
+DEFAULT_STAGES = [s for s in STAGE_ORDER if s not in ("images", "deploy")]
+
+
+def canonical_path(recipe_id: str) -> Path:
+    return CANONICAL_DIR / f"{recipe_id}.json"
+
+
+def multilingual_path(recipe_id: str, records: Dict[str, Dict]) -> Path:
+    """
+    Multilingual file for a recipe: the one last recorded, else the
+    existing file whose name matches ignoring underscores (looked up in the
+    state store, as multilingualize_recipes.find_existing_multilingual_file does).
+    """
+    for stage in reversed(WRITERS["multilingual"]):
+        output = records.get(stage, {}).get("output")
+        if output and Path(output).exists():
+            return Path(output)
+    exact = MULTILINGUAL_DIR / f"{recipe_id}.json"
+    if exact.exists():
+        return exact
+    return pipeline_state.file("multilingual", recipe_id, directory=MULTILINGUAL_DIR) or exact
+
+
+def image_path(recipe_id: str) -> Path:
+    return IMAGES_DIR / "generated" / f"{recipe_id}_dish.png"
+
+
+def artifact_path(kind: str, recipe_id: str, records: Dict[str, Dict]) -> Path:
+    if kind == "canonical":
+        return canonical_path(recipe_id)
+    if kind == "multilingual":
+        return multilingual_path(recipe_id, records)
+    return image_path(recipe_id)
+
+
+def image_fields(path: Path) -> Optional[str]:
+    """Hash of the fields the dish image is generated from."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            recipe = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    fields = {k: recipe.get(k) for k in ("name", "description", "ingredients", "image_prompt")}
+    return hash_json(fields)
+
+
+def ingredient_names() -> List[str]:
+    """Ingredient columns of the matrix CSV (what the icon stage covers)."""
+    if not INGREDIENTS_CSV.exists():
+        return []
+    with open(INGREDIENTS_CSV, "r", encoding="utf-8") as f:
+        header = next(csv.reader(f), [])
+    return [name.strip() for name in header[2:] if name.strip()]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Stage runners (import the stage scripts lazily: --dry-run needs no SDKs)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def stage_module(name: str):
+    """Import a stage script and point it at the shared request layer and cache."""
+    module = importlib.import_module(name)
+    if hasattr(module, "gemini"):
+        module.gemini = gemini
+    if hasattr(module, "response_cache"):
+        module.response_cache = response_cache
+    if hasattr(module, "pipeline_state"):
+        module.pipeline_state = pipeline_state
+    return module
+
+
+async def run_canonize(source: Path, recipe_id: Optional[str]) -> Path:
+    """
+    Canonize one source file.
+
+    Args:
+        source: Source recipe JSON
+        recipe_id: The recipe it was canonized to before (its file is overwritten),
+            or None for a new source
+    """
+    canonize = stage_module("canonize_recipes")
+    with open(source, "r", encoding="utf-8") as f:
+        recipe = json.load(f)
+    recipe["_source_file"] = str(source)
+    recipe["_source_dir"] = source.parent.name
+
+    canonical = await canonize.canonize_recipe(recipe)
+    if recipe_id:
+        output_file = write_json(canonical_path(recipe_id), canonical)
+    else:
+        base_id = re.sub(r"[^\w\-]", "_", canonical.get("id", source.stem).lower())
+        # Don't overwrite a recipe canonized from another source
+        output_file = write_json_unique(CANONICAL_DIR, base_id, canonical)
+        recipe_id = output_file.stem
+    canonize.record_canonical(recipe_id, str(source), output_file)
+    return output_file
+
+
+async def run_veganize(path: Path, total: int) -> Path:
+    veganize = stage_module("veganize_recipes")
+    # The runner decides staleness, not the script's own done check
+    if not await veganize.process_recipe(path, total, force=True):
+        raise RuntimeError("veganize failed")
+    return path
+
+
+async def run_intro(path: Path, total: int) -> Path:
+    intro = stage_module("generate_intro_paragraphs")
+    result = await intro.process_single_recipe(path, total)
+    if not result["success"]:
+        raise RuntimeError(result["error"])
+    return path
+
+
+async def run_multilingualize(path: Path, total: int) -> Path:
+    multilingualize = stage_module("multilingualize_recipes")
+    result = await multilingualize.process_single_recipe(path, total, diff=True)
+    if not result["success"]:
+        raise RuntimeError(result["error"])
+    return Path(result["output_file"])
+
+
+async def run_review(path: Path, total: int) -> Path:
+    review = stage_module("review_translations")
+    # Only recipes the local consistency checks flag go to the model
+    if not review.review_issues(path):
+        vprint(f"  ✓ {path.stem}: passed local translation checks, no review needed")
+        return path
+    # Reviews come back as patches: only the fixes, applied locally
+    recipe_id, name_en, ok, message, changes = await review.review_recipe(path, patch=True)
+    if not ok:
+        raise RuntimeError(message)
+    review.record_clean_review(path)
+    vprint(f"  ✓ Reviewed {name_en}: {message}")
+    return path
+
+
+_image_slots: Optional[asyncio.Semaphore] = None
+
+
+async def run_images(path: Path, total: int) -> Path:
+    global _image_slots
+    images = stage_module("generate_cookbook_images")
+    if _image_slots is None:
+        _image_slots = asyncio.Semaphore(IMAGE_WORKERS)
+    with open(path, "r", encoding="utf-8") as f:
+        recipe = json.load(f)
+    async with _image_slots:
+        generator = images.CookbookImageGenerator(output_dir=str(IMAGES_DIR / "generated"))
+        results = await asyncio.to_thread(generator.generate_recipe_images, recipe, True, False)
+    output = image_path(recipe.get("id", path.stem))
+    if not results.get("dish") or not output.exists():
+        raise RuntimeError("no dish image generated")
+    return output
+
+
+async def run_icons() -> None:
+    icons = stage_module("generate_ingredient_icons")
+    generator = icons.IngredientIconGenerator()
+    failed = []
+    async for ingredient, result, error in iter_completed(generator.generate_icon, ingredient_names()):
+        if error is not None or not result[0]:
+            failed.append(ingredient)
+        elif "Skipped" not in result[1]:
+            vprint(result[1])
+    if failed:
+        raise RuntimeError(f"{len(failed)} icons failed: {', '.join(failed[:5])}")
+
+
+async def run_script(*command: str) -> None:
+    """Run a gen_book script with the current interpreter, streaming its output."""
+    process = await asyncio.create_subprocess_exec(sys.executable, *command)
+    if await process.wait() != 0:
+        raise RuntimeError(f"{' '.join(command)} exited with {process.returncode}")
+
+
+RECIPE_RUNNERS: Dict[str, Callable] = {
+    "veganize": run_veganize,
+    "intro": run_intro,
+    "multilingualize": run_multilingualize,
+    "review": run_review,
+    "images": run_images,
+}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Scheduler
+# ─────────────────────────────────────────────────────────────────────────────
+
+class PipelineRunner:
+    """Plans and runs the DAG against the recorded state."""
+
+    def __init__(
+        self,
+        stages: List[str],
+        recipes: Optional[List[str]] = None,
+        force_from: Optional[str] = None,
+        dry_run: bool = False,
+        build_args: Optional[List[str]] = None,
+        push: bool = False,
+    ):
+        """
+        Args:
+            stages: Stages allowed to run; others pass their input through
+            recipes: Limit per-recipe stages to these recipe ids
+            force_from: Treat this stage and everything after it as stale
+            dry_run: Report what would run without running it or saving state
+            build_args: Extra arguments for build.py
+            push: Pass --push to deploy_github.py
+        """
+        self.selected = set(stages)
+        self.recipes = set(recipes) if recipes else None
+        self.forced = set(STAGE_ORDER[STAGE_ORDER.index(force_from):]) if force_from else set()
+        self.dry_run = dry_run
+        self.build_args = build_args or []
+        self.push = push
+        self.state = pipeline_state.runner_state(STATE_VERSION)
+        self.counts: Dict[str, Dict[str, int]] = {name: {} for name in STAGE_ORDER}
+        self.planned: Dict[str, List[str]] = {name: [] for name in STAGE_ORDER}
+        self.failures: List[str] = []
+        self._totals: Dict[str, int] = {}
+
+    # ── bookkeeping ────────────────────────────────────────────────────────
+
+    def _count(self, stage: str, outcome: str) -> None:
+        self.counts[stage][outcome] = self.counts[stage].get(outcome, 0) + 1
+
+    def put(self, recipe_id: Optional[str], stage: str, record: Dict[str, Any]) -> None:
+        """Record a node (recipe_id None for a corpus-wide stage); dry runs only keep it in memory."""
+        (self.state["global"] if recipe_id is None else self.records(recipe_id))[stage] = record
+        if not self.dry_run:
+            pipeline_state.save_node(recipe_id, stage, record)
+
+    def link(self, source: Path, recipe_id: str) -> None:
+        self.state["sources"][str(source)] = recipe_id
+        if not self.dry_run:
+            pipeline_state.save_source(str(source), recipe_id)
+
+    def records(self, recipe_id: str) -> Dict[str, Dict]:
+        return self.state["recipes"].setdefault(recipe_id, {})
+
+    def wanted(self, recipe_id: str) -> bool:
+        return self.recipes is None or recipe_id in self.recipes
+
+    # ── keys ───────────────────────────────────────────────────────────────
+
+    def source_for(self, recipe_id: str) -> Optional[Path]:
+        for source, rid in self.state["sources"].items():
+            if rid == recipe_id:
+                return Path(source)
+        return None
+
+    def key(self, stage: Stage, recipe_id: Optional[str] = None) -> str:
+        """Hash of everything the node consumes."""
+        if stage.name == "canonize":
+            source = self.source_for(recipe_id)
+            inputs = [file_sha256(source) if source else None]
+        elif stage.name == "images":
+            inputs = [image_fields(multilingual_path(recipe_id, self.records(recipe_id)))]
+        elif stage.name == "icons":
+            inputs = ingredient_names()
+        elif stage.name == "build":
+            inputs = [self.global_key("icons")] + [
+                [rid, records.get("review", {}).get("hash"), records.get("images", {}).get("hash")]
+                for rid, records in sorted(self.state["recipes"].items())
+            ]
+        elif stage.name == "deploy":
+            inputs = [self.global_key("build")]
+        else:
+            records = self.records(recipe_id)
+            inputs = [records.get(dep, {}).get("hash") for dep in stage.deps]
+        return hash_json([stage.name, stage.version, inputs])
+
+    def global_key(self, name: str) -> Optional[str]:
+        return self.state["global"].get(name, {}).get("key")
+
+    # ── planning ───────────────────────────────────────────────────────────
+
+    def discover(self) -> List[str]:
+        """Known recipe ids: canonical files plus multilingual-only recipes."""
+        ids = {f.stem for f in CANONICAL_DIR.glob("*.json")} if CANONICAL_DIR.exists() else set()
+        normalized = {_normalize(rid) for rid in ids}
+        for f in sorted(MULTILINGUAL_DIR.glob("*.json")):
+            if _normalize(f.stem) not in normalized:
+                ids.add(f.stem)
+        ids.update(self.state["recipes"])
+        return sorted(ids)
+
+    def map_sources(self, recipe_ids: List[str]) -> List[Path]:
+        """
+        Link source files to recipe ids. Unmapped sources whose name matches
+        an existing canonical recipe are linked to it; the rest are new.
+
+        Returns:
+            Source files not yet linked to any recipe
+        """
+        by_name = {_normalize(rid): rid for rid in recipe_ids if canonical_path(rid).exists()}
+        linked = set(self.state["sources"].values())
+        new = []
+        for source_dir in SOURCE_DIRS:
+            if not source_dir.exists():
+                continue
+            for source in sorted(source_dir.glob("*.json")):
+                if str(source) in self.state["sources"]:
+                    continue
+                rid = by_name.get(_normalize(source.stem))
+                if rid and rid not in linked:
+                    self.link(source, rid)
+                    linked.add(rid)
+                else:
+                    new.append(source)
+        return new
+
+    def adopt(self, recipe_id: str) -> None:
+        """
+        Take files changed outside the runner as the output of the stages
+        that write them, so only their downstream stages rerun.
+        """
+        records = self.records(recipe_id)
+        for kind, writers in WRITERS.items():
+            path = artifact_path(kind, recipe_id, records)
+            current = file_sha256(path)
+            if current is None:
+                continue
+            # A file the runner wrote itself matches one of its writers' records,
+            # even if a later writer failed (that writer must stay stale)
+            recorded = [records[w] for w in writers if w in records]
+            if any(r.get("hash") == current for r in recorded):
+                continue
+            for writer in writers:
+                self.put(recipe_id, writer, {
+                    "key": self.key(STAGES[writer], recipe_id),
+                    "hash": current,
+                    "output": str(path),
+                    "adopted": True,
+                })
+
+    # ── nodes ──────────────────────────────────────────────────────────────
+
+    def stale(self, stage: Stage, record: Optional[Dict], key: str) -> bool:
+        return stage.name in self.forced or not record or record.get("key") != key
+
+    async def recipe_node(self, stage: Stage, recipe_id: str) -> bool:
+        """
+        Bring one (stage, recipe) node up to date.
+
+        Returns:
+            False if it failed (its downstream nodes are then skipped)
+        """
+        records = self.records(recipe_id)
+        key = self.key(stage, recipe_id)
+        record = records.get(stage.name)
+        if not self.stale(stage, record, key):
+            self._count(stage.name, "up to date")
+            return True
+
+        if stage.name == "images" and (IMAGES_DIR / "current" / recipe_id / "dish.png").exists():
+            self._count(stage.name, "curated")  # hand-picked images are never replaced
+            return True
+
+        if stage.name not in self.selected:
+            if any(stage.name in STAGES[name].deps for name in RECIPE_CHAIN):
+                # Not running this stage: pass its input through to the next
+                # one, and keep the old key so it stays stale until selected
+                self.put(recipe_id, stage.name, {
+                    "key": record.get("key") if record else None,
+                    "hash": records.get(stage.deps[0], {}).get("hash"),
+                    "skipped": True,
+                })
+            self._count(stage.name, "not selected")
+            return True
+
+        input_kind = STAGES[stage.deps[0]].artifact
+        input_path = artifact_path(input_kind, recipe_id, records)
+        if not input_path.exists():
+            self._count(stage.name, "no input")
+            return True
+
+        self.planned[stage.name].append(recipe_id)
+        if self.dry_run:
+            self.put(recipe_id, stage.name, {"key": key, "hash": f"dry-run:{key}"})
+            return True
+
+        try:
+            with telemetry.stage(stage.name):
+                output = await RECIPE_RUNNERS[stage.name](input_path, self._totals.get(stage.name, 0))
+        except Exception as e:
+            self._count(stage.name, "failed")
+            self.failures.append(f"{stage.name}/{recipe_id}: {str(e)[:200]}")
+            vprint(f"❌ {stage.name} failed for {recipe_id}: {e}")
+            return False
+        self.put(recipe_id, stage.name, {"key": key, "hash": file_sha256(output), "output": str(output)})
+        self._count(stage.name, "ran")
+        return True
+
+    async def canonize_node(self, source: Path) -> Optional[str]:
+        """Canonize a source file if it changed; returns its recipe id (None on failure)."""
+        stage = STAGES["canonize"]
+        recipe_id = self.state["sources"].get(str(source))
+        if recipe_id:
+            record = self.records(recipe_id).get("canonize")
+            key = self.key(stage, recipe_id)
+            if not self.stale(stage, record, key) and canonical_path(recipe_id).exists():
+                self._count("canonize", "up to date")
+                return recipe_id
+        if "canonize" not in self.selected:
+            self._count("canonize", "not selected")
+            return recipe_id
+
+        self.planned["canonize"].append(recipe_id or f"(new) {source.name}")
+        if self.dry_run:
+            if recipe_id:
+                self.put(recipe_id, "canonize", {"key": "dry-run", "hash": "dry-run"})
+            return recipe_id
+
+        try:
+            with telemetry.stage("canonize"):
+                output = await run_canonize(source, recipe_id)
+        except Exception as e:
+            self._count("canonize", "failed")
+            self.failures.append(f"canonize/{source.name}: {str(e)[:200]}")
+            vprint(f"❌ canonize failed for {source.name}: {e}")
+            return None
+        recipe_id = output.stem
+        self.link(source, recipe_id)
+        self.put(recipe_id, "canonize", {
+            "key": self.key(stage, recipe_id),
+            "hash": file_sha256(output),
+            "output": str(output),
+        })
+        self._count("canonize", "ran")
+        vprint(f"✅ Canonized {source.name} → {output.name}")
+        return recipe_id
+
+    async def recipe_chain(self, recipe_id: Optional[str], source: Optional[Path] = None) -> None:
+        """canonize (if the recipe has a source) and then the per-recipe stages in order."""
+        if source is not None:
+            recipe_id = await self.canonize_node(source)
+        if recipe_id is None or not self.wanted(recipe_id):
+            return
+        for name in RECIPE_CHAIN:
+            if not await self.recipe_node(STAGES[name], recipe_id):
+                return
+
+    async def global_node(self, name: str, run: Callable) -> bool:
+        stage = STAGES[name]
+        key = self.key(stage)
+        record = self.state["global"].get(name)
+        if not self.stale(stage, record, key):
+            self._count(name, "up to date")
+            return True
+        if name not in self.selected:
+            self._count(name, "not selected")
+            return True
+        self.planned[name].append("(all)")
+        if self.dry_run:
+            self.put(None, name, {"key": f"dry-run:{key}"})
+            return True
+        vprint(f"\n▶ {name}")
+        try:
+            with telemetry.stage(name):
+                await run()
+        except Exception as e:
+            self._count(name, "failed")
+            self.failures.append(f"{name}: {str(e)[:200]}")
+            vprint(f"❌ {name} failed: {e}")
+            return False
+        self.put(None, name, {"key": key})
+        self._count(name, "ran")
+        return True
+
+    # ── run ────────────────────────────────────────────────────────────────
+
+    async def run(self) -> None:
+        recipe_ids = self.discover()
+        new_sources = self.map_sources(recipe_ids)
+        for recipe_id in recipe_ids:
+            self.adopt(recipe_id)
+
+        # Progress totals for the stage scripts' "[n/total]" lines
+        wanted = len([rid for rid in recipe_ids if self.wanted(rid)])
+        for name in STAGE_ORDER:
+            self._totals[name] = wanted + (len(new_sources) if self.recipes is None else 0)
+
+        sourced = {rid: Path(source) for source, rid in self.state["sources"].items() if Path(source).exists()}
+        chains = [
+            self.recipe_chain(rid, sourced.get(rid))
+            for rid in recipe_ids if self.wanted(rid)
+        ]
+        if self.recipes is None:
+            chains += [self.recipe_chain(None, source) for source in new_sources]
+
+        # Icons don't depend on any recipe: run them alongside the chains
+        icons = asyncio.ensure_future(self.global_node("icons", run_icons))
+        await asyncio.gather(*chains)
+        await icons
+        if self.counts["canonize"].get("ran"):
+            # New ingredients are journaled as recipes are canonized; merge them once
+            stage_module("canonize_recipes").update_ingredients_dictionary()
+
+        build = ["gen_book/build.py", "--incremental", *self.build_args]
+        if await self.global_node("build", lambda: run_script(*build)):
+            deploy = ["gen_book/deploy_github.py"] + (["--push"] if self.push else [])
+            await self.global_node("deploy", lambda: run_script(*deploy))
+
+    def report(self) -> None:
+        vprint("\n" + "=" * 60)
+        vprint("📊 PIPELINE " + ("PLAN (dry run)" if self.dry_run else "SUMMARY"))
+        vprint("=" * 60)
+        for name in STAGE_ORDER:
+            if self.dry_run:
+                planned = self.planned[name]
+                preview = ", ".join(planned[:6]) + (f", … (+{len(planned) - 6})" if len(planned) > 6 else "")
+                vprint(f"  {name:<16} {len(planned):>4} to run" + (f"  [{preview}]" if planned else ""))
+            else:
+                counts = self.counts[name]
+                vprint(f"  {name:<16} " + (", ".join(f"{n} {outcome}" for outcome, n in counts.items()) or "-"))
+        if self.failures:
+            vprint(f"\n❌ {len(self.failures)} failed:")
+            for failure in self.failures:
+                vprint(f"   - {failure}")
+        if not self.dry_run:
+            vprint(f"\n📡 Gemini: {gemini.summary()}")
+            vprint(f"💾 LLM cache: {response_cache.summary()}")
+            if telemetry.records:
+                vprint(telemetry.report())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the recipe pipeline, recomputing only what changed")
+    parser.add_argument("--stages", default=",".join(DEFAULT_STAGES),
+                        help=f"Comma-separated stages to run (default: {','.join(DEFAULT_STAGES)}; all: {','.join(STAGE_ORDER)})")
+    parser.add_argument("--recipe", "-r", action="append", help="Limit per-recipe stages to this recipe id (repeatable)")
+    parser.add_argument("--from", dest="force_from", choices=STAGE_ORDER, help="Rerun this stage and everything after it")
+    parser.add_argument("--dry-run", "-n", action="store_true", help="Show what would run without running it")
+    parser.add_argument("--workers", "-w", type=int, default=30, help="Maximum concurrent Gemini requests (adapts below this)")
+    parser.add_argument("--build-args", default="", help='Extra build.py arguments, e.g. "--web-only -j 4"')
+    parser.add_argument("--deploy", action="store_true", help="Also run the deploy stage")
+    parser.add_argument("--push", action="store_true", help="Push the deployment (implies --deploy)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached LLM responses (new responses are still cached)")
+    args = parser.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+    if args.deploy or args.push:
+        stages.append("deploy")
+
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT))
+    gemini.set_max_concurrency(args.workers)
+    response_cache.read = not args.no_cache
+
+    runner = PipelineRunner(
+        stages,
+        recipes=args.recipe,
+        force_from=args.force_from,
+        dry_run=args.dry_run,
+        build_args=shlex.split(args.build_args),
+        push=args.push,
+    )
+    vprint(f"🔗 Pipeline: {' → '.join(s for s in STAGE_ORDER if s in runner.selected)}")
+    if args.dry_run:
+        vprint("   (dry run: nothing is executed)")
+    asyncio.run(runner.run())
+    runner.report()
+    if runner.failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
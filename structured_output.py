@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Structured Output
+
+Response schemas, local JSON repair and targeted re-asks for the pipelines
+that expect JSON back from Gemini (canonize, veganize, multilingualize,
+review).
+
+Every request asks for JSON mode (response_mime_type="application/json"), so
+the model can no longer wrap its answer in markdown or prose. Stages with a
+closed structure (multilingual recipes, translation review) also send their
+schema to the API. Canonical recipes and vegan updates carry open ingredient
+objects (measurements, notes, ...), which a response schema would strip, so
+their schema is only enforced locally.
+
+A response then goes through three steps:
+1. Local repair: fences, prose around the object, trailing commas, raw
+   newlines in strings and output cut off at max_output_tokens (unclosed
+   strings and brackets are closed at the last complete value).
+2. Validation against the schema (types, required fields, non-empty strings)
+   plus the stage's own checks (e.g. the same number of ingredients in every
+   language). The result is a list of invalid top-level fields.
+3. A re-ask for only those fields. The prompt carries the valid part of the
+   answer, so the model outputs a few fields instead of the whole recipe again.
+   A full retry happens only when nothing could be parsed.
+
+Schemas use the Gemini (OpenAPI subset) format accepted by both SDKs.
+
+Usage:
+    async def ask(prompt, schema, attempt):
+        response = await gemini.call(lambda: model.generate_content_async(
+            prompt, generation_config=genai.GenerationConfig(**json_config(schema), temperature=0.3)))
+        return response_text(response)
+
+    result = await request_json(ask, prompt, CANONICAL_SCHEMA, model=MODEL, stage="canonize")
+"""
+
+import re
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from llm_telemetry import telemetry
+
+
+LANGUAGES = ("he", "es", "ar", "en")
+
+
+class StructuredOutputError(ValueError):
+    """The model's answer could not be turned into valid JSON for the schema."""
+
+
+# ============================================================================
+# SCHEMAS
+# ============================================================================
+
+def _string(nullable: bool = False) -> dict:
+    return {"type": "STRING", "nullable": True} if nullable else {"type": "STRING"}
+
+
+def object_schema(properties: dict, required: Optional[List[str]] = None, api: bool = True) -> dict:
+    """An OBJECT schema (all properties required by default; api=False for a local-only, open object)."""
+    schema = {"type": "OBJECT", "properties": properties, "required": list(required or properties)}
+    if not api:
+        schema["open"] = True  # extra properties allowed; never sent as a response schema
+    return schema
+
+
+def _array(items: dict) -> dict:
+    return {"type": "ARRAY", "items": items}
+
+
+LANG_STRINGS = object_schema({lang: _string() for lang in LANGUAGES})
+LANG_LISTS = object_schema({lang: _array(_string()) for lang in LANGUAGES})
+
+# canonize_recipes.py: the canonical English recipe (checked locally only)
+CANONICAL_SCHEMA = object_schema({
+    "id": _string(),
+    "name": _string(),
+    "name_hebrew": _string(nullable=True),
+    "description": _string(),
+    "meta": object_schema({}, [], api=False),
+    "ingredients": _array(object_schema({"ingredient_id": _string(nullable=True), "name": _string()}, ["name"], api=False)),
+    "steps": _array(object_schema({"instruction": _string()}, api=False)),
+}, ["id", "name", "description", "ingredients", "steps"], api=False)
+
+# veganize_recipes.py: the fields the veganizer updates (checked locally only)
+VEGAN_UPDATE_SCHEMA = object_schema({
+    "is_vegan": {"type": "BOOLEAN"},
+    "was_veganized": {"type": "BOOLEAN"},
+    "vegan_substitutions": _array(object_schema({"original": _string(), "replacement": _string()}, api=False)),
+    "ingredients": _array(object_schema({"name": _string()}, api=False)),
+    "intro_paragraph": _string(),
+    "image_generation_prompt": _string(),
+}, ["is_vegan", "was_veganized", "ingredients", "intro_paragraph", "image_generation_prompt"], api=False)
+
+# multilingualize_recipes.py: the full 4-language recipe
+MULTILINGUAL_SCHEMA = object_schema({
+    "id": _string(),
+    "image": _string(),
+    "meta": object_schema({key: _string() for key in ("servings", "prep_time", "cook_time", "difficulty")}),
+    "name": LANG_STRINGS,
+    "description": LANG_STRINGS,
+    "ingredients": LANG_LISTS,
+    "steps": LANG_LISTS,
+})
+
+# review_translations.py: the corrected text fields plus the list of changes
+REVIEW_SCHEMA = object_schema({
+    "changes": _array(object_schema({"field": _string(), "reason": _string()})),
+    "name": LANG_STRINGS,
+    "description": LANG_STRINGS,
+    "ingredients": LANG_LISTS,
+    "steps": LANG_LISTS,
+})
+
+# review_translations.py --pack: one review per recipe, keyed by id
+REVIEW_PACK_SCHEMA = object_schema({
+    "recipes": _array(object_schema({"id": _string(), **REVIEW_SCHEMA["properties"]})),
+})
+
+# review_translations.py --patch: only the fixes, as JSON Patch "replace" operations
+REVIEW_PATCH_SCHEMA = object_schema({
+    "patch": _array(object_schema({
+        "op": {"type": "STRING", "enum": ["replace"]},
+        "path": _string(),
+        "value": _string(),
+        "reason": _string(),
+    })),
+})
+
+REVIEW_PATCH_PACK_SCHEMA = object_schema({
+    "recipes": _array(object_schema({"id": _string(), **REVIEW_PATCH_SCHEMA["properties"]})),
+})
+
+
+def api_schema(schema: dict) -> Optional[dict]:
+    """The schema to send as response_schema, or None if it's only checked locally."""
+    if schema.get("open"):
+        return None
+
+    def clean(node):
+        if isinstance(node, dict):
+            return {k: clean(v) for k, v in node.items() if k != "open"}
+        if isinstance(node, list):
+            return [clean(v) for v in node]
+        return node
+
+    return clean(schema)
+
+
+def json_config(schema: dict) -> Dict[str, Any]:
+    """Generation config entries for JSON mode (and the schema, if it's sent)."""
+    config: Dict[str, Any] = {"response_mime_type": "application/json"}
+    sent = api_schema(schema)
+    if sent is not None:
+        config["response_schema"] = sent
+    return config
+
+
+def lang_lists_check(*fields: str) -> Callable[[dict], List[str]]:
+    """Check that each of these {lang: [...]} fields has the same number of items in every language."""
+    def check(value: dict) -> List[str]:
+        bad = []
+        for field in fields:
+            lists = value.get(field)
+            if isinstance(lists, dict) and len({len(lists.get(lang) or []) for lang in LANGUAGES}) > 1:
+                bad.append(field)
+        return bad
+    return check
+
+
+# ============================================================================
+# REPAIR
+# ============================================================================
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)(?:\n?```|$)", re.DOTALL)
+
+
+def _scan(text: str) -> Tuple[List[str], List[str], bool, List[Tuple[int, List[str]]], Optional[str]]:
+    """
+    One pass over JSON text that drops trailing commas and escapes raw
+    control characters inside strings.
+
+    Returns:
+        (cleaned text as chunks, brackets still open at the end, ended inside
+         a string, cut points before each comma as (chunk index, open brackets),
+         the last key started in the outermost object)
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    cuts: List[Tuple[int, List[str]]] = []
+    in_string = escape = False
+    string_start = 0
+    expect_key = in_key = False
+    last_key: Optional[str] = None
+    for ch in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+                if in_key:
+                    last_key, in_key = "".join(out[string_start + 1:]), False
+            elif ch == "\n":
+                ch = "\\n"
+            elif ch == "\t":
+                ch = "\\t"
+            elif ch == "\r":
+                continue
+            out.append(ch)
+            continue
+        if ch == '"':
+            in_string = True
+            string_start = len(out)
+            if expect_key:
+                # a key of the outermost object; "" until it's complete
+                last_key, in_key, expect_key = "", True, False
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            expect_key = stack == ["}"]
+        elif ch in "}]":
+            # a trailing comma before the closer
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if stack:
+                stack.pop()
+        elif ch == ",":
+            cuts.append((len(out), list(stack)))
+            expect_key = stack == ["}"]
+        out.append(ch)
+    return out, stack, in_string, cuts, last_key
+
+
+def repair_json(text: Optional[str]) -> Tuple[Any, bool, Optional[str]]:
+    """
+    Parse model output as JSON, repairing common defects.
+
+    Args:
+        text: Raw response text
+
+    Returns:
+        (value or None, whether repair was needed, the top-level key that was
+         being written when the output was cut off if it was, else None)
+    """
+    if not text:
+        return None, False, None
+    text = text.strip()
+    try:
+        return json.loads(text), False, None
+    except json.JSONDecodeError:
+        pass
+
+    # Markdown fences, prose before/after the object
+    fenced = _FENCE.search(text)
+    if fenced:
+        text = fenced.group(1).strip()
+    start = min((i for i in (text.find("{"), text.find("[")) if i >= 0), default=-1)
+    if start < 0:
+        return None, True, None
+    text = text[start:]
+    end = max(text.rfind("}"), text.rfind("]"))
+    for candidate in ([text[:end + 1]] if end >= 0 else []) + [text]:
+        out, stack, in_string, _, _ = _scan(candidate)
+        if not stack and not in_string:
+            try:
+                return json.loads("".join(out)), True, None
+            except json.JSONDecodeError:
+                continue
+
+    # Cut off: close the open string and brackets, else back up to the last complete value
+    out, stack, in_string, cuts, last_key = _scan(text)
+    attempts = [("".join(out) + ('"' if in_string else ""), stack)]
+    attempts += [("".join(out[:index]), open_) for index, open_ in reversed(cuts[-50:])]
+    for prefix, open_ in attempts:
+        try:
+            # "" when the cut-off happened outside a top-level key (e.g. in a top-level array)
+            return json.loads(prefix + "".join(reversed(open_))), True, last_key or ""
+        except json.JSONDecodeError:
+            continue
+    return None, True, None
+
+
+# ============================================================================
+# VALIDATION
+# ============================================================================
+
+_TYPES = {
+    "STRING": str,
+    "BOOLEAN": bool,
+    "OBJECT": dict,
+    "ARRAY": list,
+}
+
+
+def validate(value: Any, schema: dict, path: str = "") -> List[str]:
+    """Paths of everything in value that doesn't match schema."""
+    if value is None:
+        return [] if schema.get("nullable") else [path or "$"]
+    kind = schema.get("type")
+    if kind in ("INTEGER", "NUMBER"):
+        ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+        return [] if ok else [path or "$"]
+    expected = _TYPES.get(kind)
+    if expected is not None and not isinstance(value, expected):
+        return [path or "$"]
+    if kind == "STRING" and not value.strip() and not schema.get("nullable"):
+        return [path or "$"]
+    if "enum" in schema and value not in schema["enum"]:
+        return [path or "$"]
+
+    errors: List[str] = []
+    if kind == "OBJECT":
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}.{key}" if path else key)
+        for key, sub in schema.get("properties", {}).items():
+            if key in value:
+                errors += validate(value[key], sub, f"{path}.{key}" if path else key)
+    elif kind == "ARRAY" and "items" in schema:
+        for i, item in enumerate(value):
+            errors += validate(item, schema["items"], f"{path}[{i}]")
+    return errors
+
+
+def invalid_fields(value: Any, schema: dict, check: Optional[Callable[[dict], List[str]]] = None) -> List[str]:
+    """Top-level fields of value that are missing or invalid (in schema order)."""
+    bad = {re.split(r"[.\[]", error, 1)[0] for error in validate(value, schema)}
+    if check is not None and isinstance(value, dict):
+        bad.update(check(value))
+    order = list(schema.get("properties", {}))
+    return sorted(bad, key=lambda field: order.index(field) if field in order else len(order))
+
+
+def field_schema(schema: dict, fields: List[str]) -> dict:
+    """An object schema for just these top-level fields."""
+    properties = schema.get("properties", {})
+    sub = {"type": "OBJECT", "properties": {f: properties[f] for f in fields if f in properties}, "required": list(fields)}
+    if schema.get("open"):
+        sub["open"] = True
+    return sub
+
+
+def parse_valid(text: Optional[str], schema: dict, check: Optional[Callable[[dict], List[str]]] = None) -> Optional[dict]:
+    """The parsed object if text is (repairably) valid for schema, else None."""
+    value, _, truncated = repair_json(text)
+    if not isinstance(value, dict) or truncated is not None or invalid_fields(value, schema, check):
+        return None
+    return value
+
+
+# ============================================================================
+# REQUEST LOOP
+# ============================================================================
+
+REASK_PROMPT = """{prompt}
+
+## YOUR PREVIOUS ANSWER WAS INCOMPLETE
+These fields were cut off, missing or invalid: {fields}
+The rest of your answer was fine:
+```json
+{partial}
+```
+
+Return ONLY a JSON object with exactly these keys: {fields}. Follow the same rules and structure as above."""
+
+
+def response_text(response: Any) -> Optional[str]:
+    """Text of a response, or None if it's empty or blocked."""
+    try:
+        text = response.text  # google.generativeai raises ValueError, google.genai returns None
+    except (ValueError, AttributeError, IndexError):
+        return None
+    return text.strip() if text and text.strip() else None
+
+
+async def request_json(
+    ask: Callable[[str, dict, int], Awaitable[Optional[str]]],
+    prompt: str,
+    schema: dict,
+    model: str,
+    stage: Optional[str] = None,
+    check: Optional[Callable[[dict], List[str]]] = None,
+    max_attempts: int = 3,
+    max_reasks: int = 2,
+    log: Callable[..., None] = print,
+) -> dict:
+    """
+    Ask for a JSON object and return it once it's valid for schema.
+
+    Args:
+        ask: ask(prompt, schema, attempt) sends one request (JSON mode, via
+            json_config(schema)) and returns the response text, or None if
+            the response was empty or blocked
+        prompt: The full prompt
+        schema: Expected response schema
+        model: Model name, for telemetry
+        stage: Pipeline stage, for telemetry
+        check: Extra validation returning invalid top-level fields
+        max_attempts: Full requests before giving up
+        max_reasks: Follow-up requests for invalid fields per full request
+        log: Progress output
+
+    Returns:
+        The validated object
+    """
+    problem = "no response"
+    for attempt in range(max_attempts):
+        text = await ask(prompt, schema, attempt)
+        value, repaired, truncated = repair_json(text)
+        if not isinstance(value, dict):
+            problem = "empty or blocked response" if text is None else "unparseable JSON"
+            if text is not None:
+                telemetry.event("parse_error", model, stage=stage, error=text[:200])
+            if attempt < max_attempts - 1:
+                log(f"    ⚠️  {problem.capitalize()}, retrying ({attempt + 2}/{max_attempts})...")
+            continue
+        if repaired:
+            telemetry.event("repaired", model, stage=stage, error=f"truncated in {truncated}" if truncated else None)
+
+        properties = list(schema.get("properties", {}))
+        for reask in range(max_reasks + 1):
+            bad = invalid_fields(value, schema, check)
+            if truncated in properties:
+                # The field being written when the output was cut off, and everything after it
+                bad = sorted(set(bad) | {truncated} | {f for f in properties if f not in value}, key=properties.index)
+            elif truncated is not None:
+                value.pop(truncated, None)
+            if not bad:
+                return value
+            problem = f"invalid fields: {', '.join(bad)}"
+            telemetry.event("invalid_output", model, stage=stage, error=problem)
+            if reask == max_reasks:
+                break
+            log(f"    🔧 Re-asking for {', '.join(bad)}")
+            partial = {k: v for k, v in value.items() if k not in bad}
+            follow_up = REASK_PROMPT.format(
+                prompt=prompt,
+                fields=", ".join(bad),
+                partial=json.dumps(partial, ensure_ascii=False, separators=(",", ":")),
+            )
+            patch, _, patch_truncated = repair_json(await ask(follow_up, field_schema(schema, bad), attempt))
+            truncated = None
+            if isinstance(patch, dict):
+                value = {**value, **{k: patch[k] for k in bad if k in patch}}
+                if patch_truncated in bad:
+                    truncated = patch_truncated
+        if attempt < max_attempts - 1:
+            log(f"    ⚠️  {problem.capitalize()}, retrying ({attempt + 2}/{max_attempts})...")
+    raise StructuredOutputError(f"No valid JSON after {max_attempts} attempts ({problem})")
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Translation Checks
+
+Fast local consistency checks over a multilingual recipe, used by
+review_translations.py to decide which recipes are worth an LLM review:
+
+- every language has the same number of ingredients and steps, and a name
+  and description
+- the numbers in each ingredient and step agree across languages
+- he/ar text has no leftover Latin-script text
+- no text is left untranslated English
+
+Numbers are compared where the languages share a measuring system: Hebrew and
+Spanish ingredients are metric, English uses US measures and the Tunisian
+Arabic often spells quantities out ("كاس ونص"), so ingredients compare he↔es
+and steps compare he↔es↔ar. Two lines only disagree when both have numbers
+and neither line's numbers contain the other's (conversions in parentheses,
+"2 tbsp (30 ml)", are fine).
+
+Latin script in he/ar is fine inside parentheses (etymology, "(beignet)"),
+in all-caps acronyms (TVP) and for words the en/es line also uses (brand
+names); anything else is reported, as is a run of three or more Latin words.
+
+Usage:
+    from translation_checks import check_recipe, content_hash
+
+    issues = check_recipe(recipe)      # [] when nothing looks wrong
+    python translation_checks.py       # report over data/recipes_multilingual_v2
+"""
+
+import re
+import sys
+import json
+import hashlib
+from pathlib import Path
+from fractions import Fraction
+from itertools import combinations
+from typing import Dict, List, Set
+
+
+RECIPES_DIR = Path("data/recipes_multilingual_v2")
+LANGUAGES = ("he", "es", "ar", "en")
+TEXT_FIELDS = ("name", "description", "ingredients", "steps")
+
+# Languages whose numbers should agree, per list field
+NUMBER_GROUPS = {"ingredients": ("he", "es"), "steps": ("he", "es", "ar")}
+
+UNICODE_FRACTIONS = {"½": "1/2", "⅓": "1/3", "⅔": "2/3", "¼": "1/4", "¾": "3/4", "⅛": "1/8"}
+ARABIC_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789")
+NUMBER = re.compile(r"\d+(?:[.,]\d+)?(?:/[1-9]\d*)?")
+
+PARENTHESES = re.compile(r"\([^)]*\)")
+LATIN_WORD = r"[A-Za-zÀ-ÿ][A-Za-zÀ-ÿ'’\-]*"
+LATIN_RUN = re.compile(rf"{LATIN_WORD}(?:[\s,]+{LATIN_WORD}){{2,}}")
+ACRONYM = re.compile(r"^[A-Z]{2,}$")
+
+# Common English words that never occur in Spanish text
+ENGLISH_ONLY = {
+    "the", "and", "with", "until", "into", "of", "for", "or", "to", "in", "minutes",
+    "cup", "cups", "tablespoon", "tablespoons", "teaspoon", "teaspoons",
+    "add", "stir", "heat", "oil", "salt", "water", "about", "then",
+}
+
+
+def _lines(recipe: dict, field: str, lang: str) -> List[str]:
+    value = (recipe.get(field) or {}).get(lang)
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    return [str(value)] if value else []
+
+
+def _numbers(text: str) -> Set[Fraction]:
+    text = text.translate(ARABIC_DIGITS)
+    for char, fraction in UNICODE_FRACTIONS.items():
+        text = text.replace(char, f" {fraction}")
+    return {Fraction(m.group().replace(",", ".")) for m in NUMBER.finditer(text)}
+
+
+def _words(text: str) -> List[str]:
+    return re.findall(LATIN_WORD, text)
+
+
+def _latin_leftovers(text: str, reference: str) -> List[str]:
+    """Latin-script text in a he/ar line that the en/es line doesn't account for."""
+    text = PARENTHESES.sub(" ", text)
+    runs = [m.group() for m in LATIN_RUN.finditer(text)]
+    known = {w.lower() for w in _words(reference)}
+    stray = [w for w in _words(text) if not ACRONYM.match(w) and w.lower() not in known]
+    return runs or stray
+
+
+def _english(text: str, en: str, lang: str) -> bool:
+    """Whether a non-English line is really English."""
+    if len(text.split()) >= 3 and text.strip().lower() == en.strip().lower():
+        return True
+    if lang == "es":
+        words = [w.lower() for w in _words(PARENTHESES.sub(" ", text))]
+        return sum(w in ENGLISH_ONLY for w in words) >= 2
+    return False
+
+
+def check_recipe(recipe: dict) -> List[str]:
+    """
+    Local cross-language consistency issues in a multilingual recipe.
+
+    Args:
+        recipe: Recipe with name/description/ingredients/steps per language
+
+    Returns:
+        Human-readable issues, e.g. "steps.ar[2]: numbers 3 ≠ he 45"; empty if none
+    """
+    issues = []
+
+    for field in ("name", "description"):
+        missing = [lang for lang in LANGUAGES if not _lines(recipe, field, lang)]
+        if missing:
+            issues.append(f"{field}: missing {', '.join(missing)}")
+
+    for field in ("ingredients", "steps"):
+        lines = {lang: _lines(recipe, field, lang) for lang in LANGUAGES}
+        counts = {lang: len(lines[lang]) for lang in LANGUAGES}
+        if len(set(counts.values())) > 1:
+            issues.append(f"{field}: counts differ ({', '.join(f'{k} {v}' for k, v in counts.items())})")
+            continue
+
+        for i in range(counts["en"]):
+            numbers = {lang: _numbers(lines[lang][i]) for lang in NUMBER_GROUPS[field]}
+            for a, b in combinations(NUMBER_GROUPS[field], 2):
+                if numbers[a] and numbers[b] and not (numbers[a] <= numbers[b] or numbers[b] <= numbers[a]):
+                    show = lambda ns: " ".join(str(n) for n in sorted(ns))
+                    issues.append(f"{field}.{b}[{i}]: numbers {show(numbers[b])} ≠ {a} {show(numbers[a])}")
+
+    for field in TEXT_FIELDS:
+        en_lines = _lines(recipe, field, "en")
+        es_lines = _lines(recipe, field, "es")
+        for lang in ("he", "ar"):
+            for i, text in enumerate(_lines(recipe, field, lang)):
+                reference = " ".join(en_lines[i:i + 1] + es_lines[i:i + 1])
+                leftovers = _latin_leftovers(text, reference)
+                if leftovers:
+                    issues.append(f"{field}.{lang}[{i}]: Latin text {', '.join(leftovers[:3])!r}")
+        for lang in ("he", "es", "ar"):
+            for i, text in enumerate(_lines(recipe, field, lang)):
+                if i < len(en_lines) and _english(text, en_lines[i], lang):
+                    issues.append(f"{field}.{lang}[{i}]: untranslated English {text[:40]!r}")
+
+    return issues
+
+
+def content_hash(recipe: dict) -> str:
+    """SHA-256 of a recipe's translated text (what a review reads and may change)."""
+    text = {field: recipe.get(field) for field in TEXT_FIELDS}
+    return hashlib.sha256(json.dumps(text, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def main():
+    files = [Path(a) for a in sys.argv[1:]] or sorted(RECIPES_DIR.glob("*.json"))
+    flagged: Dict[str, List[str]] = {}
+    for path in files:
+        with open(path, "r", encoding="utf-8") as f:
+            issues = check_recipe(json.load(f))
+        if issues:
+            flagged[path.stem] = issues
+
+    for recipe_id, issues in flagged.items():
+        print(f"⚠ {recipe_id}")
+        for issue in issues:
+            print(f"   └─ {issue}")
+    print(f"\n{len(flagged)}/{len(files)} recipes flagged")
+
+
+if __name__ == "__main__":
+    main()
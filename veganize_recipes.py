@@ -26,22 +26,30 @@ Vegan Substitution Rules:
 import os
 import sys
 import json
-import time
-import re
+import asyncio
 from pathlib import Path
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from threading import Lock
 
 load_dotenv()
 
 import google.generativeai as genai
 
+from gemini_async import GeminiRequestLayer, iter_completed
+from llm_cache import ResponseCache, request_key
+from pipeline_journal import PipelineJournal
+from pipeline_state import PipelineState
+from artifact_writer import write_json
+from llm_telemetry import telemetry
+from prompt_prefix import PromptPrefix, compact_json
+from structured_output import (
+    VEGAN_UPDATE_SCHEMA, StructuredOutputError, json_config, parse_valid, request_json, response_text,
+)
+
 # ============================================================================
 # CONFIGURATION - NEVER CHANGE MODEL
 # ============================================================================
 GEMINI_MODEL = "gemini-3-pro-preview"
-genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
 
 # Paths
 CANONICAL_DIR = Path("data/recipes_canonical")
@@ -50,6 +58,18 @@ CANONICAL_DIR = Path("data/recipes_canonical")
 _progress_lock = Lock()
 _progress_count = 0
 
+# Accepted Gemini responses, reused on identical reruns (see llm_cache.py)
+response_cache = ResponseCache()
+
+# Adaptive concurrency + backoff for all Gemini calls (see gemini_async.py)
+gemini = GeminiRequestLayer(max_concurrency=50, stage="veganize")
+
+# Per-recipe progress for --resume (see pipeline_journal.py)
+journal = PipelineJournal("veganize")
+
+# Which recipes are veganized (see pipeline_state.py)
+pipeline_state = PipelineState()
+
 def vprint(*args, **kwargs):
     print(*args, **kwargs, flush=True)
 
@@ -130,14 +150,7 @@ You transform recipes to be 100% plant-based while maintaining authentic flavors
 Return valid JSON with the veganized recipe data."""
 
 
-VEGANIZE_USER_PROMPT = """Veganize this recipe and enhance it for cookbook production.
-
-## ORIGINAL RECIPE:
-```json
-{recipe_json}
-```
-
-## TASKS:
+VEGANIZE_INSTRUCTIONS = """## TASKS:
 
 ### 1. VEGANIZE INGREDIENTS
 - Identify any non-vegan ingredients (meat, fish, eggs, dairy, honey)
@@ -169,22 +182,36 @@ Create a detailed image_generation_prompt following these rules:
 
 ## OUTPUT FORMAT:
 ```json
-{{
+{
   "is_vegan": true,
   "was_veganized": true/false,
   "vegan_substitutions": [
-    {{"original": "fish", "replacement": "tofu with nori", "notes": "for ocean flavor"}}
+    {"original": "fish", "replacement": "tofu with nori", "notes": "for ocean flavor"}
   ],
   "ingredients": [/* updated ingredient list */],
   "intro_paragraph": "40-50 word paragraph...",
   "image_generation_prompt": "Detailed 150-200 word prompt..."
-}}
+}
 ```
 
 Return ONLY valid JSON."""
 
+# Shared by every veganize request; the requests themselves carry only the recipe
+VEGANIZE_PREFIX = PromptPrefix(GEMINI_MODEL, VEGANIZE_SYSTEM_PROMPT + "\n\n" + VEGANIZE_INSTRUCTIONS, stage="veganize")
+
+# Canonical fields the veganizer doesn't need to see
+VEGANIZE_DROP_KEYS = ("slug", "source_file", "image", "related_recipes")
+
 
-def veganize_recipe(canonical: dict, max_retries: int = 5) -> dict:
+VEGANIZE_USER_PROMPT = """Veganize this recipe and enhance it for cookbook production.
+
+## ORIGINAL RECIPE:
+```json
+{recipe_json}
+```"""
+
+
+async def veganize_recipe(canonical: dict, max_retries: int = 5) -> dict:
     """Veganize a canonical recipe using Gemini."""
     
     recipe_id = canonical.get("id", "unknown")
@@ -193,79 +220,64 @@ def veganize_recipe(canonical: dict, max_retries: int = 5) -> dict:
     vprint(f"  🌱 Veganizing: {recipe_name}")
     
     prompt = VEGANIZE_USER_PROMPT.format(
-        recipe_json=json.dumps(canonical, ensure_ascii=False, indent=2)
+        recipe_json=compact_json(canonical, drop=VEGANIZE_DROP_KEYS)
     )
     
-    model = genai.GenerativeModel(
-        GEMINI_MODEL,
-        system_instruction=VEGANIZE_SYSTEM_PROMPT
-    )
+    model = VEGANIZE_PREFIX.generative_model()
+    cache_key = request_key(GEMINI_MODEL, VEGANIZE_PREFIX.text, prompt, {"temperature": 0.3, "max_output_tokens": 16384})
     
-    for attempt in range(max_retries):
-        try:
-            response = model.generate_content(
-                prompt,
-                generation_config=genai.GenerationConfig(
-                    temperature=0.3 + (attempt * 0.1),
-                    max_output_tokens=16384,
-                )
+    async def ask(text: str, schema: dict, attempt: int):
+        response = await gemini.call(lambda: model.generate_content_async(
+            text,
+            generation_config=genai.GenerationConfig(
+                temperature=0.3 + (attempt * 0.1),
+                max_output_tokens=16384,
+                **json_config(schema),
             )
-            
-            if not response.candidates or not response.candidates[0].content.parts:
-                if attempt < max_retries - 1:
-                    vprint(f"    ⚠️  Empty response, retrying ({attempt + 2}/{max_retries})...")
-                    time.sleep(2)
-                    continue
-                else:
-                    raise RuntimeError(f"Empty response after {max_retries} attempts")
-            
-            response_text = response.text.strip()
-            
-            # Remove markdown code blocks
-            if response_text.startswith("```"):
-                response_text = re.sub(r'^```(?:json)?\n?', '', response_text)
-                response_text = re.sub(r'\n?```$', '', response_text)
-            
-            result = json.loads(response_text)
-            
-            # Post-process: remove em dashes from intro_paragraph
-            if "intro_paragraph" in result:
-                result["intro_paragraph"] = result["intro_paragraph"].replace("—", ", ").replace("–", ", ")
-            
-            vprint(f"    ✅ Veganized successfully")
-            return result
-            
-        except json.JSONDecodeError as e:
-            if attempt < max_retries - 1:
-                vprint(f"    ⚠️  JSON error, retrying ({attempt + 2}/{max_retries})...")
-                time.sleep(2)
-                continue
-            else:
-                vprint(f"    ❌ JSON parse failed: {e}")
-                raise
+        ), model=GEMINI_MODEL)
+        return response_text(response)
+    
+    result = parse_valid(response_cache.get(cache_key), VEGAN_UPDATE_SCHEMA)
+    if result is not None:
+        vprint(f"    💾 Cached response")
+    else:
+        try:
+            result = await request_json(ask, prompt, VEGAN_UPDATE_SCHEMA, model=GEMINI_MODEL, stage=gemini.stage,
+                                        max_attempts=max_retries, log=vprint)
+        except StructuredOutputError as e:
+            vprint(f"    ❌ {e}")
+            raise
+        response_cache.put(cache_key, json.dumps(result, ensure_ascii=False), model=GEMINI_MODEL)
+    
+    # Post-process: remove em dashes from intro_paragraph
+    if "intro_paragraph" in result:
+        result["intro_paragraph"] = result["intro_paragraph"].replace("—", ", ").replace("–", ", ")
     
-    raise RuntimeError("Unexpected state in veganize_recipe")
+    vprint(f"    ✅ Veganized successfully")
+    return result
 
 
-def process_recipe(recipe_path: Path, total: int) -> bool:
-    """Process a single recipe."""
+async def process_recipe(recipe_path: Path, total: int, force: bool = False) -> bool:
+    """Process a single recipe (force: even if it is already veganized)."""
     global _progress_count
+    journal.in_flight(recipe_path.stem)
     
     try:
-        with open(recipe_path, 'r', encoding='utf-8') as f:
-            recipe = json.load(f)
-        
-        recipe_id = recipe.get("id", recipe_path.stem)
-        
         # Check if already veganized
-        if recipe.get("veganization_complete"):
-            vprint(f"  ⏭️  Skipping {recipe_id}: already veganized")
+        if not force and pipeline_state.done(recipe_path.stem, "veganize"):
+            vprint(f"  ⏭️  Skipping {recipe_path.stem}: already veganized")
+            journal.done(recipe_path.stem, recipe_path)
             with _progress_lock:
                 _progress_count += 1
             return True
         
+        with open(recipe_path, 'r', encoding='utf-8') as f:
+            recipe = json.load(f)
+        
+        recipe_id = recipe.get("id", recipe_path.stem)
+        
         # Veganize
-        updates = veganize_recipe(recipe)
+        updates = await veganize_recipe(recipe)
         
         # Merge updates into recipe
         recipe["is_vegan"] = updates.get("is_vegan", True)
@@ -286,12 +298,16 @@ def process_recipe(recipe_path: Path, total: int) -> bool:
                 recipe["image"] = {}
             recipe["image"]["generation_prompt"] = updates["image_generation_prompt"]
         
-        # Mark as complete
-        recipe["veganization_complete"] = True
+        # Completion is recorded in the state store, not in the recipe
+        recipe.pop("veganization_complete", None)
         
         # Save
-        with open(recipe_path, 'w', encoding='utf-8') as f:
-            json.dump(recipe, f, ensure_ascii=False, indent=2)
+        write_json(recipe_path, recipe)
+        journal.done(recipe_path.stem, recipe_path)
+        pipeline_state.record(recipe_path.stem, "veganize", output=recipe_path)
+        if "intro_paragraph" in updates:
+            # The rewritten intro counts as the intro stage's output too
+            pipeline_state.record(recipe_path.stem, "intro", output=recipe_path, by="veganize")
         
         with _progress_lock:
             _progress_count += 1
@@ -300,6 +316,7 @@ def process_recipe(recipe_path: Path, total: int) -> bool:
         return True
         
     except Exception as e:
+        journal.failed(recipe_path.stem, e)
         vprint(f"❌ Error processing {recipe_path.name}: {e}")
         return False
 
@@ -309,60 +326,51 @@ def main():
     
     parser = argparse.ArgumentParser(description="Veganize canonical recipes")
     parser.add_argument("--single", type=str, help="Process single recipe by ID")
-    parser.add_argument("--workers", type=int, default=50, help="Number of parallel workers")
+    parser.add_argument("--workers", type=int, default=50, help="Maximum concurrent Gemini requests (adapts below this)")
     parser.add_argument("--force", action="store_true", help="Re-process already veganized recipes")
+    parser.add_argument("--resume", action="store_true", help="Continue the last run, skipping recipes it finished")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached LLM responses (new responses are still cached)")
     args = parser.parse_args()
+    response_cache.read = not args.no_cache
     
     # Get recipe files
     recipe_files = sorted(CANONICAL_DIR.glob("*.json"))
     recipe_files = [f for f in recipe_files if f.name != "SCHEMA.md"]
     
+    # Recipes flagged "veganization_complete" before the state store existed (read once)
+    imported = pipeline_state.backfill("veganize", recipe_files, lambda recipe: recipe.get("veganization_complete"))
+    if imported:
+        vprint(f"📦 Recorded {imported} previously veganized recipes in {pipeline_state.path}")
+    
     if args.single:
         recipe_files = [f for f in recipe_files if args.single in f.stem]
         if not recipe_files:
             vprint(f"❌ Recipe not found: {args.single}")
             sys.exit(1)
-    
-    if args.force:
-        # Clear veganization flags
-        for f in recipe_files:
-            try:
-                with open(f, 'r', encoding='utf-8') as fp:
-                    recipe = json.load(fp)
-                if "veganization_complete" in recipe:
-                    del recipe["veganization_complete"]
-                    with open(f, 'w', encoding='utf-8') as fp:
-                        json.dump(recipe, fp, ensure_ascii=False, indent=2)
-            except:
-                pass
+    else:
+        # Skip recipes finished by the interrupted run
+        todo = set(journal.start_run([f.stem for f in recipe_files], resume=args.resume))
+        recipe_files = [f for f in recipe_files if f.stem in todo]
     
     total = len(recipe_files)
     vprint(f"🌱 Veganizing {total} recipes...")
     vprint(f"   Model: {GEMINI_MODEL}")
-    vprint(f"   Workers: {args.workers}")
+    vprint(f"   Max concurrent requests: {args.workers}")
     vprint()
     vprint("=" * 60)
     
     failed = []
+    gemini.set_max_concurrency(1 if args.single else args.workers)
     
-    if args.workers == 1 or args.single:
-        for recipe_file in recipe_files:
-            if not process_recipe(recipe_file, total):
+    async def run():
+        async for recipe_file, ok, error in iter_completed(lambda f: process_recipe(f, total, args.force), recipe_files):
+            if error is not None:
+                vprint(f"❌ Exception for {recipe_file.name}: {error}")
                 failed.append(recipe_file.stem)
-    else:
-        with ThreadPoolExecutor(max_workers=args.workers) as executor:
-            futures = {
-                executor.submit(process_recipe, f, total): f 
-                for f in recipe_files
-            }
-            for future in as_completed(futures):
-                recipe_file = futures[future]
-                try:
-                    if not future.result():
-                        failed.append(recipe_file.stem)
-                except Exception as e:
-                    vprint(f"❌ Exception for {recipe_file.name}: {e}")
-                    failed.append(recipe_file.stem)
+            elif not ok:
+                failed.append(recipe_file.stem)
+    
+    asyncio.run(run())
     
     # Summary
     vprint()
@@ -371,6 +379,10 @@ def main():
     vprint("=" * 60)
     vprint(f"✅ Successful: {total - len(failed)}")
     vprint(f"❌ Failed: {len(failed)}")
+    vprint(f"💾 LLM cache: {response_cache.summary()}")
+    vprint(f"📡 Gemini: {gemini.summary()}")
+    if telemetry.records:
+        vprint(telemetry.report())
     
     if failed:
         vprint("\nFailed recipes:")